@@ -0,0 +1,33 @@
+"""Draft bundles for crash-safe recording
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('bundles') as batch_op:
+        batch_op.add_column(sa.Column('status', sa.String(length=20), nullable=False, server_default='published'))
+        batch_op.alter_column('public_number', existing_type=sa.Integer(), nullable=True)
+        batch_op.alter_column('public_number_str', existing_type=sa.String(length=10), nullable=True)
+    op.create_index(op.f('ix_bundles_status'), 'bundles', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM bundle_items WHERE bundle_id IN (SELECT id FROM bundles WHERE status = 'draft')")
+    op.execute("DELETE FROM bundles WHERE status = 'draft'")
+    op.drop_index(op.f('ix_bundles_status'), table_name='bundles')
+    with op.batch_alter_table('bundles') as batch_op:
+        batch_op.alter_column('public_number_str', existing_type=sa.String(length=10), nullable=False)
+        batch_op.alter_column('public_number', existing_type=sa.Integer(), nullable=False)
+        batch_op.drop_column('status')
@@ -0,0 +1,59 @@
+"""Full-text search index for bundles
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+# Titles are indexed through fa_normalize(), the Persian normalizer registered on
+# every SQLite connection by app.models.base. Writes to bundles from clients that
+# don't register it (e.g. the sqlite3 shell) will fail while these triggers exist.
+# Migration 013 replaces them with triggers on a column normalized in Python.
+
+
+def _fts_values(row: str) -> str:
+    """SQL values (rowid, title, code, number) for a bundles row alias."""
+    return (
+        f"{row}.id, fa_normalize({row}.title), {row}.code, "
+        f"coalesce({row}.public_number_str || ' ' || {row}.public_number, '')"
+    )
+
+
+def upgrade() -> None:
+    op.execute(
+        "CREATE VIRTUAL TABLE bundles_fts USING fts5("
+        "title, code, number, tokenize=\"unicode61 tokenchars '-_'\")"
+    )
+    op.execute(f"""
+        CREATE TRIGGER bundles_fts_insert AFTER INSERT ON bundles BEGIN
+            INSERT INTO bundles_fts (rowid, title, code, number) VALUES ({_fts_values('new')});
+        END
+    """)
+    op.execute(f"""
+        CREATE TRIGGER bundles_fts_update AFTER UPDATE OF title, code, public_number, public_number_str ON bundles BEGIN
+            DELETE FROM bundles_fts WHERE rowid = old.id;
+            INSERT INTO bundles_fts (rowid, title, code, number) VALUES ({_fts_values('new')});
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER bundles_fts_delete AFTER DELETE ON bundles BEGIN
+            DELETE FROM bundles_fts WHERE rowid = old.id;
+        END
+    """)
+    op.execute(f"INSERT INTO bundles_fts (rowid, title, code, number) SELECT {_fts_values('bundles')} FROM bundles")
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS bundles_fts_delete")
+    op.execute("DROP TRIGGER IF EXISTS bundles_fts_update")
+    op.execute("DROP TRIGGER IF EXISTS bundles_fts_insert")
+    op.execute("DROP TABLE IF EXISTS bundles_fts")
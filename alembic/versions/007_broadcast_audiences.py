@@ -0,0 +1,31 @@
+"""Segmented broadcast audiences
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('broadcast_jobs') as batch_op:
+        batch_op.add_column(sa.Column('active_days', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('bundle_id', sa.Integer(), nullable=True))
+    op.create_index(op.f('ix_users_last_seen'), 'users', ['last_seen'], unique=False)
+    op.create_index('idx_delivery_bundle_user', 'deliveries', ['bundle_id', 'user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_delivery_bundle_user', table_name='deliveries')
+    op.drop_index(op.f('ix_users_last_seen'), table_name='users')
+    with op.batch_alter_table('broadcast_jobs') as batch_op:
+        batch_op.drop_column('bundle_id')
+        batch_op.drop_column('active_days')
@@ -0,0 +1,70 @@
+"""Daily statistics rollup
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+# local_date() is registered on every SQLite connection by app.models.base,
+# which env.py imports; days are calendar days in settings.TZ
+BACKFILL_SQL = [
+    """
+    INSERT INTO daily_stats (day, bundle_id, downloads, unique_users, new_users)
+    SELECT local_date(delivered_at) AS day, bundle_id, count(*), count(DISTINCT user_id), 0
+    FROM deliveries WHERE true
+    GROUP BY day, bundle_id
+    """,
+    """
+    INSERT INTO daily_stats (day, bundle_id, downloads, unique_users, new_users)
+    SELECT local_date(delivered_at) AS day, 0, count(*), count(DISTINCT user_id), 0
+    FROM deliveries WHERE true
+    GROUP BY day
+    """,
+    """
+    INSERT INTO daily_stats (day, bundle_id, downloads, unique_users, new_users)
+    SELECT day, bundle_id, 0, 0, count(*) FROM (
+        SELECT bundle_id, local_date(min(delivered_at)) AS day
+        FROM deliveries GROUP BY bundle_id, user_id
+    ) WHERE true
+    GROUP BY day, bundle_id
+    ON CONFLICT (day, bundle_id) DO UPDATE SET new_users = excluded.new_users
+    """,
+    """
+    INSERT INTO daily_stats (day, bundle_id, downloads, unique_users, new_users)
+    SELECT local_date(first_seen) AS day, 0, 0, 0, count(*)
+    FROM users WHERE true
+    GROUP BY day
+    ON CONFLICT (day, bundle_id) DO UPDATE SET new_users = excluded.new_users
+    """,
+]
+
+
+def upgrade() -> None:
+    op.create_table('daily_stats',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('bundle_id', sa.Integer(), nullable=False),
+    sa.Column('downloads', sa.Integer(), nullable=False),
+    sa.Column('unique_users', sa.Integer(), nullable=False),
+    sa.Column('new_users', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'bundle_id')
+    )
+    op.create_index(op.f('ix_deliveries_delivered_at'), 'deliveries', ['delivered_at'], unique=False)
+    op.create_index(op.f('ix_users_first_seen'), 'users', ['first_seen'], unique=False)
+    
+    for sql in BACKFILL_SQL:
+        op.execute(sql)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_users_first_seen'), table_name='users')
+    op.drop_index(op.f('ix_deliveries_delivered_at'), table_name='deliveries')
+    op.drop_table('daily_stats')
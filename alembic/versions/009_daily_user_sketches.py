@@ -0,0 +1,52 @@
+"""HyperLogLog sketches of daily downloaders
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.hll import HyperLogLog
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+
+def _save(conn, day, sketches):
+    if day is None:
+        return
+    conn.execute(
+        sa.text("UPDATE daily_stats SET users_sketch = :sketch WHERE day = :day AND bundle_id = :bundle_id"),
+        [{"sketch": sketch.to_bytes(), "day": day, "bundle_id": bundle_id} for bundle_id, sketch in sketches.items()]
+    )
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('daily_stats') as batch_op:
+        batch_op.add_column(sa.Column('users_sketch', sa.LargeBinary(), nullable=True))
+    
+    # Backfill one day at a time; local_date() is registered by app.models.base
+    conn = op.get_bind()
+    rows = conn.execute(sa.text(
+        "SELECT local_date(delivered_at) AS day, bundle_id, user_id FROM deliveries ORDER BY delivered_at"
+    ))
+    
+    current_day = None
+    sketches = {}
+    for row in rows:
+        if row.day != current_day:
+            _save(conn, current_day, sketches)
+            current_day, sketches = row.day, {}
+        for bundle_id in (row.bundle_id, 0):
+            sketches.setdefault(bundle_id, HyperLogLog()).add(row.user_id)
+    _save(conn, current_day, sketches)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('daily_stats') as batch_op:
+        batch_op.drop_column('users_sketch')
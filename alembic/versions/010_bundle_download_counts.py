@@ -0,0 +1,34 @@
+"""Denormalized per-bundle download counters
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('bundles') as batch_op:
+        batch_op.add_column(sa.Column('download_count', sa.Integer(), nullable=False, server_default='0'))
+    op.create_index(op.f('ix_bundles_download_count'), 'bundles', ['download_count'], unique=False)
+    
+    # Backfill from the delivery history
+    op.execute("""
+        UPDATE bundles SET download_count = (
+            SELECT count(*) FROM deliveries WHERE deliveries.bundle_id = bundles.id
+        )
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_bundles_download_count'), table_name='bundles')
+    with op.batch_alter_table('bundles') as batch_op:
+        batch_op.drop_column('download_count')
@@ -0,0 +1,26 @@
+"""Indexes on the columns incremental backups select changed rows by
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '011'
+down_revision = '010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_users_unreachable_at'), 'users', ['unreachable_at'], unique=False)
+    op.create_index(op.f('ix_deliveries_deleted_at'), 'deliveries', ['deleted_at'], unique=False)
+    op.create_index(op.f('ix_requests_closed_at'), 'requests', ['closed_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_requests_closed_at'), table_name='requests')
+    op.drop_index(op.f('ix_deliveries_deleted_at'), table_name='deliveries')
+    op.drop_index(op.f('ix_users_unreachable_at'), table_name='users')
@@ -0,0 +1,33 @@
+"""Delivery change timestamp for incremental backups
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '012'
+down_revision = '011'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('deliveries') as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.create_index(op.f('ix_deliveries_updated_at'), 'deliveries', ['updated_at'], unique=False)
+    # updated_at replaces deleted_at as the incremental backup watermark
+    op.drop_index(op.f('ix_deliveries_deleted_at'), table_name='deliveries')
+    
+    # Backfill, so rows deleted since the last backup are still exported by the next one
+    op.execute("UPDATE deliveries SET updated_at = coalesce(deleted_at, delivered_at)")
+
+
+def downgrade() -> None:
+    op.create_index(op.f('ix_deliveries_deleted_at'), 'deliveries', ['deleted_at'], unique=False)
+    op.drop_index(op.f('ix_deliveries_updated_at'), table_name='deliveries')
+    with op.batch_alter_table('deliveries') as batch_op:
+        batch_op.drop_column('updated_at')
@@ -0,0 +1,81 @@
+"""Index a Python-normalized bundle title for search
+
+Revision ID: 013
+Revises: 012
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.text import normalize_persian
+
+# revision identifiers, used by Alembic.
+revision = '013'
+down_revision = '012'
+branch_labels = None
+depends_on = None
+
+# The triggers from 004 called fa_normalize(), which only exists on connections
+# that register it, so writes from any other client failed. The Bundle model now
+# stores normalize_persian(title) in search_title and the triggers index it as is.
+
+
+def _fts_values(row: str, title: str) -> str:
+    """SQL values (rowid, title, code, number) for a bundles row alias."""
+    return (
+        f"{row}.id, {title.format(row=row)}, {row}.code, "
+        f"coalesce({row}.public_number_str || ' ' || {row}.public_number, '')"
+    )
+
+
+def _create_index(title: str, watched: str) -> None:
+    """Create the bundles_fts triggers and rebuild the index contents."""
+    op.execute(f"""
+        CREATE TRIGGER bundles_fts_insert AFTER INSERT ON bundles BEGIN
+            INSERT INTO bundles_fts (rowid, title, code, number) VALUES ({_fts_values('new', title)});
+        END
+    """)
+    op.execute(f"""
+        CREATE TRIGGER bundles_fts_update AFTER UPDATE OF {watched}, code, public_number, public_number_str ON bundles BEGIN
+            DELETE FROM bundles_fts WHERE rowid = old.id;
+            INSERT INTO bundles_fts (rowid, title, code, number) VALUES ({_fts_values('new', title)});
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER bundles_fts_delete AFTER DELETE ON bundles BEGIN
+            DELETE FROM bundles_fts WHERE rowid = old.id;
+        END
+    """)
+    op.execute("DELETE FROM bundles_fts")
+    op.execute(f"INSERT INTO bundles_fts (rowid, title, code, number) SELECT {_fts_values('bundles', title)} FROM bundles")
+
+
+def _drop_triggers() -> None:
+    # Batch mode recreates the table on SQLite, which would drop them anyway
+    op.execute("DROP TRIGGER IF EXISTS bundles_fts_delete")
+    op.execute("DROP TRIGGER IF EXISTS bundles_fts_update")
+    op.execute("DROP TRIGGER IF EXISTS bundles_fts_insert")
+
+
+def upgrade() -> None:
+    _drop_triggers()
+    with op.batch_alter_table('bundles') as batch_op:
+        batch_op.add_column(sa.Column('search_title', sa.String(length=500), nullable=True))
+    
+    bind = op.get_bind()
+    rows = bind.execute(sa.text("SELECT id, title FROM bundles")).fetchall()
+    if rows:
+        bind.execute(
+            sa.text("UPDATE bundles SET search_title = :search_title WHERE id = :id"),
+            [{"id": row.id, "search_title": normalize_persian(row.title)} for row in rows]
+        )
+    
+    _create_index("coalesce({row}.search_title, '')", "search_title")
+
+
+def downgrade() -> None:
+    _drop_triggers()
+    with op.batch_alter_table('bundles') as batch_op:
+        batch_op.drop_column('search_title')
+    _create_index("fa_normalize({row}.title)", "title")
@@ -14,6 +14,8 @@ class Settings(BaseSettings):
     
     # Database
     DB_URL: str = "sqlite:///data/app.db"
+    SLOW_QUERY_MS: int = 200  # Statements slower than this are logged with their parameters; 0 disables
+    DB_BUSY_TIMEOUT_MS: int = 5000  # How long a write waits for a lock held by another connection
     
     # Timezone and logging
     TZ: str = "Asia/Tehran"
@@ -22,14 +24,58 @@ class Settings(BaseSettings):
     # Auto-deletion delay (seconds)
     AUTO_DELETE_DELAY: int = 180
     
+    # Recording: messages buffered before being written to the draft bundle
+    RECORDING_BATCH_SIZE: int = 10
+    
+    # Maximum message ID span accepted by /import
+    IMPORT_MAX_RANGE: int = 5000
+    
+    # Backups
+    BACKUP_INTERVAL_HOURS: int = 0  # 0 disables scheduled backups
+    BACKUP_RETENTION: int = 7  # Number of backups to keep
+    BACKUP_PAGES_PER_STEP: int = 1024  # Pages copied per online-backup step
+    BACKUP_STEP_SLEEP: float = 0.05  # Pause between steps so writers can proceed
+    BACKUP_STEP_TIMEOUT: float = 60  # Seconds a stepped copy may keep restarting before a single-step copy is taken
+    BACKUP_VOLUME_SIZE_MB: int = 45  # Max size per uploaded volume (Bot API limit is 50 MB)
+    BACKUP_INCREMENTAL: bool = False  # Scheduled backups export only changed rows between full ones
+    BACKUP_FULL_INTERVAL_HOURS: int = 24  # Age after which the next scheduled backup is full again
+    BACKUP_CHUNK_ROWS: int = 50000  # Rows per compressed JSONL chunk in incremental backups
+    EXPORT_CHUNK_ROWS: int = 5000  # Rows fetched per round trip by admin CSV/JSONL exports
+    
+    # Statistics
+    STATS_CACHE_INTERVAL_MINUTES: int = 5  # How often cached admin stats reports are recomputed
+    ANALYTICS_DIR: str = "data/analytics"  # Memory-mapped delivery columns for cohort/retention reports
+    
     # Rate limiting
     FLOOD_WAIT_DELAY: int = 1
     MAX_RETRIES: int = 3
     
+    # Broadcast send rate (messages/second), adapted to flood-control feedback
+    BROADCAST_INITIAL_RATE: float = 10.0
+    BROADCAST_MIN_RATE: float = 1.0
+    BROADCAST_MAX_RATE: float = 30.0  # Telegram's documented bulk limit
+    BROADCAST_PROGRESS_INTERVAL: float = 5.0  # Min seconds between progress message edits
+    BROADCAST_STOP_TIMEOUT: float = 120.0  # Max seconds shutdown waits for in-flight broadcast sends (above the Bot API request timeout)
+    
+    # Update dispatching
+    UPDATE_WORKERS: int = 16  # Number of per-user shards processed in parallel
+    UPDATE_QUEUE_SIZE: int = 100  # Pending updates per shard before polling waits
+    
+    # User anti-flood and admission control
+    USER_RATE_LIMIT: int = 10  # Max user actions per window
+    USER_RATE_WINDOW: int = 60  # Sliding window length (seconds)
+    USER_MAX_CONCURRENCY: int = 12  # User handlers allowed to run at once; kept below UPDATE_WORKERS
+    USER_BULK_CONCURRENCY: int = 8  # Of those, how many may be deliveries; the rest stay free for /start etc.
+    
+    # Metrics
+    METRICS_PORT: int = 0  # Port of the Prometheus /metrics endpoint; 0 disables it
+    METRICS_HOST: str = "127.0.0.1"  # Keep it local unless the scraper runs elsewhere
+    TRACE_SUMMARY_LOG: bool = False  # Log one line per update/job with its Bot API calls and queries
+    
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
-
+    
     @property
     def admin_ids_list(self) -> List[int]:
         """Parse admin IDs from comma-separated string."""
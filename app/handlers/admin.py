@@ -1,8 +1,12 @@
 """Admin panel handlers."""
+import asyncio
 import logging
-import os
+from datetime import date, datetime, timedelta
+from html import escape
+from pathlib import Path
 from aiogram import Router, F
-from aiogram.types import Message, CallbackQuery, FSInputFile
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import Message, CallbackQuery
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
@@ -14,12 +18,16 @@ from app.repo.bundle import BundleRepository
 from app.repo.channel import ChannelRepository
 from app.repo.message import MessageRepository
 from app.repo.request import RequestRepository
+from app.services.analytics import AnalyticsService
+from app.services.backup import BackupService
+from app.services.export import ExportService, EXPORT_TABLES
 from app.services.broadcast import BroadcastService
-from app.services.stats import StatsService
+from app.services.stats import StatsService, LEADERBOARD_PERIODS, stats_cache
 from app.services.join_gate import JoinGateService
-from app.ui.fa import PersianTexts, PersianKeyboards
+from app.ui.fa import PersianTexts, PersianKeyboards, format_broadcast_status, format_duration, format_analytics_report
 from app.utils.validators import validate_channel_link, extract_chat_id_from_link
-from app.utils.helpers import generate_deep_link, create_backup
+from app.utils.helpers import generate_deep_link
+from app.utils.dates import local_date
 
 logger = logging.getLogger(__name__)
 router = Router()
@@ -34,17 +42,66 @@ class AdminStates(StatesGroup):
     ending_message = State()
     broadcast_message = State()
     broadcast_confirm = State()
+    broadcast_audience_bundle = State()
+    export_range = State()
 
 
 # Store temporary data
 admin_temp_data = {}
 
+# Items per page in admin list screens
+PAGE_SIZE = 10
+
+# Report template of each cached stats period
+STATS_REPORT_TEXTS = {
+    "weekly": PersianTexts.STATS_WEEKLY_REPORT,
+    "monthly": PersianTexts.STATS_MONTHLY_REPORT,
+    "total": PersianTexts.STATS_TOTAL_REPORT,
+}
+
 
 def is_admin(user_id: int) -> bool:
     """Check if user is admin."""
     return user_id in settings.admin_ids_list
 
 
+def _page_cursor(data: str) -> tuple:
+    """Parse (after_id, before_id) from '<prefix>_page_<n|p>_<id>' callback data."""
+    parts = data.split("_")
+    if len(parts) >= 4 and parts[-3] == "page":
+        cursor = int(parts[-1])
+        return (cursor, None) if parts[-2] == "n" else (None, cursor)
+    return None, None
+
+
+def _page_navigation(prefix: str, page) -> tuple:
+    """Build (prev_data, next_data) callback data for a keyset page."""
+    if not page.items:
+        return None, None
+    prev_data = f"{prefix}_page_p_{page.items[0].id}" if page.has_prev else None
+    next_data = f"{prefix}_page_n_{page.items[-1].id}" if page.has_next else None
+    return prev_data, next_data
+
+
+def _short(text: str, length: int = 40) -> str:
+    """Shorten text for button labels."""
+    return text if len(text) <= length else text[:length - 1] + "…"
+
+
+def _bundle_text(bundle) -> str:
+    """Render bundle details."""
+    status = "✅ فعال" if bundle.is_active else "❌ غیرفعال"
+    return f"📦 {bundle.public_number_str} - {escape(bundle.title)}\n🔗 کد: {bundle.code}\n📊 وضعیت: {status}"
+
+
+def _bundle_buttons(bundles) -> list:
+    """Build list buttons opening bundle details."""
+    return [
+        (_short(f"{'✅' if b.is_active else '❌'} {b.public_number_str} - {b.title}"), f"bundle_view_{b.id}")
+        for b in bundles
+    ]
+
+
 @router.message(Command("admin"))
 async def admin_panel(message: Message, state: FSMContext):
     """Show admin panel."""
@@ -89,27 +146,105 @@ async def bundle_search_execute(message: Message, state: FSMContext):
     """Execute bundle search."""
     query = message.text.strip()
     
+    admin_temp_data.setdefault(message.from_user.id, {})["bundle_search_query"] = query
+    
+    try:
+        text, keyboard = _render_search_page(query, 0)
+        await message.reply(text, reply_markup=keyboard)
+    finally:
+        await state.clear()
+
+
+@router.callback_query(F.data.startswith("bsearch_page_"))
+async def bundle_search_page(callback: CallbackQuery):
+    """Show another page of bundle search results."""
+    if not is_admin(callback.from_user.id):
+        await callback.answer(PersianTexts.ACCESS_DENIED)
+        return
+    
+    query = admin_temp_data.get(callback.from_user.id, {}).get("bundle_search_query")
+    if query is None:
+        await callback.answer(PersianTexts.ERROR_OCCURRED)
+        return
+    
+    offset = max(0, int(callback.data.split("_")[-1]))
+    text, keyboard = _render_search_page(query, offset)
+    await callback.message.edit_text(text, reply_markup=keyboard)
+
+
+def _render_search_page(query: str, offset: int) -> tuple:
+    """Render one page of search results as a single message."""
     db = next(get_db())
     try:
         bundle_repo = BundleRepository(db)
-        bundles = bundle_repo.search_bundles(query)
+        bundles = bundle_repo.search_bundles(query, limit=PAGE_SIZE + 1, offset=offset)
+    finally:
+        db.close()
+    
+    if not bundles:
+        return PersianTexts.NO_BUNDLES_FOUND, PersianKeyboards.paginated_list([], back_data="admin_bundles")
+    
+    has_next = len(bundles) > PAGE_SIZE
+    bundles = bundles[:PAGE_SIZE]
+    
+    keyboard = PersianKeyboards.paginated_list(
+        _bundle_buttons(bundles),
+        prev_data=f"bsearch_page_{offset - PAGE_SIZE}" if offset > 0 else None,
+        next_data=f"bsearch_page_{offset + PAGE_SIZE}" if has_next else None,
+        back_data="admin_bundles"
+    )
+    return PersianTexts.BUNDLE_SEARCH_RESULTS.format(query=escape(query)), keyboard
+
+
+@router.callback_query((F.data == "bundle_list") | F.data.startswith("bundle_page_"))
+async def bundle_list(callback: CallbackQuery):
+    """Show a page of bundles."""
+    if not is_admin(callback.from_user.id):
+        await callback.answer(PersianTexts.ACCESS_DENIED)
+        return
+    
+    after_id, before_id = _page_cursor(callback.data)
+    
+    db = next(get_db())
+    try:
+        bundle_repo = BundleRepository(db)
+        page = bundle_repo.get_bundles_page(after_id=after_id, before_id=before_id, limit=PAGE_SIZE)
+    finally:
+        db.close()
+    
+    prev_data, next_data = _page_navigation("bundle", page)
+    await callback.message.edit_text(
+        PersianTexts.BUNDLE_LIST if page.items else PersianTexts.NO_BUNDLES_FOUND,
+        reply_markup=PersianKeyboards.paginated_list(
+            _bundle_buttons(page.items), prev_data, next_data, back_data="admin_bundles"
+        )
+    )
+
+
+@router.callback_query(F.data.startswith("bundle_view_"))
+async def bundle_view(callback: CallbackQuery):
+    """Show bundle details with actions."""
+    if not is_admin(callback.from_user.id):
+        await callback.answer(PersianTexts.ACCESS_DENIED)
+        return
+    
+    bundle_id = int(callback.data.split("_")[-1])
+    
+    db = next(get_db())
+    try:
+        bundle_repo = BundleRepository(db)
+        bundle = bundle_repo.get_bundle_by_id(bundle_id)
         
-        if not bundles:
-            await message.reply(PersianTexts.NO_BUNDLES_FOUND)
-            await state.clear()
+        if not bundle:
+            await callback.answer("بسته یافت نشد")
             return
         
-        # Show results
-        for bundle in bundles[:10]:  # Limit to 10 results
-            status = "✅ فعال" if bundle.is_active else "❌ غیرفعال"
-            text = f"📦 {bundle.public_number_str} - {bundle.title}\n🔗 کد: {bundle.code}\n📊 وضعیت: {status}"
-            
-            keyboard = PersianKeyboards.bundle_actions(bundle.id, bundle.is_active)
-            await message.reply(text, reply_markup=keyboard)
-        
+        await callback.message.edit_text(
+            _bundle_text(bundle),
+            reply_markup=PersianKeyboards.bundle_actions(bundle.id, bundle.is_active)
+        )
     finally:
         db.close()
-        await state.clear()
 
 
 @router.callback_query(F.data.startswith("bundle_copy_"))
@@ -154,6 +289,14 @@ async def activate_bundle(callback: CallbackQuery):
             await callback.answer(PersianTexts.BUNDLE_ACTIVATED)
         else:
             await callback.answer(PersianTexts.BUNDLE_DEACTIVATED)
+        
+        # Refresh the details message in place
+        bundle = bundle_repo.get_bundle_by_id(bundle_id)
+        if bundle:
+            await callback.message.edit_text(
+                _bundle_text(bundle),
+                reply_markup=PersianKeyboards.bundle_actions(bundle.id, bundle.is_active)
+            )
     finally:
         db.close()
 
@@ -259,7 +402,7 @@ async def channel_add_execute(message: Message, state: FSMContext):
         
         await message.reply(PersianTexts.CHANNEL_ADDED)
         logger.info(f"Channel {title} ({chat_id}) added by admin {message.from_user.id}")
-        
+    
     except Exception as e:
         logger.error(f"Error adding channel: {e}")
         await message.reply(PersianTexts.ERROR_OCCURRED)
@@ -268,29 +411,57 @@ async def channel_add_execute(message: Message, state: FSMContext):
         await state.clear()
 
 
-@router.callback_query(F.data == "channel_list")
+@router.callback_query((F.data == "channel_list") | F.data.startswith("channel_page_"))
 async def channel_list(callback: CallbackQuery):
-    """Show channel list."""
+    """Show a page of channels."""
     if not is_admin(callback.from_user.id):
         await callback.answer(PersianTexts.ACCESS_DENIED)
         return
     
+    after_id, before_id = _page_cursor(callback.data)
+    await _show_channel_page(callback, after_id, before_id)
+
+
+async def _show_channel_page(callback: CallbackQuery, after_id: int = None, before_id: int = None):
+    """Render a page of channels into the callback message."""
     db = next(get_db())
     try:
         channel_repo = ChannelRepository(db)
-        channels = channel_repo.get_all_active_channels()
+        page = channel_repo.get_channels_page(after_id=after_id, before_id=before_id, limit=PAGE_SIZE)
+    finally:
+        db.close()
+    
+    buttons = [(_short(f"📢 {channel.title}"), f"channel_view_{channel.id}") for channel in page.items]
+    prev_data, next_data = _page_navigation("channel", page)
+    
+    await callback.message.edit_text(
+        PersianTexts.CHANNEL_LIST if page.items else PersianTexts.NO_CHANNELS,
+        reply_markup=PersianKeyboards.paginated_list(buttons, prev_data, next_data, back_data="admin_channels")
+    )
+
+
+@router.callback_query(F.data.startswith("channel_view_"))
+async def channel_view(callback: CallbackQuery):
+    """Show channel details with actions."""
+    if not is_admin(callback.from_user.id):
+        await callback.answer(PersianTexts.ACCESS_DENIED)
+        return
+    
+    channel_id = int(callback.data.split("_")[-1])
+    
+    db = next(get_db())
+    try:
+        channel_repo = ChannelRepository(db)
+        channel = channel_repo.get_channel_by_id(channel_id)
         
-        if not channels:
-            await callback.message.edit_text(PersianTexts.NO_CHANNELS)
+        if not channel:
+            await callback.answer("کانال یافت نشد")
             return
         
-        for channel in channels:
-            status = "✅ فعال" if channel.is_active else "❌ غیرفعال"
-            text = f"📢 {channel.title}\n🆔 {channel.chat_id}\n📊 وضعیت: {status}"
-            
-            keyboard = PersianKeyboards.channel_actions(channel.id)
-            await callback.message.answer(text, reply_markup=keyboard)
-            
+        status = "✅ فعال" if channel.is_active else "❌ غیرفعال"
+        text = f"📢 {escape(channel.title)}\n🆔 {channel.chat_id}\n📊 وضعیت: {status}"
+        
+        await callback.message.edit_text(text, reply_markup=PersianKeyboards.channel_actions(channel.id))
     finally:
         db.close()
 
@@ -308,14 +479,14 @@ async def delete_channel(callback: CallbackQuery):
     try:
         channel_repo = ChannelRepository(db)
         success = channel_repo.delete_channel(channel_id)
-        
-        if success:
-            await callback.answer(PersianTexts.CHANNEL_REMOVED)
-            await callback.message.delete()
-        else:
-            await callback.answer("خطا در حذف کانال")
     finally:
         db.close()
+    
+    if success:
+        await callback.answer(PersianTexts.CHANNEL_REMOVED)
+        await _show_channel_page(callback)
+    else:
+        await callback.answer("خطا در حذف کانال")
 
 
 # Messages Management
@@ -353,7 +524,7 @@ async def starting_message_save(message: Message, state: FSMContext):
         
         await message.reply(PersianTexts.STARTING_MSG_SET)
         logger.info(f"Starting message set by admin {message.from_user.id}")
-        
+    
     except Exception as e:
         logger.error(f"Error setting starting message: {e}")
         await message.reply(PersianTexts.ERROR_OCCURRED)
@@ -421,7 +592,7 @@ async def ending_message_save(message: Message, state: FSMContext):
         
         await message.reply(PersianTexts.ENDING_MSG_ADDED)
         logger.info(f"Ending message '{name}' added by admin {admin_id}")
-        
+    
     except Exception as e:
         logger.error(f"Error adding ending message: {e}")
         await message.reply(PersianTexts.ERROR_OCCURRED)
@@ -433,27 +604,58 @@ async def ending_message_save(message: Message, state: FSMContext):
 
 
 # Requests Management
-@router.callback_query(F.data == "admin_requests")
+@router.callback_query((F.data == "admin_requests") | F.data.startswith("request_page_"))
 async def requests_menu(callback: CallbackQuery):
-    """Show requests."""
+    """Show a page of open requests."""
+    if not is_admin(callback.from_user.id):
+        await callback.answer(PersianTexts.ACCESS_DENIED)
+        return
+    
+    after_id, before_id = _page_cursor(callback.data)
+    await _show_request_page(callback, after_id, before_id)
+
+
+async def _show_request_page(callback: CallbackQuery, after_id: int = None, before_id: int = None):
+    """Render a page of open requests into the callback message."""
+    db = next(get_db())
+    try:
+        request_repo = RequestRepository(db)
+        page = request_repo.get_open_requests_page(after_id=after_id, before_id=before_id, limit=PAGE_SIZE)
+    finally:
+        db.close()
+    
+    buttons = [
+        (_short(f"📝 {request.created_at.strftime('%m-%d %H:%M')} - {request.text}"), f"request_view_{request.id}")
+        for request in page.items
+    ]
+    prev_data, next_data = _page_navigation("request", page)
+    
+    await callback.message.edit_text(
+        PersianTexts.REQUESTS_MENU if page.items else PersianTexts.NO_REQUESTS,
+        reply_markup=PersianKeyboards.paginated_list(buttons, prev_data, next_data, back_data="admin_main")
+    )
+
+
+@router.callback_query(F.data.startswith("request_view_"))
+async def request_view(callback: CallbackQuery):
+    """Show request details with actions."""
     if not is_admin(callback.from_user.id):
         await callback.answer(PersianTexts.ACCESS_DENIED)
         return
     
+    request_id = int(callback.data.split("_")[-1])
+    
     db = next(get_db())
     try:
         request_repo = RequestRepository(db)
-        requests = request_repo.get_open_requests()
+        request = request_repo.get_request_by_id(request_id)
         
-        if not requests:
-            await callback.message.edit_text(PersianTexts.NO_REQUESTS)
+        if not request:
+            await callback.answer("درخواست یافت نشد")
             return
         
-        for request in requests[:10]:  # Limit to 10
-            text = f"👤 کاربر: {request.user_id}\n📝 متن: {request.text}\n📅 تاریخ: {request.created_at.strftime('%Y-%m-%d %H:%M')}"
-            keyboard = PersianKeyboards.request_actions(request.id)
-            await callback.message.answer(text, reply_markup=keyboard)
-            
+        text = f"👤 کاربر: {request.user_id}\n📝 متن: {escape(request.text)}\n📅 تاریخ: {request.created_at.strftime('%Y-%m-%d %H:%M')}"
+        await callback.message.edit_text(text, reply_markup=PersianKeyboards.request_actions(request.id))
     finally:
         db.close()
 
@@ -471,57 +673,149 @@ async def resolve_request(callback: CallbackQuery):
     try:
         request_repo = RequestRepository(db)
         success = request_repo.resolve_request(request_id)
-        
-        if success:
-            await callback.answer(PersianTexts.REQUEST_RESOLVED)
-            await callback.message.delete()
-        else:
-            await callback.answer("خطا در حل درخواست")
     finally:
         db.close()
+    
+    if success:
+        await callback.answer(PersianTexts.REQUEST_RESOLVED)
+        await _show_request_page(callback)
+    else:
+        await callback.answer("خطا در حل درخواست")
 
 
 # Broadcast
 @router.callback_query(F.data == "admin_broadcast")
 async def broadcast_start(callback: CallbackQuery, state: FSMContext):
-    """Start broadcast."""
+    """Start broadcast, listing broadcasts that are still in progress."""
     if not is_admin(callback.from_user.id):
         await callback.answer(PersianTexts.ACCESS_DENIED)
         return
     
+    broadcast_service = BroadcastService(callback.bot)
+    buttons = [
+        (f"📡 #{job['id']} – {PersianTexts.BROADCAST_STATUSES[job['status']]}", f"broadcast_job_{job['id']}")
+        for job in broadcast_service.get_active_jobs()
+    ]
+    
     await state.set_state(AdminStates.broadcast_message)
-    await callback.message.edit_text(PersianTexts.SEND_BROADCAST)
+    await callback.message.edit_text(
+        PersianTexts.SEND_BROADCAST,
+        reply_markup=PersianKeyboards.paginated_list(buttons) if buttons else None
+    )
+
+
+async def _broadcast_preview(data: dict, bot) -> tuple:
+    """Preview text and keyboard for the broadcast in admin_temp_data, counted with its audience filter."""
+    # The audience count can scan many users, so keep it off the event loop
+    user_count = await asyncio.to_thread(
+        BroadcastService(bot).get_user_count,
+        active_days=data["broadcast_active_days"],
+        bundle_id=data["broadcast_bundle_id"]
+    )
+    
+    if data["broadcast_bundle_id"]:
+        audience = PersianTexts.AUDIENCE_BUNDLE.format(number=data["broadcast_bundle_number"])
+    elif data["broadcast_active_days"]:
+        audience = PersianTexts.AUDIENCE_ACTIVE.format(days=data["broadcast_active_days"])
+    else:
+        audience = PersianTexts.AUDIENCE_ALL
+    
+    text = PersianTexts.BROADCAST_PREVIEW.format(
+        message=data["broadcast_preview"],
+        audience=audience,
+        count=user_count
+    )
+    return text, PersianKeyboards.broadcast_confirm(user_count)
 
 
 @router.message(AdminStates.broadcast_message)
 async def broadcast_confirm(message: Message, state: FSMContext):
     """Confirm broadcast."""
     # Store message info
-    admin_temp_data[message.from_user.id] = {
+    data = {
         "broadcast_chat_id": message.chat.id,
-        "broadcast_message_id": message.message_id
+        "broadcast_message_id": message.message_id,
+        "broadcast_preview": message.text or "[پیام رسانه‌ای]",
+        "broadcast_active_days": None,
+        "broadcast_bundle_id": None,
+        "broadcast_bundle_number": None
     }
-    
-    # Get user count
-    broadcast_service = BroadcastService(message.bot)
-    user_count = broadcast_service.get_user_count()
+    admin_temp_data[message.from_user.id] = data
     
     # Show preview
-    preview_text = PersianTexts.BROADCAST_PREVIEW.format(
-        message=message.text or "[پیام رسانه‌ای]",
-        count=user_count
-    )
+    preview_text, keyboard = await _broadcast_preview(data, message.bot)
     
     await state.set_state(AdminStates.broadcast_confirm)
-    await message.reply(
-        preview_text,
-        reply_markup=PersianKeyboards.broadcast_confirm(user_count)
-    )
+    await message.reply(preview_text, reply_markup=keyboard)
+
+
+@router.callback_query(F.data.startswith("broadcast_audience_"))
+async def broadcast_audience(callback: CallbackQuery, state: FSMContext):
+    """Choose who receives the broadcast."""
+    if not is_admin(callback.from_user.id):
+        await callback.answer(PersianTexts.ACCESS_DENIED)
+        return
+    
+    data = admin_temp_data.get(callback.from_user.id)
+    if not data or "broadcast_message_id" not in data:
+        await callback.answer("خطا در اطلاعات پیام")
+        return
+    
+    if callback.data == "broadcast_audience_bundle":
+        await state.set_state(AdminStates.broadcast_audience_bundle)
+        await callback.message.edit_text(PersianTexts.SEND_AUDIENCE_BUNDLE)
+        await callback.answer()
+        return
+    
+    data["broadcast_bundle_id"] = None
+    data["broadcast_bundle_number"] = None
+    if callback.data.startswith("broadcast_audience_active_"):
+        data["broadcast_active_days"] = int(callback.data.split("_")[3])
+    else:
+        data["broadcast_active_days"] = None
+    
+    preview_text, keyboard = await _broadcast_preview(data, callback.bot)
+    try:
+        await callback.message.edit_text(preview_text, reply_markup=keyboard)
+    except TelegramBadRequest as e:
+        # Same audience chosen again
+        logger.debug(f"Broadcast preview not updated: {e}")
+    await callback.answer()
+
+
+@router.message(AdminStates.broadcast_audience_bundle)
+async def broadcast_audience_bundle(message: Message, state: FSMContext):
+    """Target the broadcast at users who downloaded a bundle, given its code or number."""
+    data = admin_temp_data.get(message.from_user.id)
+    if not data or "broadcast_message_id" not in data:
+        await state.clear()
+        return
+    
+    query = (message.text or "").strip()
+    db = next(get_db())
+    try:
+        bundle_repo = BundleRepository(db)
+        bundle = bundle_repo.get_bundle_by_number(int(query)) if query.isdigit() else None
+        bundle = bundle or bundle_repo.get_bundle_by_code(query)
+        bundle_info = (bundle.id, bundle.public_number_str) if bundle else None
+    finally:
+        db.close()
+    
+    if not bundle_info:
+        await message.reply(PersianTexts.AUDIENCE_BUNDLE_NOT_FOUND)
+        return
+    
+    data["broadcast_active_days"] = None
+    data["broadcast_bundle_id"], data["broadcast_bundle_number"] = bundle_info
+    
+    preview_text, keyboard = await _broadcast_preview(data, message.bot)
+    await state.set_state(AdminStates.broadcast_confirm)
+    await message.reply(preview_text, reply_markup=keyboard)
 
 
 @router.callback_query(F.data == "broadcast_send")
 async def broadcast_execute(callback: CallbackQuery, state: FSMContext):
-    """Execute broadcast."""
+    """Queue the broadcast as a background job."""
     if not is_admin(callback.from_user.id):
         await callback.answer(PersianTexts.ACCESS_DENIED)
         return
@@ -534,24 +828,22 @@ async def broadcast_execute(callback: CallbackQuery, state: FSMContext):
     
     data = admin_temp_data[admin_id]
     
-    await callback.answer(PersianTexts.BROADCAST_STARTED)
-    await callback.message.edit_text(PersianTexts.BROADCAST_STARTED)
-    
-    # Execute broadcast
     broadcast_service = BroadcastService(callback.bot)
-    result = await broadcast_service.send_broadcast(
+    job_id = broadcast_service.create_job(
+        admin_id,
         data["broadcast_chat_id"],
-        data["broadcast_message_id"]
+        data["broadcast_message_id"],
+        active_days=data["broadcast_active_days"],
+        bundle_id=data["broadcast_bundle_id"]
     )
+    broadcast_service.set_status_message(job_id, callback.message.chat.id, callback.message.message_id)
     
-    # Send result
-    result_text = PersianTexts.BROADCAST_COMPLETED.format(
-        success=result["success"],
-        failed=result["failed"]
+    await callback.answer(PersianTexts.BROADCAST_STARTED)
+    await callback.message.edit_text(
+        PersianTexts.BROADCAST_QUEUED.format(id=job_id),
+        reply_markup=PersianKeyboards.broadcast_job_actions(job_id, "pending")
     )
     
-    await callback.message.edit_text(result_text)
-    
     # Clean up
     await state.clear()
     if admin_id in admin_temp_data:
@@ -570,6 +862,57 @@ async def broadcast_cancel(callback: CallbackQuery, state: FSMContext):
         del admin_temp_data[admin_id]
 
 
+async def _show_broadcast_job(callback: CallbackQuery, job_id: int):
+    """Render a broadcast job's status and controls."""
+    job = BroadcastService(callback.bot).get_job_info(job_id)
+    if not job:
+        await callback.message.edit_text(PersianTexts.BROADCAST_JOB_NOT_FOUND)
+        return
+    
+    try:
+        await callback.message.edit_text(
+            format_broadcast_status(job),
+            reply_markup=PersianKeyboards.broadcast_job_actions(job["id"], job["status"])
+        )
+    except TelegramBadRequest as e:
+        # Refreshing an unchanged status
+        logger.debug(f"Broadcast status not updated: {e}")
+
+
+@router.callback_query(F.data.startswith("broadcast_job_"))
+async def broadcast_job_view(callback: CallbackQuery):
+    """Show a broadcast job's progress."""
+    if not is_admin(callback.from_user.id):
+        await callback.answer(PersianTexts.ACCESS_DENIED)
+        return
+    
+    job_id = int(callback.data.split("_")[2])
+    await _show_broadcast_job(callback, job_id)
+    await callback.answer()
+
+
+@router.callback_query(F.data.startswith(("broadcast_pause_", "broadcast_resume_", "broadcast_abort_")))
+async def broadcast_job_control(callback: CallbackQuery):
+    """Pause, resume or cancel a broadcast job."""
+    if not is_admin(callback.from_user.id):
+        await callback.answer(PersianTexts.ACCESS_DENIED)
+        return
+    
+    _, action, job_id = callback.data.split("_")
+    job_id = int(job_id)
+    
+    broadcast_service = BroadcastService(callback.bot)
+    if action == "pause":
+        success, text = broadcast_service.pause_job(job_id), PersianTexts.BROADCAST_PAUSED
+    elif action == "resume":
+        success, text = broadcast_service.resume_job(job_id), PersianTexts.BROADCAST_RESUMED
+    else:
+        success, text = broadcast_service.cancel_job(job_id), PersianTexts.BROADCAST_STOPPED
+    
+    await callback.answer(text if success else PersianTexts.BROADCAST_JOB_NOT_FOUND)
+    await _show_broadcast_job(callback, job_id)
+
+
 # Backup
 @router.callback_query(F.data == "admin_backup")
 async def backup_menu(callback: CallbackQuery):
@@ -595,26 +938,57 @@ async def backup_execute(callback: CallbackQuery):
     await callback.message.edit_text(PersianTexts.BACKUP_STARTED)
     
     try:
-        backup_path = create_backup()
+        # Snapshot and compression run in a worker thread
+        backup_service = BackupService()
+        result = await backup_service.create_backup_async()
         
-        if backup_path and os.path.exists(backup_path):
-            # Send backup file to admin
-            backup_file = FSInputFile(backup_path)
-            await callback.message.answer_document(
-                backup_file,
-                caption="🗄 پشتیبان‌گیری دیتابیس"
-            )
-            
-            await callback.message.edit_text(PersianTexts.BACKUP_COMPLETED)
-            logger.info(f"Backup created and sent to admin {callback.from_user.id}")
-        else:
+        if not result:
             await callback.message.edit_text(PersianTexts.BACKUP_FAILED)
-            
+            return
+        
+        await _upload_backup(callback, backup_service, result["manifest_path"])
+    
     except Exception as e:
         logger.error(f"Error creating backup: {e}")
         await callback.message.edit_text(PersianTexts.BACKUP_FAILED)
 
 
+@router.callback_query(F.data.startswith("backup_resume_"))
+async def backup_resume(callback: CallbackQuery):
+    """Resume sending a backup whose upload failed."""
+    if not is_admin(callback.from_user.id):
+        await callback.answer(PersianTexts.ACCESS_DENIED)
+        return
+    
+    name = callback.data[len("backup_resume_"):]
+    backup_service = BackupService()
+    manifest_path = backup_service.backup_dir / f"backup-{name}.manifest.json"
+    
+    if not manifest_path.exists():
+        await callback.answer(PersianTexts.BACKUP_FAILED)
+        return
+    
+    await callback.answer(PersianTexts.BACKUP_STARTED)
+    await _upload_backup(callback, backup_service, str(manifest_path))
+
+
+async def _upload_backup(callback: CallbackQuery, backup_service: BackupService, manifest_path: str):
+    """Send backup volumes to the admin, offering a resume button on failure."""
+    await callback.message.edit_text(PersianTexts.BACKUP_UPLOADING)
+    
+    success = await backup_service.upload_backup(callback.bot, callback.message.chat.id, manifest_path)
+    
+    if success:
+        await callback.message.edit_text(PersianTexts.BACKUP_COMPLETED)
+        logger.info(f"Backup created and sent to admin {callback.from_user.id}")
+    else:
+        name = Path(manifest_path).name[len("backup-"):-len(".manifest.json")]
+        await callback.message.edit_text(
+            PersianTexts.BACKUP_UPLOAD_FAILED,
+            reply_markup=PersianKeyboards.backup_resume(name)
+        )
+
+
 # Statistics
 @router.callback_query(F.data == "admin_stats")
 async def stats_menu(callback: CallbackQuery):
@@ -629,62 +1003,242 @@ async def stats_menu(callback: CallbackQuery):
     )
 
 
-@router.callback_query(F.data == "stats_weekly")
-async def stats_weekly(callback: CallbackQuery):
-    """Show weekly stats."""
+async def _show_stats_report(callback: CallbackQuery, period: str):
+    """Render a cached stats report with its age."""
+    stats, refreshed_at = await stats_cache.get(period)
+    age = (datetime.utcnow() - refreshed_at).total_seconds()
+    text = STATS_REPORT_TEXTS[period].format(**stats) + PersianTexts.STATS_AGE.format(age=format_duration(age))
+    
+    try:
+        await callback.message.edit_text(text, reply_markup=PersianKeyboards.stats_report(period))
+    except TelegramBadRequest as e:
+        # Refreshing an unchanged report
+        logger.debug(f"Stats report not updated: {e}")
+
+
+@router.callback_query(F.data.in_({"stats_weekly", "stats_monthly", "stats_total"}))
+async def stats_report(callback: CallbackQuery):
+    """Show weekly, monthly or total stats from the cache."""
+    if not is_admin(callback.from_user.id):
+        await callback.answer(PersianTexts.ACCESS_DENIED)
+        return
+    
+    await _show_stats_report(callback, callback.data[len("stats_"):])
+    await callback.answer()
+
+
+@router.callback_query(F.data.startswith("stats_refresh_"))
+async def stats_refresh(callback: CallbackQuery):
+    """Recompute the cached stats now and show the report again."""
+    if not is_admin(callback.from_user.id):
+        await callback.answer(PersianTexts.ACCESS_DENIED)
+        return
+    
+    period = callback.data[len("stats_refresh_"):]
+    if period not in STATS_REPORT_TEXTS:
+        await callback.answer(PersianTexts.ERROR_OCCURRED)
+        return
+    
+    # Taps from several admins share one recomputation
+    await stats_cache.refresh()
+    await _show_stats_report(callback, period)
+    await callback.answer()
+
+
+@router.callback_query(F.data == "stats_analytics")
+async def stats_analytics(callback: CallbackQuery):
+    """Show cohort, retention and hour-of-day analytics."""
+    if not is_admin(callback.from_user.id):
+        await callback.answer(PersianTexts.ACCESS_DENIED)
+        return
+    
+    try:
+        # Extends the columnar snapshot with new deliveries, then runs the vectorized reports
+        report = await asyncio.to_thread(AnalyticsService().get_report)
+    except Exception as e:
+        logger.error(f"Error computing analytics: {e}")
+        await callback.answer(PersianTexts.ERROR_OCCURRED)
+        return
+    
+    try:
+        await callback.message.edit_text(
+            format_analytics_report(report, settings.TZ),
+            reply_markup=PersianKeyboards.stats_analytics()
+        )
+    except TelegramBadRequest as e:
+        # Refreshing an unchanged report
+        logger.debug(f"Analytics report not updated: {e}")
+    await callback.answer()
+
+
+def _export_format_prompt(table: str, start: date, end: date) -> tuple:
+    """Text and keyboard asking for the export format of a chosen range."""
+    text = PersianTexts.EXPORT_CHOOSE_FORMAT.format(table=PersianTexts.EXPORT_TABLES[table], start=start, end=end)
+    return text, PersianKeyboards.export_formats(table, f"{start:%Y%m%d}", f"{end:%Y%m%d}")
+
+
+@router.callback_query(F.data == "stats_export")
+async def export_menu(callback: CallbackQuery, state: FSMContext):
+    """Choose which table to export."""
+    if not is_admin(callback.from_user.id):
+        await callback.answer(PersianTexts.ACCESS_DENIED)
+        return
+    
+    await state.clear()
+    await callback.message.edit_text(PersianTexts.EXPORT_MENU, reply_markup=PersianKeyboards.export_tables())
+
+
+@router.callback_query(F.data.startswith("export_table_"))
+async def export_table(callback: CallbackQuery, state: FSMContext):
+    """Choose the date range of an export."""
     if not is_admin(callback.from_user.id):
         await callback.answer(PersianTexts.ACCESS_DENIED)
         return
     
-    stats_service = StatsService()
-    stats = stats_service.get_weekly_stats()
+    table = callback.data[len("export_table_"):]
+    if table not in EXPORT_TABLES:
+        await callback.answer(PersianTexts.ERROR_OCCURRED)
+        return
     
-    text = PersianTexts.STATS_WEEKLY_REPORT.format(
-        downloads=stats["downloads"],
-        active_users=stats["active_users"],
-        top_bundle=stats["top_bundle"]
+    await state.clear()
+    await callback.message.edit_text(
+        PersianTexts.EXPORT_CHOOSE_RANGE.format(table=PersianTexts.EXPORT_TABLES[table]),
+        reply_markup=PersianKeyboards.export_ranges(table)
     )
+
+
+@router.callback_query(F.data.startswith("export_range_"))
+async def export_range(callback: CallbackQuery):
+    """Use the last N local days, today included, as the export range."""
+    if not is_admin(callback.from_user.id):
+        await callback.answer(PersianTexts.ACCESS_DENIED)
+        return
+    
+    _, _, table, days = callback.data.split("_")
+    if table not in EXPORT_TABLES:
+        await callback.answer(PersianTexts.ERROR_OCCURRED)
+        return
+    
+    end = local_date()
+    text, keyboard = _export_format_prompt(table, end - timedelta(days=int(days) - 1), end)
+    await callback.message.edit_text(text, reply_markup=keyboard)
+
+
+@router.callback_query(F.data.startswith("export_custom_"))
+async def export_custom(callback: CallbackQuery, state: FSMContext):
+    """Ask for a custom export range."""
+    if not is_admin(callback.from_user.id):
+        await callback.answer(PersianTexts.ACCESS_DENIED)
+        return
+    
+    await state.set_state(AdminStates.export_range)
+    await state.update_data(export_table=callback.data[len("export_custom_"):])
+    await callback.message.edit_text(PersianTexts.EXPORT_RANGE_PROMPT)
+    await callback.answer()
+
+
+@router.message(AdminStates.export_range)
+async def export_custom_range(message: Message, state: FSMContext):
+    """Parse a custom export range given as two ISO dates."""
+    table = (await state.get_data()).get("export_table")
+    if table not in EXPORT_TABLES:
+        await state.clear()
+        return
+    
+    try:
+        start, end = (date.fromisoformat(part) for part in (message.text or "").split())
+    except ValueError:
+        start = end = None
+    if start is None or start > end:
+        await message.reply(PersianTexts.EXPORT_RANGE_INVALID)
+        return
     
-    await callback.message.edit_text(text)
+    await state.clear()
+    text, keyboard = _export_format_prompt(table, start, end)
+    await message.reply(text, reply_markup=keyboard)
 
 
-@router.callback_query(F.data == "stats_monthly")
-async def stats_monthly(callback: CallbackQuery):
-    """Show monthly stats."""
+@router.callback_query(F.data.startswith("export_run_"))
+async def export_run(callback: CallbackQuery):
+    """Stream the export to compressed files and send them to this chat."""
     if not is_admin(callback.from_user.id):
         await callback.answer(PersianTexts.ACCESS_DENIED)
         return
     
-    stats_service = StatsService()
-    stats = stats_service.get_monthly_stats()
+    _, _, table, fmt, start, end = callback.data.split("_")
+    start = datetime.strptime(start, "%Y%m%d").date()
+    end = datetime.strptime(end, "%Y%m%d").date()
+    
+    await callback.message.edit_text(PersianTexts.EXPORT_STARTED)
+    await callback.answer()
+    
+    try:
+        rows = await ExportService().send_export(callback.bot, callback.message.chat.id, table, start, end, fmt)
+    except Exception as e:
+        logger.error(f"Error exporting {table}: {e}")
+        rows = None
     
-    text = PersianTexts.STATS_MONTHLY_REPORT.format(
-        downloads=stats["downloads"],
-        active_users=stats["active_users"],
-        top_bundle=stats["top_bundle"]
+    await callback.message.edit_text(
+        PersianTexts.EXPORT_FAILED if rows is None else PersianTexts.EXPORT_COMPLETED.format(rows=rows)
     )
+
+
+@router.callback_query(F.data.startswith("stats_top_"))
+async def stats_leaderboard(callback: CallbackQuery):
+    """Show the most downloaded bundles of a period."""
+    if not is_admin(callback.from_user.id):
+        await callback.answer(PersianTexts.ACCESS_DENIED)
+        return
     
-    await callback.message.edit_text(text)
+    period = callback.data[len("stats_top_"):]
+    if period not in LEADERBOARD_PERIODS:
+        await callback.answer(PersianTexts.ERROR_OCCURRED)
+        return
+    
+    leaderboard = await asyncio.to_thread(StatsService().get_leaderboard, LEADERBOARD_PERIODS[period])
+    buttons = [
+        (
+            _short(f"{rank}. {entry['public_number_str']} - {entry['title']}", 32) + f" ({entry['downloads']})",
+            f"stats_bundle_{entry['bundle_id']}_{period}"
+        )
+        for rank, entry in enumerate(leaderboard, 1)
+    ]
+    
+    period_name = PersianTexts.STATS_PERIOD_NAMES[period]
+    await callback.message.edit_text(
+        (PersianTexts.STATS_LEADERBOARD_TITLE if leaderboard else PersianTexts.STATS_NO_DOWNLOADS).format(
+            period=period_name
+        ),
+        reply_markup=PersianKeyboards.stats_leaderboard(buttons, period)
+    )
 
 
-@router.callback_query(F.data == "stats_total")
-async def stats_total(callback: CallbackQuery):
-    """Show total stats."""
+@router.callback_query(F.data.startswith("stats_bundle_"))
+async def stats_bundle(callback: CallbackQuery):
+    """Show download statistics of one bundle."""
     if not is_admin(callback.from_user.id):
         await callback.answer(PersianTexts.ACCESS_DENIED)
         return
     
-    stats_service = StatsService()
-    stats = stats_service.get_total_stats()
+    _, _, bundle_id, period = callback.data.split("_")
+    stats = await asyncio.to_thread(StatsService().get_bundle_stats, int(bundle_id))
+    if not stats:
+        await callback.answer("بسته یافت نشد")
+        return
     
-    text = PersianTexts.STATS_TOTAL_REPORT.format(
-        downloads=stats["downloads"],
-        total_users=stats["total_users"],
-        total_bundles=stats["total_bundles"],
-        top_bundle=stats["top_bundle"]
+    text = PersianTexts.STATS_BUNDLE_REPORT.format(
+        number=stats["public_number_str"] or "-",
+        title=escape(stats["title"]),
+        status="✅ فعال" if stats["is_active"] else "❌ غیرفعال",
+        weekly_downloads=stats["weekly_downloads"],
+        monthly_downloads=stats["monthly_downloads"],
+        total_downloads=stats["total_downloads"],
+        weekly_unique=stats["weekly_unique"],
+        monthly_unique=stats["monthly_unique"],
+        total_unique=stats["total_unique"]
     )
     
-    await callback.message.edit_text(text)
+    await callback.message.edit_text(text, reply_markup=PersianKeyboards.stats_bundle(stats["bundle_id"], period))
 
 
 # Back buttons
@@ -1,7 +1,9 @@
-"""Archive handlers for /add and /done commands."""
+"""Archive handlers for /add, /done and /import commands."""
 import logging
+from typing import Any, Awaitable, Callable, Dict
 from aiogram import Router, F
-from aiogram.types import Message
+from aiogram.enums import ContentType
+from aiogram.types import Message, TelegramObject
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
@@ -9,8 +11,8 @@ from sqlalchemy.orm import Session
 
 from app.config import settings
 from app.models.base import get_db
+from app.repo.archive import ArchiveRepository
 from app.repo.bundle import BundleRepository
-from app.repo.settings import SettingsRepository
 from app.ui.fa import PersianTexts
 from app.utils.helpers import generate_deep_link
 
@@ -22,12 +24,71 @@ class ArchiveStates(StatesGroup):
     """States for archive recording process."""
     recording = State()
     waiting_title = State()
+    waiting_import_title = State()
 
 
-# Store recording data temporarily
+# Replies in these states are bundle titles, not archive content
+TITLE_STATES = {ArchiveStates.waiting_title.state, ArchiveStates.waiting_import_title.state}
+
+
+# Recorded messages not yet written to the draft bundle, keyed by admin ID.
+# Flushed every RECORDING_BATCH_SIZE messages, so at most one small batch lives in RAM.
 recording_data = {}
 
 
+# Media types accepted as /import filters
+IMPORT_MEDIA_TYPES = {
+    "text", "photo", "video", "document", "audio", "voice",
+    "video_note", "sticker", "animation", "location", "contact", "other"
+}
+
+# Messages copyMessage can copy; service messages, invoices, giveaways etc. aren't indexed
+COPYABLE_CONTENT_TYPES = {
+    ContentType.TEXT, ContentType.PHOTO, ContentType.VIDEO, ContentType.DOCUMENT,
+    ContentType.AUDIO, ContentType.VOICE, ContentType.VIDEO_NOTE, ContentType.STICKER,
+    ContentType.ANIMATION, ContentType.LOCATION, ContentType.CONTACT, ContentType.VENUE,
+    ContentType.POLL, ContentType.DICE,
+}
+
+
+@router.message.outer_middleware()
+@router.channel_post.outer_middleware()
+async def index_archive_message(
+    handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+    event: Message,
+    data: Dict[str, Any],
+) -> Any:
+    """Index messages posted in an archive chat for later /import.
+    
+    Commands, messages that can't be copied and bundle titles typed in
+    reply to /done or /import are left out, so they never end up in a bundle.
+    """
+    if (event.chat.id in settings.archive_chat_ids_list and
+            event.content_type in COPYABLE_CONTENT_TYPES and
+            not (event.text and event.text.startswith('/')) and
+            data.get("raw_state") not in TITLE_STATES):
+        db = next(get_db())
+        try:
+            ArchiveRepository(db).record_message(
+                chat_id=event.chat.id,
+                message_id=event.message_id,
+                media_type=_get_message_type(event),
+                caption_json=_get_caption_data(event) if event.caption else None
+            )
+        except Exception as e:
+            logger.error(f"Error indexing archive message {event.message_id}: {e}")
+        finally:
+            db.close()
+    
+    return await handler(event, data)
+
+
+@router.channel_post(F.chat.id.in_(settings.archive_chat_ids_list))
+async def archive_channel_post(message: Message):
+    """Subscribe to archive channel posts so they reach the index middleware."""
+    logger.debug(f"Indexed channel post {message.message_id} in chat {message.chat.id}")
+
+
 @router.message(Command("add"))
 async def start_recording(message: Message, state: FSMContext):
     """Start recording messages for a new bundle."""
@@ -38,45 +99,177 @@ async def start_recording(message: Message, state: FSMContext):
     
     admin_id = message.from_user.id
     
-    # Initialize recording data
-    recording_data[admin_id] = {
-        "messages": [],
-        "chat_id": message.chat.id
-    }
+    db = next(get_db())
+    try:
+        bundle_repo = BundleRepository(db)
+        
+        # Resume an unfinished draft (e.g. after a restart) instead of starting over
+        draft = bundle_repo.get_draft(admin_id)
+        resumed_count = bundle_repo.count_bundle_items(draft.id) if draft else 0
+        if not draft:
+            draft = bundle_repo.create_draft(admin_id)
+        
+        recording_data[admin_id] = {
+            "bundle_id": draft.id,
+            "messages": []
+        }
+    except Exception as e:
+        logger.error(f"Error starting recording for admin {admin_id}: {e}")
+        await message.reply(PersianTexts.ERROR_OCCURRED)
+        return
+    finally:
+        db.close()
     
     await state.set_state(ArchiveStates.recording)
-    await message.reply(PersianTexts.RECORDING_STARTED)
     
-    logger.info(f"Admin {admin_id} started recording in chat {message.chat.id}")
+    if resumed_count:
+        await message.reply(PersianTexts.RECORDING_RESUMED.format(count=resumed_count))
+    else:
+        await message.reply(PersianTexts.RECORDING_STARTED)
+    
+    logger.info(f"Admin {admin_id} started recording draft {draft.id} in chat {message.chat.id}")
 
 
 @router.message(Command("done"))
 async def finish_recording(message: Message, state: FSMContext):
     """Finish recording and ask for bundle title."""
-    # Check if user is admin and in recording state
+    # Check if user is admin and in archive chat
     if (message.from_user.id not in settings.admin_ids_list or 
         message.chat.id not in settings.archive_chat_ids_list):
         return
     
     admin_id = message.from_user.id
-    current_state = await state.get_state()
-    
-    if current_state != ArchiveStates.recording or admin_id not in recording_data:
-        await message.reply(PersianTexts.RECORDING_STOPPED)
-        return
     
-    # Check if any messages were recorded
-    if not recording_data[admin_id]["messages"]:
-        await message.reply("هیچ پیامی ضبط نشده است.")
-        await state.clear()
-        if admin_id in recording_data:
-            del recording_data[admin_id]
+    db = next(get_db())
+    try:
+        bundle_repo = BundleRepository(db)
+        
+        # Write any buffered messages before counting
+        _flush_recording(admin_id, bundle_repo)
+        
+        draft = bundle_repo.get_draft(admin_id)
+        if not draft:
+            await message.reply(PersianTexts.RECORDING_STOPPED)
+            return
+        
+        item_count = bundle_repo.count_bundle_items(draft.id)
+        
+        # Check if any messages were recorded
+        if not item_count:
+            bundle_repo.delete_bundle(draft.id)
+            await message.reply("هیچ پیامی ضبط نشده است.")
+            await state.clear()
+            recording_data.pop(admin_id, None)
+            return
+    except Exception as e:
+        logger.error(f"Error finishing recording for admin {admin_id}: {e}")
+        await message.reply(PersianTexts.ERROR_OCCURRED)
         return
+    finally:
+        db.close()
     
+    recording_data.pop(admin_id, None)
     await state.set_state(ArchiveStates.waiting_title)
+    await state.update_data(draft_bundle_id=draft.id)
     await message.reply(PersianTexts.ENTER_BUNDLE_TITLE)
     
-    logger.info(f"Admin {admin_id} finished recording {len(recording_data[admin_id]['messages'])} messages")
+    logger.info(f"Admin {admin_id} finished recording {item_count} messages")
+
+
+@router.message(Command("import"))
+async def start_import(message: Message, state: FSMContext):
+    """Start creating a bundle from a message ID range: /import <from_id> <to_id> [types...]"""
+    if (message.from_user.id not in settings.admin_ids_list or 
+        message.chat.id not in settings.archive_chat_ids_list):
+        return
+    
+    args = message.text.split()[1:]
+    try:
+        start_id, end_id = int(args[0]), int(args[1])
+    except (IndexError, ValueError):
+        await message.reply(PersianTexts.IMPORT_USAGE)
+        return
+    
+    media_types = sorted({t.lower() for t in args[2:]})
+    if (start_id <= 0 or end_id < start_id or
+            end_id - start_id + 1 > settings.IMPORT_MAX_RANGE or
+            not set(media_types) <= IMPORT_MEDIA_TYPES):
+        await message.reply(PersianTexts.IMPORT_USAGE)
+        return
+    
+    db = next(get_db())
+    try:
+        archive_repo = ArchiveRepository(db)
+        items = _build_import_items(archive_repo, message.chat.id, start_id, end_id, media_types)
+        # IDs the bot never indexed, e.g. everything posted before it joined the archive
+        unindexed = end_id - start_id + 1 - archive_repo.count_messages_in_range(message.chat.id, start_id, end_id)
+    finally:
+        db.close()
+    
+    if not items:
+        await message.reply(PersianTexts.IMPORT_NOTHING_INDEXED.format(count=unindexed))
+        return
+    
+    await state.set_state(ArchiveStates.waiting_import_title)
+    await state.set_data({
+        "import_chat_id": message.chat.id,
+        "import_start": start_id,
+        "import_end": end_id,
+        "import_types": media_types
+    })
+    await message.reply(PersianTexts.IMPORT_CONFIRM.format(
+        count=len(items),
+        unindexed=PersianTexts.IMPORT_UNINDEXED.format(count=unindexed) if unindexed else ""
+    ))
+
+
+@router.message(ArchiveStates.waiting_import_title)
+async def create_imported_bundle(message: Message, state: FSMContext):
+    """Create the bundle for a pending /import with the provided title."""
+    admin_id = message.from_user.id
+    
+    title = (message.text or "").strip()
+    if not title:
+        await message.reply("عنوان نمی‌تواند خالی باشد. لطفاً عنوان معتبر وارد کنید:")
+        return
+    
+    data = await state.get_data()
+    
+    db = next(get_db())
+    try:
+        items = _build_import_items(
+            ArchiveRepository(db),
+            data["import_chat_id"],
+            data["import_start"],
+            data["import_end"],
+            data["import_types"]
+        )
+        
+        # All items are bulk-inserted in the same transaction as the bundle
+        bundle_repo = BundleRepository(db)
+        bundle = bundle_repo.create_bundle_with_items(
+            title=title,
+            created_by=admin_id,
+            items=items
+        )
+        
+        bot_info = await message.bot.get_me()
+        deep_link = generate_deep_link(bot_info.username, bundle.code)
+        
+        await message.reply(PersianTexts.BUNDLE_CREATED.format(
+            number=bundle.public_number_str,
+            title=bundle.title,
+            link=deep_link
+        ))
+        
+        logger.info(f"Bundle {bundle.public_number_str} imported with {len(items)} items by admin {admin_id}")
+        
+    except Exception as e:
+        logger.error(f"Error importing bundle: {e}")
+        await message.reply(PersianTexts.ERROR_OCCURRED)
+    finally:
+        db.close()
+        await state.clear()
 
 
 @router.message(ArchiveStates.recording)
@@ -104,47 +297,43 @@ async def record_message(message: Message, state: FSMContext):
     recording_data[admin_id]["messages"].append(message_info)
     
     logger.debug(f"Recorded message {message.message_id} from admin {admin_id}")
+    
+    if len(recording_data[admin_id]["messages"]) >= settings.RECORDING_BATCH_SIZE:
+        db = next(get_db())
+        try:
+            _flush_recording(admin_id, BundleRepository(db))
+        except Exception as e:
+            logger.error(f"Error saving recorded messages for admin {admin_id}: {e}")
+        finally:
+            db.close()
 
 
 @router.message(ArchiveStates.waiting_title)
 async def create_bundle(message: Message, state: FSMContext):
-    """Create bundle with the provided title."""
+    """Publish the recorded draft bundle with the provided title."""
     admin_id = message.from_user.id
     
-    if admin_id not in recording_data:
-        await message.reply(PersianTexts.ERROR_OCCURRED)
-        await state.clear()
-        return
-    
-    title = message.text.strip()
+    title = (message.text or "").strip()
     if not title:
         await message.reply("عنوان نمی‌تواند خالی باشد. لطفاً عنوان معتبر وارد کنید:")
         return
     
+    state_data = await state.get_data()
+    
     db = next(get_db())
     try:
-        # Get next public number
-        settings_repo = SettingsRepository(db)
-        public_number = settings_repo.get_next_public_number()
-        
-        # Create bundle
         bundle_repo = BundleRepository(db)
-        bundle = bundle_repo.create_bundle(
-            title=title,
-            created_by=admin_id,
-            public_number=public_number
-        )
         
-        # Add bundle items
-        for msg_info in recording_data[admin_id]["messages"]:
-            bundle_repo.add_bundle_item(
-                bundle_id=bundle.id,
-                from_chat_id=msg_info["from_chat_id"],
-                message_id=msg_info["message_id"],
-                media_type=msg_info["media_type"],
-                caption_json=msg_info["caption_json"],
-                extra_json=msg_info["extra_json"]
-            )
+        draft_id = state_data.get("draft_bundle_id")
+        if not draft_id:
+            draft = bundle_repo.get_draft(admin_id)
+            draft_id = draft.id if draft else None
+        
+        # Items are already stored, so publishing is a single update
+        bundle = bundle_repo.finalize_draft(draft_id, title) if draft_id else None
+        if not bundle:
+            await message.reply(PersianTexts.ERROR_OCCURRED)
+            return
         
         # Generate deep link
         bot_info = await message.bot.get_me()
@@ -169,8 +358,38 @@ async def create_bundle(message: Message, state: FSMContext):
         
         # Clean up
         await state.clear()
-        if admin_id in recording_data:
-            del recording_data[admin_id]
+        recording_data.pop(admin_id, None)
+
+
+def _build_import_items(archive_repo: ArchiveRepository, chat_id: int, start_id: int,
+                        end_id: int, media_types: list) -> list:
+    """Build bundle items for a message ID range from the archive index.
+    
+    The Bot API can't read channel history, so only messages the bot indexed
+    are used. IDs in the range that were never indexed (gaps, deleted or
+    service messages, commands, or posts from before the bot joined) would
+    fail at copyMessage on every delivery, so they are left out.
+    """
+    return [
+        {
+            "from_chat_id": chat_id,
+            "message_id": msg.message_id,
+            "media_type": msg.media_type,
+            "caption_json": msg.caption_json,
+            "extra_json": None
+        }
+        for msg in archive_repo.get_messages_in_range(chat_id, start_id, end_id, media_types or None)
+    ]
+
+
+def _flush_recording(admin_id: int, bundle_repo: BundleRepository):
+    """Write buffered recorded messages of an admin to their draft bundle."""
+    data = recording_data.get(admin_id)
+    if not data or not data["messages"]:
+        return
+    
+    bundle_repo.append_draft_items(data["bundle_id"], data["messages"])
+    data["messages"] = []
 
 
 def _get_message_type(message: Message) -> str:
@@ -1,8 +1,14 @@
 """Jobs package for scheduled tasks."""
 from .scheduler import setup_scheduler
 from .deletion_job import setup_deletion_job
+from .backup_job import setup_backup_job
+from .broadcast_job import BroadcastWorker
+from .stats_job import setup_stats_job
 
 __all__ = [
     "setup_scheduler",
     "setup_deletion_job",
+    "setup_backup_job",
+    "BroadcastWorker",
+    "setup_stats_job",
 ]
@@ -0,0 +1,49 @@
+"""Scheduled backup job."""
+import logging
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from app.config import settings
+from app.services.backup import BackupService
+from app.utils.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+
+async def backup_job_func():
+    """Job function to create a backup and apply retention.
+    
+    With BACKUP_INCREMENTAL, runs in between full backups only export rows
+    changed since the previous backup.
+    """
+    logger.info("Running backup job")
+    
+    with traced("job", "backup"):
+        backup_service = BackupService()
+        if settings.BACKUP_INCREMENTAL and not backup_service.needs_full_backup():
+            result = await backup_service.create_incremental_backup_async()
+        else:
+            result = await backup_service.create_backup_async()
+    
+    if result:
+        backup_service.cleanup_old_backups(settings.BACKUP_RETENTION)
+        logger.info("Backup job completed")
+    else:
+        logger.error("Backup job failed")
+
+
+def setup_backup_job(scheduler: AsyncIOScheduler):
+    """Set up periodic backups if BACKUP_INTERVAL_HOURS is set."""
+    if settings.BACKUP_INTERVAL_HOURS <= 0:
+        logger.info("Scheduled backups disabled")
+        return
+    
+    scheduler.add_job(
+        backup_job_func,
+        'interval',
+        hours=settings.BACKUP_INTERVAL_HOURS,
+        id='backup_job',
+        max_instances=1,
+        replace_existing=True
+    )
+    
+    logger.info(f"Backup job scheduled every {settings.BACKUP_INTERVAL_HOURS} hours "
+                f"(keeping {settings.BACKUP_RETENTION})")
@@ -0,0 +1,110 @@
+"""Background worker for broadcast jobs."""
+import asyncio
+import logging
+import time
+from typing import Optional
+from aiogram import Bot
+
+from app.config import settings
+from app.services.broadcast import BroadcastService
+from app.ui.fa import PersianTexts, PersianKeyboards, format_broadcast_status
+from app.utils.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+
+class BroadcastWorker:
+    """Runs queued broadcast jobs one at a time in a background task.
+    
+    Jobs left "running" by a previous process are picked up again on start
+    and continue from their last checkpoint. While a job runs, its admin
+    status message is edited with live progress at most once every
+    BROADCAST_PROGRESS_INTERVAL seconds.
+    """
+    
+    def __init__(self, bot: Bot, poll_interval: float = 5.0, stop_timeout: Optional[float] = None):
+        self.bot = bot
+        self.poll_interval = poll_interval
+        self.stop_timeout = stop_timeout if stop_timeout is not None else settings.BROADCAST_STOP_TIMEOUT
+        self._stop_event = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._service = BroadcastService(bot)
+        self._last_report = 0.0
+    
+    async def start(self):
+        """Start polling for broadcast jobs."""
+        self._stop_event.clear()
+        self._task = asyncio.create_task(self._run())
+        logger.info("Broadcast worker started")
+    
+    async def stop(self):
+        """Stop starting sends and checkpoint the ones in flight; the job resumes from there next start.
+        
+        Sends waiting out flood control give up at once, so this takes about as
+        long as one Bot API request; a job cancelled after stop_timeout before its
+        checkpoint would send the uncheckpointed users the message again.
+        """
+        if self._task is None:
+            return
+        
+        self._stop_event.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=self.stop_timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Broadcast worker did not stop in time, cancelling")
+        self._task = None
+        logger.info("Broadcast worker stopped")
+    
+    async def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                job_id = self._service.get_next_job_id()
+                if job_id is not None:
+                    with traced("job", "broadcast", job_id):
+                        job = await self._service.run_job(job_id, self._stop_event, self._report_progress)
+                        if job and job["status"] == "completed":
+                            await self._notify_completed(job)
+                    continue
+            except Exception as e:
+                logger.error(f"Error in broadcast worker: {e}")
+            
+            try:
+                await asyncio.wait_for(self._stop_event.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+    
+    async def _report_progress(self, job_id: int):
+        """Edit the job's status message, throttled so it barely uses API budget."""
+        now = time.monotonic()
+        if now - self._last_report < settings.BROADCAST_PROGRESS_INTERVAL:
+            return
+        self._last_report = now
+        
+        job = self._service.get_job_info(job_id)
+        if not job or not job["status_chat_id"]:
+            return
+        
+        try:
+            await self.bot.edit_message_text(
+                format_broadcast_status(job),
+                chat_id=job["status_chat_id"],
+                message_id=job["status_message_id"],
+                reply_markup=PersianKeyboards.broadcast_job_actions(job_id, job["status"])
+            )
+        except Exception as e:
+            logger.debug(f"Could not update progress of broadcast job {job_id}: {e}")
+    
+    async def _notify_completed(self, job: dict):
+        """Show the final counters in the job's status message."""
+        if not job["status_chat_id"]:
+            return
+        
+        text = PersianTexts.BROADCAST_COMPLETED.format(success=job["sent"], failed=job["failed"])
+        try:
+            await self.bot.edit_message_text(
+                text,
+                chat_id=job["status_chat_id"],
+                message_id=job["status_message_id"]
+            )
+        except Exception as e:
+            logger.warning(f"Could not update status of broadcast job {job['id']}: {e}")
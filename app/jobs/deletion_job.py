@@ -3,6 +3,7 @@ import logging
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from aiogram import Bot
 from app.services.deletion import DeletionService
+from app.utils.tracing import traced
 
 logger = logging.getLogger(__name__)
 
@@ -11,8 +12,9 @@ async def deletion_job_func(bot: Bot):
     """Job function to process pending deletions."""
     logger.info("Running deletion job")
     
-    deletion_service = DeletionService(bot)
-    await deletion_service.process_pending_deletions()
+    with traced("job", "deletion"):
+        deletion_service = DeletionService(bot)
+        await deletion_service.process_pending_deletions()
     
     logger.info("Deletion job completed")
 
@@ -0,0 +1,59 @@
+"""Statistics rollup reconciliation and report cache jobs."""
+import asyncio
+import logging
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from app.config import settings
+from app.services.stats import StatsService, stats_cache
+from app.utils.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+
+async def stats_job_func():
+    """Recompute today's and yesterday's rollup rows from raw deliveries.
+    
+    Deliveries update the rollup as they're recorded; this repairs anything
+    that bypassed that path, such as rows restored from a backup.
+    """
+    logger.info("Running stats rollup job")
+    
+    try:
+        with traced("job", "stats_rollup"):
+            await asyncio.to_thread(StatsService().rebuild_recent, 2)
+        logger.info("Stats rollup job completed")
+    except Exception as e:
+        logger.error(f"Stats rollup job failed: {e}")
+
+
+async def stats_cache_job_func():
+    """Recompute the cached admin stats reports."""
+    try:
+        with traced("job", "stats_cache"):
+            await stats_cache.refresh()
+    except Exception as e:
+        logger.error(f"Stats cache refresh failed: {e}")
+
+
+def setup_stats_job(scheduler: AsyncIOScheduler):
+    """Set up the hourly rollup reconciliation and the report cache refresh."""
+    scheduler.add_job(
+        stats_job_func,
+        'interval',
+        hours=1,
+        id='stats_job',
+        max_instances=1,
+        replace_existing=True
+    )
+    
+    logger.info("Stats rollup job scheduled to run every hour")
+    
+    scheduler.add_job(
+        stats_cache_job_func,
+        'interval',
+        minutes=settings.STATS_CACHE_INTERVAL_MINUTES,
+        id='stats_cache_job',
+        max_instances=1,
+        replace_existing=True
+    )
+    
+    logger.info(f"Stats cache refresh scheduled every {settings.STATS_CACHE_INTERVAL_MINUTES} minutes")
@@ -8,8 +8,13 @@ from aiogram.enums import ParseMode
 from app.config import settings
 from app.utils.logging import setup_logging
 from app.utils.helpers import ensure_data_directory
+from app.utils.metrics import MetricsServer
 from app.handlers import archive_router, user_router, admin_router
-from app.jobs import setup_scheduler, setup_deletion_job
+from app.middlewares import (
+    ApiMetricsMiddleware, HandlerMetricsMiddleware, ShardedUpdateMiddleware, ThrottlingMiddleware,
+    UpdateTraceMiddleware
+)
+from app.jobs import setup_scheduler, setup_deletion_job, setup_backup_job, setup_stats_job, BroadcastWorker
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +36,40 @@ async def main():
     
     dp = Dispatcher()
     
+    # Process updates on a bounded pool of per-user ordered workers
+    update_middleware = ShardedUpdateMiddleware(
+        workers=settings.UPDATE_WORKERS,
+        queue_size=settings.UPDATE_QUEUE_SIZE
+    )
+    update_middleware.setup(dp)
+    # Runs inside the shard worker, so each update's API calls are attributed to it
+    dp.update.outer_middleware(UpdateTraceMiddleware())
+    
+    # Protect user handlers from flooding and overload
+    throttling_middleware = ThrottlingMiddleware(
+        rate_limit=settings.USER_RATE_LIMIT,
+        rate_window=settings.USER_RATE_WINDOW,
+        # At most UPDATE_WORKERS handlers run at once, so a limit at or above it never applies
+        max_concurrency=min(settings.USER_MAX_CONCURRENCY, settings.UPDATE_WORKERS - 1),
+        bulk_concurrency=settings.USER_BULK_CONCURRENCY,
+        admin_ids=settings.admin_ids_list
+    )
+    user_router.message.middleware(throttling_middleware)
+    user_router.callback_query.middleware(throttling_middleware)
+    
+    # Count and time Bot API calls and handled updates
+    bot.session.middleware(ApiMetricsMiddleware())
+    # Inner middlewares on the dispatcher also run for handlers of included routers
+    handler_metrics = HandlerMetricsMiddleware()
+    for observer in (dp.message, dp.channel_post, dp.callback_query):
+        observer.middleware(handler_metrics)
+    
+    # Serve metrics to a local Prometheus scraper
+    if settings.METRICS_PORT:
+        metrics_server = MetricsServer(settings.METRICS_HOST, settings.METRICS_PORT)
+        dp.startup.register(metrics_server.start)
+        dp.shutdown.register(metrics_server.stop)
+    
     # Include routers
     dp.include_router(archive_router)
     dp.include_router(user_router)
@@ -39,6 +78,13 @@ async def main():
     # Setup scheduler
     scheduler = setup_scheduler()
     setup_deletion_job(scheduler, bot)
+    setup_backup_job(scheduler)
+    setup_stats_job(scheduler)
+    
+    # Run broadcasts in the background, resuming any interrupted by a restart
+    broadcast_worker = BroadcastWorker(bot)
+    dp.startup.register(broadcast_worker.start)
+    dp.shutdown.register(broadcast_worker.stop)
     
     try:
         # Start scheduler
@@ -47,7 +93,8 @@ async def main():
         
         # Start polling
         logger.info("Bot started successfully")
-        await dp.start_polling(bot)
+        # Updates are queued by the sharding middleware, so polling must not spawn tasks
+        await dp.start_polling(bot, handle_as_tasks=False)
         
     except Exception as e:
         logger.error(f"Error running bot: {e}")
@@ -0,0 +1,12 @@
+"""Middlewares package."""
+from .metrics import ApiMetricsMiddleware, HandlerMetricsMiddleware, UpdateTraceMiddleware
+from .sharding import ShardedUpdateMiddleware
+from .throttling import ThrottlingMiddleware
+
+__all__ = [
+    "ApiMetricsMiddleware",
+    "HandlerMetricsMiddleware",
+    "ShardedUpdateMiddleware",
+    "ThrottlingMiddleware",
+    "UpdateTraceMiddleware",
+]
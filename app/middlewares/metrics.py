@@ -0,0 +1,131 @@
+"""Handler and Bot API request metrics and per-update traces."""
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import (
+    TelegramBadRequest, TelegramConflictError, TelegramForbiddenError, TelegramNetworkError,
+    TelegramNotFound, TelegramRetryAfter, TelegramServerError, TelegramUnauthorizedError
+)
+from aiogram.methods import Response, TelegramMethod
+from aiogram.types import TelegramObject, Update
+
+from app.utils.metrics import (
+    TELEGRAM_FLOW_REQUESTS, TELEGRAM_REQUEST_DURATION, TELEGRAM_REQUESTS, TELEGRAM_RETRY_AFTER,
+    UPDATE_DURATION, UPDATES
+)
+from app.utils.tracing import current_trace, traced
+
+logger = logging.getLogger(__name__)
+
+# Status label per API error, checked in order
+API_ERROR_STATUSES = (
+    (TelegramRetryAfter, "429"),
+    (TelegramBadRequest, "400"),
+    (TelegramUnauthorizedError, "401"),
+    (TelegramForbiddenError, "403"),
+    (TelegramNotFound, "404"),
+    (TelegramConflictError, "409"),
+    (TelegramServerError, "5xx"),
+    (TelegramNetworkError, "network"),
+)
+
+
+def api_error_status(error: Exception) -> str:
+    """Short status label for a failed Bot API call."""
+    for error_type, status in API_ERROR_STATUSES:
+        if isinstance(error, error_type):
+            return status
+    return "error"
+
+
+class UpdateTraceMiddleware(BaseMiddleware):
+    """Outer update middleware that opens a trace for each update.
+    
+    Must be registered after ShardedUpdateMiddleware so the trace is set in
+    the shard worker that actually processes the update.
+    """
+    
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        update_id = event.update_id if isinstance(event, Update) else None
+        with traced("update", ref=update_id):
+            return await handler(event, data)
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Count handled updates and time them, by handler.
+    
+    Registered as an inner middleware, so it only sees updates a handler
+    was found for and can label them with the handler's name.
+    """
+    
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        handler_object = data.get("handler")
+        name = getattr(getattr(handler_object, "callback", None), "__name__", "unknown")
+        trace = current_trace.get()
+        if trace is not None:
+            trace.name = name
+        
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            result = await handler(event, data)
+            outcome = "ok"
+            return result
+        finally:
+            UPDATE_DURATION.observe(time.perf_counter() - started, name)
+            UPDATES.inc(name, outcome)
+
+
+class ApiMetricsMiddleware(BaseRequestMiddleware):
+    """Record method, latency, outcome and retry_after of every Bot API call.
+    
+    Calls are also attributed to the current update or job trace, which
+    gives per-flow call counts in metrics and the trace summary lines.
+    """
+    
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType,
+        bot: Bot,
+        method: TelegramMethod
+    ) -> Response:
+        api_method = method.__api_method__
+        started = time.perf_counter()
+        status = "ok"
+        retry_after = None
+        try:
+            return await make_request(bot, method)
+        except Exception as e:
+            status = api_error_status(e)
+            if isinstance(e, TelegramRetryAfter):
+                retry_after = e.retry_after
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            trace = current_trace.get()
+            
+            TELEGRAM_REQUESTS.inc(api_method, status)
+            TELEGRAM_REQUEST_DURATION.observe(elapsed, api_method)
+            TELEGRAM_FLOW_REQUESTS.inc(trace.name if trace else "other", api_method)
+            if retry_after is not None:
+                TELEGRAM_RETRY_AFTER.observe(retry_after, api_method)
+            if trace is not None:
+                trace.record_api_call(api_method, elapsed, status)
+            
+            logger.debug(
+                f"{api_method} {status} in {elapsed * 1000:.0f} ms"
+                + (f", retry after {retry_after}s" if retry_after is not None else "")
+                + f" [{trace.label if trace else 'no trace'}]"
+            )
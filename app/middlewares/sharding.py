@@ -0,0 +1,130 @@
+"""Bounded, per-user ordered update dispatching."""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from aiogram import BaseMiddleware, Dispatcher
+from aiogram.dispatcher.middlewares.user_context import UserContextMiddleware
+from aiogram.methods import TelegramMethod
+from aiogram.types import TelegramObject, Update
+
+logger = logging.getLogger(__name__)
+
+
+class ShardedUpdateMiddleware(BaseMiddleware):
+    """Outer update middleware that hands updates to a fixed pool of shard workers.
+    
+    Updates are sharded by sender (or chat when there is no sender), so each
+    user's updates are processed strictly in order while different users run
+    in parallel. Every shard has a bounded queue; when it is full the polling
+    loop waits, which keeps memory and task count flat during traffic spikes.
+    Polling must run with ``handle_as_tasks=False`` for the backpressure to apply.
+    
+    It must run before the dispatcher's own update middlewares (see setup),
+    so FSM state is read when the worker processes the update rather than
+    when it was queued, and handler errors reach the dispatcher's error
+    handlers. The polling loop only sees None for a queued update, so a
+    Telegram method a handler returns is called by the shard worker instead.
+    """
+    
+    def __init__(self, workers: int, queue_size: int, drain_timeout: float = 10.0):
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self.drain_timeout = drain_timeout
+        self._queues: List[asyncio.Queue] = []
+        self._tasks: List[asyncio.Task] = []
+    
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        if not self._queues:
+            # Workers not running (e.g. feed_update in tests) - process inline
+            return await handler(event, data)
+        
+        shard = self._get_shard(event)
+        await self._queues[shard].put((handler, event, data))
+        return None
+    
+    def setup(self, dispatcher: Dispatcher):
+        """Register as the first outer update middleware, ahead of errors, user context and FSM."""
+        builtin = list(dispatcher.update.outer_middleware)
+        for middleware in builtin:
+            dispatcher.update.outer_middleware.unregister(middleware)
+        dispatcher.update.outer_middleware(self)
+        for middleware in builtin:
+            dispatcher.update.outer_middleware(middleware)
+        
+        dispatcher.startup.register(self.start)
+        dispatcher.shutdown.register(self.stop)
+    
+    async def start(self):
+        """Start shard workers."""
+        if self._tasks:
+            return
+        
+        self._queues = [asyncio.Queue(maxsize=self.queue_size) for _ in range(self.workers)]
+        self._tasks = [
+            asyncio.create_task(self._worker(index, queue))
+            for index, queue in enumerate(self._queues)
+        ]
+        logger.info(f"Started {self.workers} update workers (queue size {self.queue_size})")
+    
+    async def stop(self):
+        """Drain pending updates and stop shard workers."""
+        if not self._tasks:
+            return
+        
+        queues = self._queues
+        self._queues = []
+        
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(queue.join() for queue in queues)),
+                timeout=self.drain_timeout
+            )
+        except asyncio.TimeoutError:
+            pending = sum(queue.qsize() for queue in queues)
+            logger.warning(f"Update workers stopped with {pending} pending updates")
+        
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("Update workers stopped")
+    
+    def get_backlog(self) -> int:
+        """Get the number of updates waiting in all shard queues."""
+        return sum(queue.qsize() for queue in self._queues)
+    
+    def _get_shard(self, event: TelegramObject) -> int:
+        """Pick the shard for an update from its sender or chat."""
+        key: Optional[int] = None
+        
+        if isinstance(event, Update):
+            # Runs before UserContextMiddleware, so resolve the sender the same way it does
+            context = UserContextMiddleware.resolve_event_context(event)
+            if context.user is not None:
+                key = context.user.id
+            elif context.chat is not None:
+                key = context.chat.id
+        
+        if key is None:
+            return 0
+        return abs(key) % self.workers
+    
+    async def _worker(self, index: int, queue: asyncio.Queue):
+        """Process updates of a single shard in arrival order."""
+        while True:
+            handler, event, data = await queue.get()
+            try:
+                # The rest of the chain includes the dispatcher's ErrorsMiddleware, so
+                # only errors no error handler dealt with end up here
+                result = await handler(event, data)
+                if isinstance(result, TelegramMethod):
+                    await Dispatcher.silent_call_request(bot=data["bot"], result=result)
+            except Exception as e:
+                logger.exception(f"Error handling update {getattr(event, 'update_id', None)} in shard {index}: {e}")
+            finally:
+                queue.task_done()
@@ -0,0 +1,144 @@
+"""Per-user anti-flood and admission control for user handlers."""
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Message, CallbackQuery
+
+from app.ui.fa import PersianTexts
+
+logger = logging.getLogger(__name__)
+
+
+class SlidingWindowLimiter:
+    """In-memory sliding-window log limiter keyed by user ID."""
+    
+    def __init__(self, limit: int, window: float):
+        self.limit = max(1, limit)
+        self.window = window
+        self._hits: Dict[int, Deque[float]] = {}
+        self._warned: Dict[int, float] = {}
+        self._last_sweep = time.monotonic()
+    
+    def hit(self, user_id: int) -> bool:
+        """Record a hit for user. Returns False if user is over the limit."""
+        now = time.monotonic()
+        self._sweep(now)
+        
+        hits = self._hits.get(user_id)
+        if hits is None:
+            hits = self._hits[user_id] = deque(maxlen=self.limit)
+        
+        while hits and hits[0] <= now - self.window:
+            hits.popleft()
+        
+        if len(hits) >= self.limit:
+            return False
+        
+        hits.append(now)
+        return True
+    
+    def should_warn(self, user_id: int) -> bool:
+        """Check if a limited user should be told once per window."""
+        now = time.monotonic()
+        last = self._warned.get(user_id)
+        if last is not None and now - last < self.window:
+            return False
+        self._warned[user_id] = now
+        return True
+    
+    def _sweep(self, now: float):
+        """Drop idle users so memory stays proportional to active users."""
+        if now - self._last_sweep < self.window:
+            return
+        self._last_sweep = now
+        cutoff = now - self.window
+        
+        for user_id in [uid for uid, hits in self._hits.items() if not hits or hits[-1] <= cutoff]:
+            del self._hits[user_id]
+        for user_id in [uid for uid, ts in self._warned.items() if ts <= cutoff]:
+            del self._warned[user_id]
+
+
+# Admission classes: bulk updates are shed first so interactive ones stay fast
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BULK = "bulk"
+
+
+def get_priority(event: TelegramObject) -> str:
+    """Classify an update for admission control.
+    
+    Deliveries (/start with a bundle code, and the join re-check that ends
+    in one) copy whole bundles and check channel membership, so they are
+    bulk. Plain /start, request submissions and the rest are interactive.
+    """
+    if isinstance(event, CallbackQuery) and event.data == "join_check":
+        return PRIORITY_BULK
+    if isinstance(event, Message) and event.text and event.text.startswith("/start "):
+        return PRIORITY_BULK
+    return PRIORITY_INTERACTIVE
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """Rate-limit each user and shed load when too many handlers are in flight.
+    
+    Admins are exempt. Events over a user's limit are dropped (with one notice
+    per window). Admission is decided immediately, since waiting would stall
+    the shard worker and every user queued behind it: interactive events are
+    admitted while fewer than ``max_concurrency`` user handlers run, bulk
+    events only while fewer than ``bulk_concurrency`` do. Rejected events get
+    a "busy, try again" reply. ``max_concurrency`` must stay below the number
+    of update workers, or the limit can never be reached.
+    """
+    
+    def __init__(self, rate_limit: int, rate_window: float, max_concurrency: int,
+                 bulk_concurrency: int, admin_ids: list):
+        self.limiter = SlidingWindowLimiter(rate_limit, rate_window)
+        self.admin_ids = set(admin_ids)
+        max_concurrency = max(1, max_concurrency)
+        self.limits = {
+            PRIORITY_INTERACTIVE: max_concurrency,
+            PRIORITY_BULK: max(1, min(bulk_concurrency, max_concurrency)),
+        }
+        self.in_flight = 0
+    
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        user = data.get("event_from_user")
+        if user is None or user.id in self.admin_ids:
+            return await handler(event, data)
+        
+        if not self.limiter.hit(user.id):
+            logger.debug(f"Rate limit exceeded for user {user.id}")
+            if self.limiter.should_warn(user.id):
+                await self._reply(event, PersianTexts.TOO_MANY_REQUESTS)
+            elif isinstance(event, CallbackQuery):
+                await self._reply(event, None)
+            return None
+        
+        priority = get_priority(event)
+        if self.in_flight >= self.limits[priority]:
+            logger.warning(f"Shedding {priority} update from user {user.id}: {self.in_flight} handlers in flight")
+            await self._reply(event, PersianTexts.SERVER_BUSY)
+            return None
+        
+        self.in_flight += 1
+        try:
+            return await handler(event, data)
+        finally:
+            self.in_flight -= 1
+    
+    async def _reply(self, event: TelegramObject, text: str):
+        """Answer a rejected event without raising."""
+        try:
+            if isinstance(event, CallbackQuery):
+                await event.answer(text)
+            elif isinstance(event, Message) and text:
+                await event.answer(text)
+        except Exception as e:
+            logger.debug(f"Failed to answer rejected update: {e}")
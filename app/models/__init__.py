@@ -7,6 +7,9 @@ from .delivery import Delivery
 from .message import StartingMessage, EndingMessage, EndingRotation
 from .request import Request
 from .settings import Settings
+from .archive import ArchiveMessage
+from .broadcast import BroadcastJob
+from .stats import DailyStat
 
 __all__ = [
     "Base",
@@ -20,4 +23,7 @@ __all__ = [
     "EndingRotation",
     "Request",
     "Settings",
+    "ArchiveMessage",
+    "BroadcastJob",
+    "DailyStat",
 ]
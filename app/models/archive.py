@@ -0,0 +1,23 @@
+"""Archive message index model."""
+from datetime import datetime
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, JSON, UniqueConstraint
+from .base import Base
+
+
+class ArchiveMessage(Base):
+    """Index of messages posted in archive chats, used for range imports."""
+    
+    __tablename__ = "archive_messages"
+    __table_args__ = (
+        UniqueConstraint("chat_id", "message_id", name="uq_archive_message_chat_message"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    chat_id = Column(BigInteger, nullable=False)
+    message_id = Column(Integer, nullable=False)
+    media_type = Column(String(50), nullable=True)
+    caption_json = Column(JSON, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f"<ArchiveMessage(chat_id={self.chat_id}, message_id={self.message_id})>"
@@ -1,11 +1,60 @@
 """Base model class for SQLAlchemy."""
-from sqlalchemy import create_engine, MetaData
+import logging
+import sqlite3
+import time
+from sqlalchemy import create_engine, event, MetaData
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 from app.config import settings
+from app.utils.dates import sqlite_local_date
+from app.utils.metrics import DB_QUERY_DURATION
+from app.utils.text import normalize_persian
+from app.utils.tracing import record_query
+
+logger = logging.getLogger(__name__)
+
+# Longest parameter repr included in slow query logs
+SLOW_QUERY_PARAMS_LENGTH = 500
 
 # Create engine
 engine = create_engine(settings.DB_URL, echo=settings.LOG_LEVEL == "DEBUG")
 
+
+@event.listens_for(Engine, "connect")
+def register_sqlite_functions(dbapi_connection, connection_record):
+    """Register SQL functions used by migrations and rollups."""
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.create_function("fa_normalize", 1, normalize_persian, deterministic=True)
+        dbapi_connection.create_function("local_date", 1, sqlite_local_date, deterministic=True)
+
+
+@event.listens_for(Engine, "connect")
+def configure_sqlite_journal(dbapi_connection, connection_record):
+    """Use WAL so backups and readers never block writers, and let writers wait for locks."""
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.execute(f"PRAGMA busy_timeout = {settings.DB_BUSY_TIMEOUT_MS}")
+        dbapi_connection.execute("PRAGMA journal_mode = WAL")
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_started"] = time.perf_counter()
+
+
+@event.listens_for(engine, "after_cursor_execute")
+def record_query_time(conn, cursor, statement, parameters, context, executemany):
+    """Record statement time by statement type and for the current trace; log slow statements."""
+    elapsed = time.perf_counter() - conn.info["query_started"]
+    DB_QUERY_DURATION.observe(elapsed, statement.split(None, 1)[0].upper())
+    record_query(statement, elapsed)
+    
+    if settings.SLOW_QUERY_MS and elapsed * 1000 >= settings.SLOW_QUERY_MS:
+        params = repr(parameters)
+        if len(params) > SLOW_QUERY_PARAMS_LENGTH:
+            params = params[:SLOW_QUERY_PARAMS_LENGTH] + "..."
+        logger.warning(f"Slow query ({elapsed * 1000:.0f} ms): {' '.join(statement.split())} params={params}")
+
+
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
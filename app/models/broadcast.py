@@ -0,0 +1,30 @@
+"""Broadcast job model."""
+from datetime import datetime
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime
+from .base import Base
+
+
+class BroadcastJob(Base):
+    """A broadcast and its progress, so it can resume after a restart."""
+    
+    __tablename__ = "broadcast_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    created_by = Column(BigInteger, nullable=False)
+    from_chat_id = Column(BigInteger, nullable=False)
+    message_id = Column(Integer, nullable=False)
+    status = Column(String(20), default="pending", nullable=False, index=True)  # pending, running, paused, cancelled, completed
+    cursor = Column(Integer, default=0, nullable=False)  # Last users.id processed
+    total = Column(Integer, default=0, nullable=False)
+    sent = Column(Integer, default=0, nullable=False)
+    failed = Column(Integer, default=0, nullable=False)
+    active_days = Column(Integer, nullable=True)  # Audience: users seen in the N days before created_at
+    bundle_id = Column(Integer, nullable=True)  # Audience: users who downloaded this bundle
+    status_chat_id = Column(BigInteger, nullable=True)  # Admin message showing the job's status
+    status_message_id = Column(Integer, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    finished_at = Column(DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f"<BroadcastJob(id={self.id}, status='{self.status}', sent={self.sent}, failed={self.failed})>"
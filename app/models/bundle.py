@@ -1,7 +1,8 @@
 """Bundle and bundle item models."""
 from datetime import datetime
 from sqlalchemy import Column, Integer, BigInteger, String, Text, Boolean, DateTime, ForeignKey, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
+from app.utils.text import normalize_persian
 from .base import Base
 
 
@@ -11,17 +12,25 @@ class Bundle(Base):
     __tablename__ = "bundles"
     
     id = Column(Integer, primary_key=True, index=True)
-    public_number = Column(Integer, nullable=False, unique=True, index=True)
-    public_number_str = Column(String(10), nullable=False, index=True)  # e.g., "0001"
+    public_number = Column(Integer, nullable=True, unique=True, index=True)  # assigned on publish
+    public_number_str = Column(String(10), nullable=True, index=True)  # e.g., "0001"
     code = Column(String(50), nullable=False, unique=True, index=True)
     title = Column(String(500), nullable=False)
+    search_title = Column(String(500), nullable=True)  # normalize_persian(title), indexed by bundles_fts
     created_by = Column(BigInteger, nullable=False)  # admin user ID
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     is_active = Column(Boolean, default=True, nullable=False)
+    status = Column(String(20), default="published", nullable=False, index=True)  # draft, published
+    download_count = Column(Integer, default=0, nullable=False, index=True)  # kept by StatsRepository.record_delivery
     
     # Relationship to bundle items
     items = relationship("BundleItem", back_populates="bundle", cascade="all, delete-orphan")
     
+    @validates("title")
+    def _set_search_title(self, key, title):
+        self.search_title = normalize_persian(title)
+        return title
+    
     def __repr__(self):
         return f"<Bundle(public_number={self.public_number}, title='{self.title}')>"
 
@@ -12,14 +12,18 @@ class Delivery(Base):
     id = Column(Integer, primary_key=True, index=True)
     bundle_id = Column(Integer, nullable=False, index=True)
     user_id = Column(BigInteger, nullable=False, index=True)
-    delivered_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    delivered_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
     messages_json = Column(JSON, nullable=False)  # [{"chat_id": user_id, "message_id": 123}, ...]
     delete_at = Column(DateTime, nullable=False, index=True)
     deleted_at = Column(DateTime, nullable=True)
     status = Column(String(20), default="delivered", nullable=False)  # delivered, deleted, failed
+    updated_at = Column(DateTime, nullable=True, index=True)  # Last status change; incremental backups export rows by it
     
     def __repr__(self):
         return f"<Delivery(bundle_id={self.bundle_id}, user_id={self.user_id}, status='{self.status}')>"
 
 # Create index for efficient deletion job queries
 Index("idx_delivery_delete_at", Delivery.delete_at)
+
+# Covering index for "users who downloaded a bundle" broadcast audiences
+Index("idx_delivery_bundle_user", Delivery.bundle_id, Delivery.user_id)
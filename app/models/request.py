@@ -14,7 +14,7 @@ class Request(Base):
     text = Column(Text, nullable=False)
     status = Column(String(20), default="open", nullable=False)  # open, closed
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    closed_at = Column(DateTime, nullable=True)
+    closed_at = Column(DateTime, nullable=True, index=True)
     
     def __repr__(self):
         return f"<Request(id={self.id}, user_id={self.user_id}, status='{self.status}')>"
@@ -0,0 +1,25 @@
+"""Statistics rollup models."""
+from sqlalchemy import Column, Integer, Date, LargeBinary
+from .base import Base
+
+# bundle_id of the rollup rows that cover all bundles
+ALL_BUNDLES = 0
+
+
+class DailyStat(Base):
+    """Per-day download counters for each bundle, and for all bundles (bundle_id 0).
+    
+    Days are calendar days in settings.TZ.
+    """
+    
+    __tablename__ = "daily_stats"
+    
+    day = Column(Date, primary_key=True)
+    bundle_id = Column(Integer, primary_key=True)
+    downloads = Column(Integer, default=0, nullable=False)
+    unique_users = Column(Integer, default=0, nullable=False)  # Distinct downloaders that day
+    new_users = Column(Integer, default=0, nullable=False)  # First-time downloaders of the bundle; for bundle 0, users who joined
+    users_sketch = Column(LargeBinary, nullable=True)  # HyperLogLog of the day's downloaders, for unique counts over any period
+    
+    def __repr__(self):
+        return f"<DailyStat(day={self.day}, bundle_id={self.bundle_id}, downloads={self.downloads})>"
@@ -1,6 +1,6 @@
 """User model."""
 from datetime import datetime
-from sqlalchemy import Column, Integer, BigInteger, DateTime
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime
 from .base import Base
 
 
@@ -11,8 +11,10 @@ class User(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     tg_user_id = Column(BigInteger, unique=True, nullable=False, index=True)
-    first_seen = Column(DateTime, default=datetime.utcnow, nullable=False)
-    last_seen = Column(DateTime, default=datetime.utcnow, nullable=False)
+    first_seen = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    last_seen = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    reachability = Column(String(20), nullable=True)  # None (reachable), blocked, deactivated, chat_not_found
+    unreachable_at = Column(DateTime, nullable=True, index=True)  # When reachability was last observed as failing
     
     def __repr__(self):
         return f"<User(tg_user_id={self.tg_user_id})>"
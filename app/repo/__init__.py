@@ -6,6 +6,10 @@ from .delivery import DeliveryRepository
 from .message import MessageRepository
 from .request import RequestRepository
 from .settings import SettingsRepository
+from .archive import ArchiveRepository
+from .broadcast import BroadcastRepository
+from .stats import StatsRepository
+from .pagination import Page, keyset_page
 
 __all__ = [
     "UserRepository",
@@ -15,4 +19,9 @@ __all__ = [
     "MessageRepository",
     "RequestRepository",
     "SettingsRepository",
+    "ArchiveRepository",
+    "BroadcastRepository",
+    "StatsRepository",
+    "Page",
+    "keyset_page",
 ]
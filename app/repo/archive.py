@@ -0,0 +1,47 @@
+"""Archive message index repository."""
+from typing import List, Optional
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.sqlite import insert
+from app.models.archive import ArchiveMessage
+
+
+class ArchiveRepository:
+    """Repository for archive message index operations."""
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def record_message(self, chat_id: int, message_id: int, media_type: str = None,
+                       caption_json: dict = None):
+        """Add a message to the index, ignoring duplicates."""
+        self.db.execute(
+            insert(ArchiveMessage).values(
+                chat_id=chat_id,
+                message_id=message_id,
+                media_type=media_type,
+                caption_json=caption_json
+            ).on_conflict_do_nothing(index_elements=["chat_id", "message_id"])
+        )
+        self.db.commit()
+    
+    def get_messages_in_range(self, chat_id: int, start_id: int, end_id: int,
+                              media_types: Optional[List[str]] = None) -> List[ArchiveMessage]:
+        """Get indexed messages of a chat within an inclusive message ID range."""
+        query = self.db.query(ArchiveMessage).filter(
+            ArchiveMessage.chat_id == chat_id,
+            ArchiveMessage.message_id >= start_id,
+            ArchiveMessage.message_id <= end_id
+        )
+        
+        if media_types:
+            query = query.filter(ArchiveMessage.media_type.in_(media_types))
+        
+        return query.order_by(ArchiveMessage.message_id).all()
+    
+    def count_messages_in_range(self, chat_id: int, start_id: int, end_id: int) -> int:
+        """Count indexed messages of a chat, of any type, within an inclusive message ID range."""
+        return self.db.query(ArchiveMessage).filter(
+            ArchiveMessage.chat_id == chat_id,
+            ArchiveMessage.message_id >= start_id,
+            ArchiveMessage.message_id <= end_id
+        ).count()
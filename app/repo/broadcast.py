@@ -0,0 +1,81 @@
+"""Broadcast job repository."""
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy.orm import Session
+from app.models.broadcast import BroadcastJob
+
+# Statuses of jobs that haven't finished yet
+ACTIVE_STATUSES = ("pending", "running", "paused")
+
+
+class BroadcastRepository:
+    """Repository for broadcast job operations."""
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def create_job(self, created_by: int, from_chat_id: int, message_id: int, total: int,
+                   active_days: Optional[int] = None, bundle_id: Optional[int] = None) -> BroadcastJob:
+        """Queue a new broadcast job."""
+        job = BroadcastJob(
+            created_by=created_by,
+            from_chat_id=from_chat_id,
+            message_id=message_id,
+            total=total,
+            active_days=active_days,
+            bundle_id=bundle_id
+        )
+        self.db.add(job)
+        self.db.commit()
+        self.db.refresh(job)
+        return job
+    
+    def get_job(self, job_id: int) -> Optional[BroadcastJob]:
+        """Get broadcast job by ID."""
+        return self.db.query(BroadcastJob).filter(BroadcastJob.id == job_id).first()
+    
+    def get_next_job(self) -> Optional[BroadcastJob]:
+        """Get the oldest job to run: an interrupted running job or a pending one."""
+        return self.db.query(BroadcastJob).filter(
+            BroadcastJob.status.in_(("running", "pending"))
+        ).order_by(BroadcastJob.id).first()
+    
+    def get_active_jobs(self) -> List[BroadcastJob]:
+        """Get jobs that haven't completed or been cancelled."""
+        return self.db.query(BroadcastJob).filter(
+            BroadcastJob.status.in_(ACTIVE_STATUSES)
+        ).order_by(BroadcastJob.id).all()
+    
+    def set_status_message(self, job_id: int, chat_id: int, message_id: int):
+        """Remember the admin message that shows the job's status."""
+        self.db.query(BroadcastJob).filter(BroadcastJob.id == job_id).update({
+            BroadcastJob.status_chat_id: chat_id,
+            BroadcastJob.status_message_id: message_id
+        })
+        self.db.commit()
+    
+    def set_status(self, job_id: int, status: str, from_statuses: tuple) -> bool:
+        """Move a job to a new status if it's currently in one of from_statuses."""
+        values = {BroadcastJob.status: status, BroadcastJob.updated_at: datetime.utcnow()}
+        if status in ("cancelled", "completed"):
+            values[BroadcastJob.finished_at] = datetime.utcnow()
+        
+        updated = self.db.query(BroadcastJob).filter(
+            BroadcastJob.id == job_id,
+            BroadcastJob.status.in_(from_statuses)
+        ).update(values, synchronize_session=False)
+        self.db.commit()
+        return updated > 0
+    
+    def save_progress(self, job_id: int, cursor: int, sent: int, failed: int) -> Optional[str]:
+        """Checkpoint a job's cursor and counters. Returns its current status."""
+        self.db.query(BroadcastJob).filter(BroadcastJob.id == job_id).update({
+            BroadcastJob.cursor: cursor,
+            BroadcastJob.sent: sent,
+            BroadcastJob.failed: failed,
+            BroadcastJob.updated_at: datetime.utcnow()
+        }, synchronize_session=False)
+        self.db.commit()
+        
+        row = self.db.query(BroadcastJob.status).filter(BroadcastJob.id == job_id).first()
+        return row.status if row else None
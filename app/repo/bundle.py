@@ -1,11 +1,30 @@
 """Bundle repository."""
+import logging
 import secrets
-from datetime import datetime, timedelta
-from typing import Optional, List
+from datetime import datetime
+from typing import Dict, Optional, List
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, desc, func
+from sqlalchemy import or_, desc, insert, text
+from sqlalchemy.exc import IntegrityError, OperationalError
 from app.models.bundle import Bundle, BundleItem
-from app.models.delivery import Delivery
+from app.repo.pagination import Page, keyset_page
+from app.repo.settings import SettingsRepository
+from app.utils.text import build_fts_query, normalize_persian
+
+logger = logging.getLogger(__name__)
+
+# Attempts before giving up on a bundle insert that keeps hitting unique constraints
+MAX_CREATE_ATTEMPTS = 5
+
+# Full-text search over the bundles_fts index (see migration 004).
+# Code and number hits outrank title hits; ties go to the newest bundle.
+SEARCH_SQL = text("""
+    SELECT bundles.* FROM bundles_fts
+    JOIN bundles ON bundles.id = bundles_fts.rowid
+    WHERE bundles_fts MATCH :match AND bundles.status = 'published'
+    ORDER BY bm25(bundles_fts, 1.0, 10.0, 10.0), bundles.id DESC
+    LIMIT :limit OFFSET :offset
+""")
 
 
 class BundleRepository:
@@ -31,6 +50,137 @@ class BundleRepository:
         self.db.refresh(bundle)
         return bundle
     
+    def create_bundle_with_items(self, title: str, created_by: int, items: List[dict]) -> Bundle:
+        """Create a bundle and all its items in a single transaction.
+        
+        Reserves the public number, inserts the bundle and bulk-inserts items
+        with one executemany, then commits once. Code collisions are detected
+        by the unique constraint and retried with a fresh code.
+        
+        Args:
+            items: dicts with from_chat_id, message_id, media_type,
+                caption_json and extra_json keys
+        """
+        for attempt in range(1, MAX_CREATE_ATTEMPTS + 1):
+            try:
+                public_number = SettingsRepository(self.db).reserve_public_number()
+                
+                bundle = Bundle(
+                    public_number=public_number,
+                    public_number_str=f"{public_number:04d}",
+                    code=self._generate_unique_code(),
+                    title=title,
+                    created_by=created_by
+                )
+                self.db.add(bundle)
+                self.db.flush()
+                
+                self._insert_items(bundle.id, items)
+                
+                self.db.commit()
+                self.db.refresh(bundle)
+                return bundle
+            
+            except IntegrityError as e:
+                self.db.rollback()
+                if attempt == MAX_CREATE_ATTEMPTS:
+                    raise
+                logger.warning(f"Bundle insert conflict (attempt {attempt}), retrying: {e.orig}")
+        
+        raise RuntimeError("Bundle creation failed")
+    
+    def create_draft(self, created_by: int) -> Bundle:
+        """Create an empty draft bundle for a recording session."""
+        for attempt in range(1, MAX_CREATE_ATTEMPTS + 1):
+            try:
+                bundle = Bundle(
+                    code=self._generate_unique_code(),
+                    title="",
+                    created_by=created_by,
+                    is_active=False,
+                    status="draft"
+                )
+                self.db.add(bundle)
+                self.db.commit()
+                self.db.refresh(bundle)
+                return bundle
+            
+            except IntegrityError as e:
+                self.db.rollback()
+                if attempt == MAX_CREATE_ATTEMPTS:
+                    raise
+                logger.warning(f"Draft insert conflict (attempt {attempt}), retrying: {e.orig}")
+        
+        raise RuntimeError("Draft creation failed")
+    
+    def get_draft(self, created_by: int) -> Optional[Bundle]:
+        """Get the open draft bundle of an admin, if any."""
+        return self.db.query(Bundle).filter(
+            Bundle.created_by == created_by,
+            Bundle.status == "draft"
+        ).order_by(desc(Bundle.id)).first()
+    
+    def append_draft_items(self, bundle_id: int, items: List[dict]):
+        """Append a batch of recorded items to a draft bundle."""
+        if not items:
+            return
+        
+        self._insert_items(bundle_id, items)
+        self.db.commit()
+    
+    def finalize_draft(self, bundle_id: int, title: str) -> Optional[Bundle]:
+        """Publish a draft bundle: assign its public number and title in one step."""
+        bundle = self.db.query(Bundle).filter(
+            Bundle.id == bundle_id,
+            Bundle.status == "draft"
+        ).first()
+        if not bundle:
+            return None
+        
+        public_number = SettingsRepository(self.db).reserve_public_number()
+        bundle.public_number = public_number
+        bundle.public_number_str = f"{public_number:04d}"
+        bundle.title = title
+        bundle.created_at = datetime.utcnow()
+        bundle.is_active = True
+        bundle.status = "published"
+        self.db.commit()
+        self.db.refresh(bundle)
+        return bundle
+    
+    def delete_bundle(self, bundle_id: int) -> bool:
+        """Delete a bundle and its items."""
+        bundle = self.get_bundle_by_id(bundle_id)
+        if bundle:
+            self.db.delete(bundle)
+            self.db.commit()
+            return True
+        return False
+    
+    def count_bundle_items(self, bundle_id: int) -> int:
+        """Get item count for a bundle."""
+        return self.db.query(BundleItem).filter(BundleItem.bundle_id == bundle_id).count()
+    
+    def _insert_items(self, bundle_id: int, items: List[dict]):
+        """Bulk-insert bundle items with a single executemany (no commit)."""
+        if not items:
+            return
+        
+        self.db.execute(
+            insert(BundleItem),
+            [
+                {
+                    "bundle_id": bundle_id,
+                    "from_chat_id": item["from_chat_id"],
+                    "message_id": item["message_id"],
+                    "media_type": item.get("media_type"),
+                    "caption_json": item.get("caption_json"),
+                    "extra_json": item.get("extra_json"),
+                }
+                for item in items
+            ]
+        )
+    
     def add_bundle_item(self, bundle_id: int, from_chat_id: int, message_id: int, 
                        media_type: str = None, caption_json: dict = None, 
                        extra_json: dict = None) -> BundleItem:
@@ -50,31 +200,75 @@ class BundleRepository:
     
     def get_bundle_by_code(self, code: str) -> Optional[Bundle]:
         """Get bundle by code."""
-        return self.db.query(Bundle).filter(Bundle.code == code).first()
+        return self.db.query(Bundle).filter(
+            Bundle.code == code,
+            Bundle.status == "published"
+        ).first()
+    
+    def get_bundle_by_number(self, public_number: int) -> Optional[Bundle]:
+        """Get published bundle by its public number."""
+        return self.db.query(Bundle).filter(
+            Bundle.public_number == public_number,
+            Bundle.status == "published"
+        ).first()
     
     def get_bundle_by_id(self, bundle_id: int) -> Optional[Bundle]:
         """Get bundle by ID."""
         return self.db.query(Bundle).filter(Bundle.id == bundle_id).first()
     
-    def search_bundles(self, query: str) -> List[Bundle]:
-        """Search bundles by code, number, or title."""
+    def get_bundles_by_ids(self, bundle_ids: List[int]) -> Dict[int, Bundle]:
+        """Get bundles keyed by ID; missing IDs are left out."""
+        if not bundle_ids:
+            return {}
+        bundles = self.db.query(Bundle).filter(Bundle.id.in_(bundle_ids)).all()
+        return {bundle.id: bundle for bundle in bundles}
+    
+    def search_bundles(self, query: str, limit: int = 10, offset: int = 0) -> List[Bundle]:
+        """Search bundles by code, number, or title.
+        
+        Uses the Persian-normalized full-text index with ranking and
+        LIMIT/OFFSET applied in SQL. Every query term matches as a prefix.
+        """
+        match = build_fts_query(query)
+        if not match:
+            return []
+        
+        try:
+            return self.db.query(Bundle).from_statement(SEARCH_SQL).params(
+                match=match, limit=limit, offset=offset
+            ).all()
+        except OperationalError as e:
+            # Index not created (migration 004 not applied) - fall back to a scan
+            self.db.rollback()
+            logger.warning(f"Full-text search unavailable, falling back to LIKE: {e.orig}")
+        
         search_term = f"%{query}%"
         return self.db.query(Bundle).filter(
+            Bundle.status == "published",
             or_(
                 Bundle.code.ilike(search_term),
                 Bundle.public_number_str.ilike(search_term),
-                Bundle.title.ilike(search_term)
+                Bundle.title.ilike(search_term),
+                Bundle.search_title.ilike(f"%{normalize_persian(query)}%")
             )
-        ).order_by(desc(Bundle.created_at)).all()
+        ).order_by(desc(Bundle.created_at)).offset(offset).limit(limit).all()
     
     def get_all_bundles(self, limit: int = 50) -> List[Bundle]:
         """Get all bundles with limit."""
-        return self.db.query(Bundle).order_by(desc(Bundle.created_at)).limit(limit).all()
+        return self.db.query(Bundle).filter(
+            Bundle.status == "published"
+        ).order_by(desc(Bundle.created_at)).limit(limit).all()
+    
+    def get_bundles_page(self, after_id: int = None, before_id: int = None,
+                         limit: int = 10) -> Page:
+        """Get a page of published bundles, newest first."""
+        query = self.db.query(Bundle).filter(Bundle.status == "published")
+        return keyset_page(query, Bundle.id, limit, after=after_id, before=before_id)
     
     def toggle_bundle_status(self, bundle_id: int) -> bool:
         """Toggle bundle active status. Returns new status."""
         bundle = self.get_bundle_by_id(bundle_id)
-        if bundle:
+        if bundle and bundle.status == "published":
             bundle.is_active = not bundle.is_active
             self.db.commit()
             return bundle.is_active
@@ -82,31 +276,18 @@ class BundleRepository:
     
     def get_bundle_items(self, bundle_id: int) -> List[BundleItem]:
         """Get all items for a bundle."""
-        return self.db.query(BundleItem).filter(BundleItem.bundle_id == bundle_id).all()
+        return self.db.query(BundleItem).filter(
+            BundleItem.bundle_id == bundle_id
+        ).order_by(BundleItem.id).all()
     
     def get_bundle_count(self) -> int:
         """Get total bundle count."""
-        return self.db.query(Bundle).count()
-    
-    def get_top_bundle_by_downloads(self, days: int = None) -> Optional[tuple]:
-        """Get top bundle by downloads in last N days. Returns (bundle, download_count)."""
-        query = self.db.query(Bundle, func.count(Delivery.id).label('download_count')).join(
-            Delivery, Bundle.id == Delivery.bundle_id
-        )
-        
-        if days:
-            cutoff = datetime.utcnow() - timedelta(days=days)
-            query = query.filter(Delivery.delivered_at >= cutoff)
-        
-        result = query.group_by(Bundle.id).order_by(desc('download_count')).first()
-        
-        if result:
-            return result[0], result[1]  # bundle, count
-        return None
+        return self.db.query(Bundle).filter(Bundle.status == "published").count()
     
     def _generate_unique_code(self) -> str:
-        """Generate a unique code for the bundle."""
-        while True:
-            code = secrets.token_urlsafe(16)
-            if not self.db.query(Bundle).filter(Bundle.code == code).first():
-                return code
+        """Generate a code for the bundle.
+        
+        128 random bits make collisions practically impossible; the unique
+        constraint on Bundle.code catches the rest, so no lookup is needed.
+        """
+        return secrets.token_urlsafe(16)
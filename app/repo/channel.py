@@ -2,6 +2,7 @@
 from typing import List, Optional
 from sqlalchemy.orm import Session
 from app.models.channel import MandatoryChannel
+from app.repo.pagination import Page, keyset_page
 
 
 class ChannelRepository:
@@ -30,6 +31,13 @@ class ChannelRepository:
             MandatoryChannel.is_active == True
         ).all()
     
+    def get_channels_page(self, after_id: int = None, before_id: int = None,
+                          limit: int = 10) -> Page:
+        """Get a page of active mandatory channels, oldest first."""
+        query = self.db.query(MandatoryChannel).filter(MandatoryChannel.is_active == True)
+        return keyset_page(query, MandatoryChannel.id, limit, after=after_id,
+                           before=before_id, descending=False)
+    
     def get_channel_by_id(self, channel_id: int) -> Optional[MandatoryChannel]:
         """Get channel by ID."""
         return self.db.query(MandatoryChannel).filter(
@@ -1,10 +1,17 @@
 """Delivery repository."""
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import Iterator, List, Optional, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func
+from sqlalchemy import and_, func, text
 from app.models.delivery import Delivery
 
+# Delivery columns for the analytics snapshot; delivered_at as Unix seconds
+COLUMNS_SQL = text("""
+    SELECT user_id, bundle_id, CAST(strftime('%s', delivered_at) AS INTEGER)
+    FROM deliveries WHERE id > :after_id AND id <= :up_to_id
+    ORDER BY id
+""")
+
 
 class DeliveryRepository:
     """Repository for delivery operations."""
@@ -45,6 +52,7 @@ class DeliveryRepository:
         if delivery:
             delivery.deleted_at = datetime.utcnow()
             delivery.status = "deleted"
+            delivery.updated_at = delivery.deleted_at
             self.db.commit()
             return True
         return False
@@ -54,6 +62,7 @@ class DeliveryRepository:
         delivery = self.db.query(Delivery).filter(Delivery.id == delivery_id).first()
         if delivery:
             delivery.status = "failed"
+            delivery.updated_at = datetime.utcnow()
             self.db.commit()
             return True
         return False
@@ -71,3 +80,21 @@ class DeliveryRepository:
     def get_delivery_by_id(self, delivery_id: int) -> Optional[Delivery]:
         """Get delivery by ID."""
         return self.db.query(Delivery).filter(Delivery.id == delivery_id).first()
+    
+    def get_max_delivery_id(self) -> int:
+        """Highest delivery ID, or 0 without deliveries."""
+        return self.db.query(func.coalesce(func.max(Delivery.id), 0)).scalar()
+    
+    def count_deliveries_between(self, after_id: int, up_to_id: int) -> int:
+        """Count deliveries with after_id < id <= up_to_id."""
+        return self.db.query(func.count(Delivery.id)).filter(
+            Delivery.id > after_id,
+            Delivery.id <= up_to_id
+        ).scalar()
+    
+    def iter_delivery_columns(self, after_id: int, up_to_id: int,
+                              chunk_rows: int) -> Iterator[List[Tuple[int, int, int]]]:
+        """Stream (user_id, bundle_id, delivered_at seconds) rows in ID order, in chunks."""
+        result = self.db.execute(COLUMNS_SQL, {"after_id": after_id, "up_to_id": up_to_id})
+        for chunk in result.partitions(chunk_rows):
+            yield chunk
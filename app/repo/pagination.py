@@ -0,0 +1,43 @@
+"""Keyset pagination helpers."""
+from typing import List, Optional
+from sqlalchemy.orm import Query
+
+
+class Page:
+    """A page of rows with navigation flags."""
+    
+    def __init__(self, items: List, has_prev: bool, has_next: bool):
+        self.items = items
+        self.has_prev = has_prev
+        self.has_next = has_next
+    
+    def __repr__(self):
+        return f"<Page(items={len(self.items)}, has_prev={self.has_prev}, has_next={self.has_next})>"
+
+
+def keyset_page(query: Query, column, limit: int, after: Optional[int] = None,
+                before: Optional[int] = None, descending: bool = True) -> Page:
+    """Fetch one page of a query using a keyset cursor on a unique column.
+    
+    Pass ``after`` (the last value of the current page) for the next page, or
+    ``before`` (the first value of the current page) for the previous one.
+    Fetches ``limit + 1`` rows in a single query to know if more pages exist.
+    """
+    forward = before is None
+    
+    if after is not None:
+        query = query.filter(column < after if descending else column > after)
+    if before is not None:
+        query = query.filter(column > before if descending else column < before)
+    
+    order = column.desc() if descending == forward else column.asc()
+    rows = query.order_by(order).limit(limit + 1).all()
+    
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    
+    if forward:
+        return Page(rows, has_prev=after is not None, has_next=has_more)
+    
+    rows.reverse()
+    return Page(rows, has_prev=has_more, has_next=True)
@@ -4,6 +4,7 @@ from typing import List, Optional
 from sqlalchemy.orm import Session
 from sqlalchemy import desc
 from app.models.request import Request
+from app.repo.pagination import Page, keyset_page
 
 
 class RequestRepository:
@@ -29,6 +30,12 @@ class RequestRepository:
             Request.status == "open"
         ).order_by(desc(Request.created_at)).all()
     
+    def get_open_requests_page(self, after_id: int = None, before_id: int = None,
+                               limit: int = 10) -> Page:
+        """Get a page of open requests, newest first."""
+        query = self.db.query(Request).filter(Request.status == "open")
+        return keyset_page(query, Request.id, limit, after=after_id, before=before_id)
+    
     def get_request_by_id(self, request_id: int) -> Optional[Request]:
         """Get request by ID."""
         return self.db.query(Request).filter(Request.id == request_id).first()
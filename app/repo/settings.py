@@ -1,6 +1,7 @@
 """Settings repository."""
 from typing import Optional
 from sqlalchemy.orm import Session
+from sqlalchemy import update
 from app.models.settings import Settings
 
 
@@ -22,8 +23,26 @@ class SettingsRepository:
     
     def get_next_public_number(self) -> int:
         """Get and increment next public number."""
-        settings = self.get_settings()
-        current_number = settings.next_public_number
-        settings.next_public_number += 1
+        current_number = self.reserve_public_number()
         self.db.commit()
         return current_number
+    
+    def reserve_public_number(self) -> int:
+        """Atomically reserve the next public number without committing.
+        
+        The increment is done in SQL, so the write lock is taken before the
+        value is read and concurrent reservations can't hand out the same number.
+        The reservation is released if the caller rolls back.
+        """
+        result = self.db.execute(
+            update(Settings)
+            .where(Settings.id == 1)
+            .values(next_public_number=Settings.next_public_number + 1)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            self.db.add(Settings(id=1, next_public_number=2))
+            self.db.flush()
+            return 1
+        
+        return self.db.query(Settings.next_public_number).filter(Settings.id == 1).scalar() - 1
@@ -0,0 +1,203 @@
+"""Statistics rollup repository."""
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import func, select, text, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+from app.models.bundle import Bundle
+from app.models.delivery import Delivery
+from app.models.stats import DailyStat, ALL_BUNDLES
+from app.utils.dates import local_date, local_day_start
+from app.utils.hll import HyperLogLog
+
+# Recompute rollup rows from deliveries and users; local_date() is registered on every connection
+REBUILD_SQL = [
+    """
+    INSERT INTO daily_stats (day, bundle_id, downloads, unique_users, new_users)
+    SELECT local_date(delivered_at) AS day, bundle_id, count(*), count(DISTINCT user_id), 0
+    FROM deliveries WHERE delivered_at >= :since_utc
+    GROUP BY day, bundle_id
+    """,
+    """
+    INSERT INTO daily_stats (day, bundle_id, downloads, unique_users, new_users)
+    SELECT local_date(delivered_at) AS day, 0, count(*), count(DISTINCT user_id), 0
+    FROM deliveries WHERE delivered_at >= :since_utc
+    GROUP BY day
+    """,
+    """
+    INSERT INTO daily_stats (day, bundle_id, downloads, unique_users, new_users)
+    SELECT local_date(d.delivered_at) AS day, d.bundle_id, 0, 0, count(*)
+    FROM deliveries d
+    WHERE d.delivered_at >= :since_utc AND NOT EXISTS (
+        SELECT 1 FROM deliveries p
+        WHERE p.bundle_id = d.bundle_id AND p.user_id = d.user_id AND p.id < d.id
+    )
+    GROUP BY day, d.bundle_id
+    ON CONFLICT (day, bundle_id) DO UPDATE SET new_users = excluded.new_users
+    """,
+    """
+    INSERT INTO daily_stats (day, bundle_id, downloads, unique_users, new_users)
+    SELECT local_date(first_seen) AS day, 0, 0, 0, count(*)
+    FROM users WHERE first_seen >= :since_utc
+    GROUP BY day
+    ON CONFLICT (day, bundle_id) DO UPDATE SET new_users = excluded.new_users
+    """,
+]
+
+
+class StatsRepository:
+    """Repository for the daily statistics rollup."""
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def record_delivery(self, bundle_id: int, user_id: int, delivered_at: Optional[datetime] = None):
+        """Count a delivery in the rollup (no commit).
+        
+        Must run before the delivery row is inserted, so the checks for the
+        user's earlier deliveries don't see it. Commit together with it.
+        """
+        delivered_at = delivered_at or datetime.utcnow()
+        day = local_date(delivered_at)
+        day_start = local_day_start(day)
+        
+        def delivered_before(*criteria) -> bool:
+            return self.db.query(
+                self.db.query(Delivery.id).filter(Delivery.user_id == user_id, *criteria).exists()
+            ).scalar()
+        
+        first_of_bundle = not delivered_before(Delivery.bundle_id == bundle_id)
+        first_of_bundle_today = first_of_bundle or not delivered_before(
+            Delivery.bundle_id == bundle_id,
+            Delivery.delivered_at >= day_start
+        )
+        first_today = first_of_bundle_today and not delivered_before(Delivery.delivered_at >= day_start)
+        
+        self._increment(day, bundle_id, downloads=1, unique_users=int(first_of_bundle_today),
+                        new_users=int(first_of_bundle))
+        self._increment(day, ALL_BUNDLES, downloads=1, unique_users=int(first_today))
+        self.db.execute(
+            update(Bundle).where(Bundle.id == bundle_id).values(download_count=Bundle.download_count + 1)
+        )
+        
+        # A user already counted that day can't change the sketch
+        if first_of_bundle_today:
+            self._add_to_sketch(day, bundle_id, user_id)
+        if first_today:
+            self._add_to_sketch(day, ALL_BUNDLES, user_id)
+    
+    def record_new_user(self, first_seen: Optional[datetime] = None):
+        """Count a newly registered user in the rollup (no commit)."""
+        self._increment(local_date(first_seen), ALL_BUNDLES, new_users=1)
+    
+    def get_totals(self, since: Optional[date] = None) -> Dict[str, int]:
+        """Sum downloads and new users over all bundles since a local day (inclusive)."""
+        query = self.db.query(
+            func.coalesce(func.sum(DailyStat.downloads), 0),
+            func.coalesce(func.sum(DailyStat.new_users), 0)
+        ).filter(DailyStat.bundle_id == ALL_BUNDLES)
+        if since is not None:
+            query = query.filter(DailyStat.day >= since)
+        
+        downloads, new_users = query.one()
+        return {"downloads": downloads, "new_users": new_users}
+    
+    def get_unique_users(self, since: Optional[date] = None,
+                         bundle_ids: Optional[Iterable[int]] = None) -> int:
+        """Approximate distinct downloaders since a local day, of any of bundle_ids (default: all)."""
+        bundle_ids = list(bundle_ids) if bundle_ids is not None else [ALL_BUNDLES]
+        query = self.db.query(DailyStat.users_sketch).filter(DailyStat.bundle_id.in_(bundle_ids))
+        if since is not None:
+            query = query.filter(DailyStat.day >= since)
+        
+        return HyperLogLog.union(row.users_sketch for row in query).count()
+    
+    def get_bundle_downloads(self, bundle_id: int, since: Optional[date] = None) -> int:
+        """Downloads of one bundle since a local day, or all time."""
+        if since is None:
+            return self.db.query(Bundle.download_count).filter(Bundle.id == bundle_id).scalar() or 0
+        return self.db.query(func.coalesce(func.sum(DailyStat.downloads), 0)).filter(
+            DailyStat.bundle_id == bundle_id,
+            DailyStat.day >= since
+        ).scalar()
+    
+    def get_top_bundles(self, since: Optional[date] = None, limit: int = 10) -> List[Tuple[int, int]]:
+        """(bundle_id, downloads) of the most downloaded bundles since a local day.
+        
+        All-time rankings walk the index on Bundle.download_count; windowed
+        ones sum the rollup rows of the window.
+        """
+        if since is None:
+            rows = self.db.query(Bundle.id, Bundle.download_count).filter(
+                Bundle.download_count > 0
+            ).order_by(Bundle.download_count.desc()).limit(limit).all()
+            return [(row.id, row.download_count) for row in rows]
+        
+        downloads = func.sum(DailyStat.downloads).label("downloads")
+        query = self.db.query(DailyStat.bundle_id, downloads).filter(
+            DailyStat.bundle_id != ALL_BUNDLES,
+            DailyStat.day >= since
+        )
+        rows = query.group_by(DailyStat.bundle_id).order_by(downloads.desc()).limit(limit).all()
+        return [(row.bundle_id, row.downloads) for row in rows]
+    
+    def rebuild(self, since: date):
+        """Recompute the rollup from raw deliveries and users for local days >= since."""
+        self.db.query(DailyStat).filter(DailyStat.day >= since).delete(synchronize_session=False)
+        params = {"since_utc": local_day_start(since)}
+        for sql in REBUILD_SQL:
+            self.db.execute(text(sql), params)
+        self._rebuild_sketches(params["since_utc"])
+        self.db.commit()
+    
+    def _rebuild_sketches(self, since_utc: datetime):
+        """Recompute users_sketch for rollup rows from deliveries since a timestamp, a day at a time."""
+        rows = self.db.execute(text(
+            "SELECT local_date(delivered_at) AS day, bundle_id, user_id FROM deliveries "
+            "WHERE delivered_at >= :since_utc ORDER BY delivered_at"
+        ), {"since_utc": since_utc})
+        
+        current_day = None
+        sketches: Dict[int, HyperLogLog] = {}
+        for row in rows:
+            if row.day != current_day:
+                self._save_sketches(current_day, sketches)
+                current_day, sketches = row.day, {}
+            for bundle_id in (row.bundle_id, ALL_BUNDLES):
+                sketches.setdefault(bundle_id, HyperLogLog()).add(row.user_id)
+        self._save_sketches(current_day, sketches)
+    
+    def _save_sketches(self, day: Optional[str], sketches: Dict[int, HyperLogLog]):
+        if day is None:
+            return
+        self.db.execute(
+            text("UPDATE daily_stats SET users_sketch = :sketch WHERE day = :day AND bundle_id = :bundle_id"),
+            [
+                {"sketch": sketch.to_bytes(), "day": day, "bundle_id": bundle_id}
+                for bundle_id, sketch in sketches.items()
+            ]
+        )
+    
+    def _add_to_sketch(self, day: date, bundle_id: int, user_id: int):
+        key = (DailyStat.day == day, DailyStat.bundle_id == bundle_id)
+        sketch = HyperLogLog.from_bytes(self.db.execute(select(DailyStat.users_sketch).where(*key)).scalar())
+        if sketch.add(user_id):
+            self.db.execute(update(DailyStat).where(*key).values(users_sketch=sketch.to_bytes()))
+    
+    def _increment(self, day: date, bundle_id: int, downloads: int = 0, unique_users: int = 0,
+                   new_users: int = 0):
+        stmt = insert(DailyStat).values(
+            day=day,
+            bundle_id=bundle_id,
+            downloads=downloads,
+            unique_users=unique_users,
+            new_users=new_users
+        )
+        self.db.execute(stmt.on_conflict_do_update(
+            index_elements=[DailyStat.day, DailyStat.bundle_id],
+            set_={
+                "downloads": DailyStat.downloads + stmt.excluded.downloads,
+                "unique_users": DailyStat.unique_users + stmt.excluded.unique_users,
+                "new_users": DailyStat.new_users + stmt.excluded.new_users,
+            }
+        ))
@@ -1,8 +1,11 @@
 """User repository."""
 from datetime import datetime
-from typing import Optional
-from sqlalchemy.orm import Session
+from typing import List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.orm import Query, Session
+from app.models.delivery import Delivery
 from app.models.user import User
+from app.repo.stats import StatsRepository
 
 
 class UserRepository:
@@ -17,11 +20,14 @@ class UserRepository:
         if not user:
             user = User(tg_user_id=tg_user_id)
             self.db.add(user)
+            StatsRepository(self.db).record_new_user()
             self.db.commit()
             self.db.refresh(user)
         else:
-            # Update last_seen
+            # Update last_seen; a returning user can receive messages again
             user.last_seen = datetime.utcnow()
+            user.reachability = None
+            user.unreachable_at = None
             self.db.commit()
         return user
     
@@ -33,6 +39,52 @@ class UserRepository:
         """Get all users."""
         return self.db.query(User).all()
     
+    def get_user_id_batch(self, after_id: int, limit: int, reachable_only: bool = True,
+                          active_since: Optional[datetime] = None,
+                          bundle_id: Optional[int] = None) -> List[Tuple[int, int]]:
+        """Get the next (id, tg_user_id) pairs after a users.id cursor, in id order.
+        
+        Only the two integer columns are selected, so no ORM objects are built.
+        Users known to be unreachable are skipped unless reachable_only is False;
+        active_since and bundle_id narrow the audience (see count_audience).
+        """
+        query = self.db.query(User.id, User.tg_user_id).filter(User.id > after_id)
+        query = self._filter_audience(query, reachable_only, active_since, bundle_id)
+        return [(row.id, row.tg_user_id) for row in query.order_by(User.id).limit(limit)]
+    
+    def count_audience(self, reachable_only: bool = True, active_since: Optional[datetime] = None,
+                       bundle_id: Optional[int] = None) -> int:
+        """Count users matching a broadcast audience filter.
+        
+        Args:
+            active_since: only users seen at or after this time
+            bundle_id: only users who downloaded this bundle
+        """
+        query = self._filter_audience(self.db.query(User), reachable_only, active_since, bundle_id)
+        return query.count()
+    
+    def _filter_audience(self, query: Query, reachable_only: bool, active_since: Optional[datetime],
+                         bundle_id: Optional[int]) -> Query:
+        if reachable_only:
+            query = query.filter(User.reachability.is_(None))
+        if active_since is not None:
+            query = query.filter(User.last_seen >= active_since)
+        if bundle_id is not None:
+            downloaders = select(Delivery.user_id).where(Delivery.bundle_id == bundle_id)
+            query = query.filter(User.tg_user_id.in_(downloaders))
+        return query
+    
+    def mark_unreachable(self, tg_user_ids: List[int], reason: str) -> int:
+        """Record that users can't receive messages (blocked, deactivated, chat_not_found)."""
+        if not tg_user_ids:
+            return 0
+        updated = self.db.query(User).filter(User.tg_user_id.in_(tg_user_ids)).update({
+            User.reachability: reason,
+            User.unreachable_at: datetime.utcnow()
+        }, synchronize_session=False)
+        self.db.commit()
+        return updated
+    
     def get_user_count(self) -> int:
         """Get total user count."""
         return self.db.query(User).count()
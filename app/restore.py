@@ -0,0 +1,184 @@
+"""Restore tool for multi-volume and incremental backups.
+
+Usage:
+    python -m app.restore backups/backup-YYYYMMDD-HHMMSS.manifest.json data/app.db [--force]
+
+Every volume listed in the manifest must be in the manifest's directory. Each
+volume's checksum is verified before the archive is reassembled and extracted.
+For an incremental manifest, its full base backup is restored first and then
+every incremental in the chain is applied in order.
+Stop the bot before restoring over the live database.
+"""
+import argparse
+import base64
+import gzip
+import hashlib
+import json
+import logging
+import sqlite3
+import sys
+import tempfile
+import zipfile
+from pathlib import Path
+from typing import List
+
+from app.utils.files import CHUNK_SIZE, file_sha256
+from app.utils.text import normalize_persian
+
+logger = logging.getLogger(__name__)
+
+
+class RestoreError(Exception):
+    """Raised when a backup can't be verified or restored."""
+
+
+def reassemble_volumes(manifest_path: Path, output) -> str:
+    """Verify each volume and concatenate them into output. Returns archive SHA-256."""
+    manifest = json.loads(manifest_path.read_text())
+    total_digest = hashlib.sha256()
+    
+    for volume in manifest["volumes"]:
+        volume_path = manifest_path.parent / volume["name"]
+        if not volume_path.exists():
+            raise RestoreError(f"Missing volume {volume['name']}")
+        
+        digest = hashlib.sha256()
+        with open(volume_path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+                total_digest.update(chunk)
+                output.write(chunk)
+        
+        if digest.hexdigest() != volume["sha256"]:
+            raise RestoreError(f"Checksum mismatch in volume {volume['name']}")
+        logger.info(f"Verified volume {volume['name']}")
+    
+    if total_digest.hexdigest() != manifest["sha256"]:
+        raise RestoreError("Checksum mismatch in reassembled archive")
+    
+    return total_digest.hexdigest()
+
+
+def restore_full_backup(manifest_path: Path, target_path: Path, force: bool = False):
+    """Restore the database file from a full backup manifest."""
+    manifest = json.loads(manifest_path.read_text())
+    
+    if target_path.exists() and not force:
+        raise RestoreError(f"{target_path} exists, use --force to overwrite")
+    
+    target_path.parent.mkdir(parents=True, exist_ok=True)
+    
+    with tempfile.TemporaryFile(dir=target_path.parent) as archive:
+        reassemble_volumes(manifest_path, archive)
+        archive.seek(0)
+        
+        restored_path = target_path.with_name(f".{target_path.name}.restoring")
+        digest = hashlib.sha256()
+        with zipfile.ZipFile(archive) as zipf, zipf.open("app.db") as src, open(restored_path, "wb") as dst:
+            for chunk in iter(lambda: src.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+                dst.write(chunk)
+    
+    if digest.hexdigest() != manifest["database_sha256"]:
+        restored_path.unlink()
+        raise RestoreError("Checksum mismatch in restored database")
+    
+    # A WAL left over from the replaced database would be replayed onto the restored one
+    for suffix in ("-wal", "-shm"):
+        Path(f"{target_path}{suffix}").unlink(missing_ok=True)
+    restored_path.replace(target_path)
+    logger.info(f"Restored {manifest['name']} to {target_path}")
+
+
+def _decode_blob(value: dict):
+    """Inverse of the backup service's BLOB encoding."""
+    if set(value) == {"$base64"}:
+        return base64.b64decode(value["$base64"])
+    return value
+
+
+def resolve_chain(manifest_path: Path) -> List[Path]:
+    """Manifests from the full base backup up to the given one, oldest first."""
+    chain = [manifest_path]
+    manifest = json.loads(manifest_path.read_text())
+    while manifest["type"] == "incremental":
+        parent_path = manifest_path.parent / f"{manifest['parent']}.manifest.json"
+        if not parent_path.exists():
+            raise RestoreError(f"Missing parent backup {manifest['parent']}")
+        chain.insert(0, parent_path)
+        manifest = json.loads(parent_path.read_text())
+    return chain
+
+
+def apply_incremental(manifest_path: Path, conn: sqlite3.Connection):
+    """Apply one incremental backup's chunks in a single transaction.
+    
+    "upsert" chunks replace rows by primary key; the first "replace" chunk of a
+    table clears it before its rows are inserted.
+    """
+    manifest = json.loads(manifest_path.read_text())
+    cleared = set()
+    
+    with conn:
+        for entry in manifest["files"]:
+            chunk_path = manifest_path.parent / entry["name"]
+            if not chunk_path.exists():
+                raise RestoreError(f"Missing chunk {entry['name']}")
+            if file_sha256(chunk_path) != entry["sha256"]:
+                raise RestoreError(f"Checksum mismatch in chunk {entry['name']}")
+            
+            table = entry["table"]
+            if entry["mode"] == "replace" and table not in cleared:
+                conn.execute(f"DELETE FROM {table}")
+                cleared.add(table)
+            
+            with gzip.open(chunk_path, "rt", encoding="utf-8") as f:
+                rows = [json.loads(line, object_hook=_decode_blob) for line in f]
+            if rows:
+                columns = list(rows[0])
+                placeholders = ", ".join("?" for _ in columns)
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) VALUES ({placeholders})",
+                    [[row[column] for column in columns] for row in rows]
+                )
+    
+    logger.info(f"Applied {manifest['name']}")
+
+
+def restore_backup(manifest_path: Path, target_path: Path, force: bool = False):
+    """Restore a full backup, or an incremental one together with its chain."""
+    chain = resolve_chain(manifest_path)
+    restore_full_backup(chain[0], target_path, force=force)
+    if len(chain) == 1:
+        return
+    
+    # The bundle search triggers of backups taken before migration 013 call fa_normalize
+    conn = sqlite3.connect(target_path)
+    try:
+        conn.create_function("fa_normalize", 1, normalize_persian, deterministic=True)
+        for incremental_path in chain[1:]:
+            apply_incremental(incremental_path, conn)
+    finally:
+        conn.close()
+
+
+def main(argv=None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Restore a database backup from its manifest.")
+    parser.add_argument("manifest", type=Path, help="path to backup-*.manifest.json")
+    parser.add_argument("target", type=Path, help="database file to write, e.g. data/app.db")
+    parser.add_argument("--force", action="store_true", help="overwrite the target if it exists")
+    args = parser.parse_args(argv)
+    
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
+    
+    try:
+        restore_backup(args.manifest, args.target, force=args.force)
+    except (RestoreError, OSError, KeyError, sqlite3.Error, zipfile.BadZipFile) as e:
+        logger.error(f"Restore failed: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,6 +5,9 @@ from .join_gate import JoinGateService
 from .requests import RequestService
 from .broadcast import BroadcastService
 from .stats import StatsService
+from .backup import BackupService
+from .analytics import AnalyticsService
+from .export import ExportService
 
 __all__ = [
     "DeliveryService",
@@ -13,4 +16,7 @@ __all__ = [
     "RequestService",
     "BroadcastService", 
     "StatsService",
+    "BackupService",
+    "AnalyticsService",
+    "ExportService",
 ]
@@ -0,0 +1,493 @@
+"""Backup service for online, non-blocking database backups."""
+import asyncio
+import base64
+import gzip
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+import zipfile
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from aiogram import Bot
+from sqlalchemy.engine import make_url
+
+from app.config import settings
+from app.utils.files import CHUNK_SIZE, file_sha256
+from app.utils.helpers import send_document_file
+
+logger = logging.getLogger(__name__)
+
+# Append-only tables exported by incremental backups: rows with an id past the
+# previous watermark, plus rows whose listed (indexed) timestamp columns changed
+# since it. Rows are never deleted from these, since an upsert can't carry a delete.
+INCREMENTAL_TABLES = {
+    "users": ["last_seen", "unreachable_at"],
+    "deliveries": ["updated_at"],
+    "ending_rotations": [],
+    "requests": ["closed_at"],
+    "archive_messages": [],
+}
+
+# Tables copied in full by every incremental backup, so edits and deletes carry over
+# (bundle_items loses rows whenever a bundle is deleted)
+FULL_COPY_TABLES = [
+    "bundles",
+    "bundle_items",
+    "mandatory_channels",
+    "starting_messages",
+    "ending_messages",
+    "settings",
+    "broadcast_jobs",
+    "daily_stats",
+]
+
+# Timestamp format SQLAlchemy uses for DateTime columns on SQLite
+SQLITE_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+
+def _encode_blob(value):
+    """JSON form of BLOB columns (e.g. statistics sketches) in incremental backups."""
+    if isinstance(value, bytes):
+        return {"$base64": base64.b64encode(value).decode("ascii")}
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+class SnapshotTimeout(Exception):
+    """Raised to abandon a stepped snapshot that keeps restarting."""
+
+
+class VolumeWriter:
+    """Write-only file object that splits its output into fixed-size volumes.
+    
+    Volumes are named ``<base>.001``, ``<base>.002``, ... and each one's size and
+    SHA-256 is recorded as it is closed, along with a checksum of the whole stream.
+    """
+    
+    def __init__(self, base_path: Path, volume_size: int):
+        self.base_path = base_path
+        self.volume_size = volume_size
+        self.volumes: List[Dict[str, Any]] = []
+        self._digest = hashlib.sha256()
+        self._position = 0
+        self._file = None
+        self._file_digest = None
+        self._file_size = 0
+    
+    @property
+    def sha256(self) -> str:
+        """SHA-256 of everything written so far."""
+        return self._digest.hexdigest()
+    
+    def write(self, data: bytes) -> int:
+        """Write data, rolling over to a new volume when the current one is full."""
+        view = memoryview(data)
+        while view:
+            if self._file is None or self._file_size >= self.volume_size:
+                self._roll()
+            
+            chunk = view[:self.volume_size - self._file_size]
+            self._file.write(chunk)
+            self._file_digest.update(chunk)
+            self._digest.update(chunk)
+            self._file_size += len(chunk)
+            self._position += len(chunk)
+            view = view[len(chunk):]
+        return len(data)
+    
+    def tell(self) -> int:
+        return self._position
+    
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+    
+    def close(self):
+        """Close the current volume."""
+        self._close_volume()
+    
+    def _roll(self):
+        """Close the current volume and open the next one."""
+        self._close_volume()
+        path = Path(f"{self.base_path}.{len(self.volumes) + 1:03d}")
+        self._file = open(path, "wb")
+        self._file_digest = hashlib.sha256()
+        self._file_size = 0
+        self.volumes.append({"name": path.name})
+    
+    def _close_volume(self):
+        if self._file is None:
+            return
+        self._file.close()
+        self.volumes[-1].update(size=self._file_size, sha256=self._file_digest.hexdigest())
+        self._file = None
+
+
+class BackupService:
+    """Service for creating consistent database backups without blocking the bot."""
+    
+    def __init__(self, backup_dir: str = "backups"):
+        self.backup_dir = Path(backup_dir)
+    
+    @property
+    def db_path(self) -> Path:
+        """Path of the SQLite database file."""
+        return Path(make_url(settings.DB_URL).database)
+    
+    async def create_backup_async(self) -> Optional[Dict[str, Any]]:
+        """Create a backup in a worker thread so the event loop keeps running."""
+        return await asyncio.to_thread(self.create_backup)
+    
+    def create_backup(self) -> Optional[Dict[str, Any]]:
+        """Create a zipped snapshot of the database, split into checksummed volumes.
+        
+        Volumes are at most BACKUP_VOLUME_SIZE_MB each, so every one fits the Bot
+        API upload limit. A backup that fits in one volume is a plain .zip file.
+        
+        Returns:
+            {"manifest_path": str, "manifest": dict} or None on failure
+        """
+        snapshot_path = None
+        try:
+            self.backup_dir.mkdir(exist_ok=True)
+            
+            timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+            name = f"backup-{timestamp}"
+            snapshot_path = self.backup_dir / f".snapshot-{timestamp}.db"
+            
+            # Taken before the copy starts, so rows changed during it are exported again
+            started_at = datetime.utcnow()
+            self._snapshot(snapshot_path)
+            watermarks = self._read_watermarks(snapshot_path, started_at)
+            
+            writer = VolumeWriter(self.backup_dir / f"{name}.zip", int(settings.BACKUP_VOLUME_SIZE_MB * 1024 * 1024))
+            try:
+                database_sha256 = self._compress(snapshot_path, writer)
+            finally:
+                writer.close()
+            
+            if len(writer.volumes) == 1:
+                single = writer.volumes[0]
+                (self.backup_dir / single["name"]).rename(self.backup_dir / f"{name}.zip")
+                single["name"] = f"{name}.zip"
+            
+            manifest = {
+                "name": name,
+                "type": "full",
+                "created_at": datetime.utcnow().isoformat(),
+                "database_sha256": database_sha256,
+                "size": writer.tell(),
+                "sha256": writer.sha256,
+                "volumes": writer.volumes,
+                "watermarks": watermarks,
+            }
+            manifest_path = self.backup_dir / f"{name}.manifest.json"
+            manifest_path.write_text(json.dumps(manifest, indent=2))
+            
+            logger.info(f"Backup created: {name} ({manifest['size']} bytes in {len(writer.volumes)} volumes)")
+            return {"manifest_path": str(manifest_path), "manifest": manifest}
+        
+        except Exception as e:
+            logger.error(f"Error creating backup: {e}")
+            return None
+        finally:
+            if snapshot_path and snapshot_path.exists():
+                snapshot_path.unlink()
+    
+    async def create_incremental_backup_async(self) -> Optional[Dict[str, Any]]:
+        """Create an incremental backup in a worker thread."""
+        return await asyncio.to_thread(self.create_incremental_backup)
+    
+    def create_incremental_backup(self) -> Optional[Dict[str, Any]]:
+        """Export rows added or changed since the newest backup as gzipped JSONL.
+        
+        Each incremental records its parent and the full backup anchoring the
+        chain; restoring applies the base and then every incremental in order.
+        Falls back to a full backup when there is no chain to extend yet.
+        
+        Returns:
+            {"manifest_path": str, "manifest": dict} or None on failure
+        """
+        parent = self.get_latest_manifest()
+        if not parent or "watermarks" not in parent:
+            return self.create_backup()
+        
+        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        name = f"backup-{timestamp}"
+        snapshot_path = self.backup_dir / f".snapshot-{timestamp}.db"
+        conn = None
+        try:
+            self.backup_dir.mkdir(exist_ok=True)
+            started_at = datetime.utcnow()
+            
+            conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+            conn.execute(f"PRAGMA busy_timeout = {settings.DB_BUSY_TIMEOUT_MS}")
+            if conn.execute("PRAGMA journal_mode").fetchone()[0].lower() != "wal":
+                # Outside WAL mode a long read transaction blocks writers, so export from a copy
+                conn.close()
+                self._snapshot(snapshot_path)
+                conn = sqlite3.connect(snapshot_path)
+            # One read transaction, so every table is exported from the same state
+            conn.execute("BEGIN")
+            existing = self._existing_tables(conn)
+            
+            files = []
+            watermarks = {}
+            for table, changed_columns in INCREMENTAL_TABLES.items():
+                if table not in existing:
+                    continue
+                
+                previous = parent["watermarks"].get(table, {"id": 0, "time": None})
+                sql, params = self._changed_rows_query(table, changed_columns, previous)
+                files += self._export_rows(conn, name, table, "upsert", sql, params)
+                watermarks[table] = self._table_watermark(conn, table, started_at)
+            
+            for table in FULL_COPY_TABLES:
+                if table in existing:
+                    files += self._export_rows(conn, name, table, "replace", f"SELECT * FROM {table}", [])
+            
+            conn.rollback()
+            
+            manifest = {
+                "name": name,
+                "type": "incremental",
+                "base": parent["name"] if parent["type"] == "full" else parent["base"],
+                "parent": parent["name"],
+                "created_at": datetime.utcnow().isoformat(),
+                "files": files,
+                "watermarks": watermarks,
+            }
+            manifest_path = self.backup_dir / f"{name}.manifest.json"
+            manifest_path.write_text(json.dumps(manifest, indent=2))
+            
+            rows = sum(f["rows"] for f in files)
+            logger.info(f"Incremental backup created: {name} ({rows} rows in {len(files)} files)")
+            return {"manifest_path": str(manifest_path), "manifest": manifest}
+        
+        except Exception as e:
+            logger.error(f"Error creating incremental backup: {e}")
+            for path in self.backup_dir.glob(f"{name}.*"):
+                path.unlink()
+            return None
+        finally:
+            if conn is not None:
+                conn.close()
+            snapshot_path.unlink(missing_ok=True)
+    
+    def get_latest_manifest(self, backup_type: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Newest backup manifest, optionally only of the given type ("full" or "incremental")."""
+        for path in sorted(self.backup_dir.glob("backup-*.manifest.json"), reverse=True):
+            try:
+                manifest = json.loads(path.read_text())
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping unreadable manifest {path.name}: {e}")
+                continue
+            if backup_type is None or manifest.get("type") == backup_type:
+                return manifest
+        return None
+    
+    def needs_full_backup(self) -> bool:
+        """Whether the incremental chain is missing or its base is too old."""
+        base = self.get_latest_manifest("full")
+        if not base:
+            return True
+        age = datetime.utcnow() - datetime.fromisoformat(base["created_at"])
+        return age.total_seconds() >= settings.BACKUP_FULL_INTERVAL_HOURS * 3600
+    
+    async def upload_backup(self, bot: Bot, chat_id: int, manifest_path: str) -> bool:
+        """Send backup volumes and the manifest to a chat, one after another.
+        
+        Progress is saved after every volume, so calling this again after a
+        failure resumes with the first volume that wasn't delivered.
+        """
+        manifest_path = Path(manifest_path)
+        manifest = json.loads(manifest_path.read_text())
+        progress_path = self.backup_dir / f"{manifest['name']}.upload.json"
+        
+        progress = {"chat_id": chat_id, "uploaded": []}
+        if progress_path.exists():
+            saved = json.loads(progress_path.read_text())
+            if saved.get("chat_id") == chat_id:
+                progress = saved
+        
+        files = [volume["name"] for volume in manifest["volumes"]] + [manifest_path.name]
+        total = len(manifest["volumes"])
+        
+        for index, file_name in enumerate(files, start=1):
+            if file_name in progress["uploaded"]:
+                continue
+            
+            caption = f"🗄 {manifest['name']} ({index}/{total})" if index <= total else f"🗄 {manifest['name']} manifest"
+            if not await send_document_file(bot, chat_id, self.backup_dir / file_name, caption):
+                logger.error(f"Backup upload of {file_name} failed; {len(progress['uploaded'])} files sent")
+                return False
+            
+            progress["uploaded"].append(file_name)
+            progress_path.write_text(json.dumps(progress))
+        
+        progress_path.unlink(missing_ok=True)
+        logger.info(f"Backup {manifest['name']} uploaded to {chat_id}")
+        return True
+    
+    def cleanup_old_backups(self, keep: int) -> int:
+        """Delete all but the newest `keep` full backups and their incrementals.
+        
+        Incrementals are only removed together with the full backup they build
+        on, so every kept backup can still be restored. Returns number deleted.
+        """
+        backups: Dict[str, List[Path]] = {}
+        for path in self.backup_dir.glob("backup-*"):
+            backups.setdefault(path.name.split(".")[0], []).append(path)
+        
+        bases = {}
+        for name in backups:
+            manifest_path = self.backup_dir / f"{name}.manifest.json"
+            try:
+                manifest = json.loads(manifest_path.read_text())
+                bases[name] = manifest.get("base", name)
+            except (OSError, ValueError):
+                bases[name] = name
+        
+        kept = set(sorted({base for name, base in bases.items() if base == name}, reverse=True)[:keep])
+        
+        deleted = 0
+        for name in sorted(backups, reverse=True):
+            if bases[name] in kept:
+                continue
+            try:
+                for path in backups[name]:
+                    path.unlink()
+                deleted += 1
+            except OSError as e:
+                logger.warning(f"Failed to delete old backup {name}: {e}")
+        
+        if deleted:
+            logger.info(f"Deleted {deleted} old backups")
+        return deleted
+    
+    def _snapshot(self, snapshot_path: Path):
+        """Copy the live database with the SQLite online backup API.
+        
+        In WAL mode the copy is taken in one step: it reads a single consistent
+        state while writers keep appending to the WAL. Otherwise pages are copied
+        in small steps with a pause in between, so writers only ever wait for one
+        step; since every write from another connection restarts a stepped copy,
+        it is abandoned after BACKUP_STEP_TIMEOUT seconds for a single-step copy.
+        """
+        source = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+        try:
+            source.execute(f"PRAGMA busy_timeout = {settings.DB_BUSY_TIMEOUT_MS}")
+            journal_mode = source.execute("PRAGMA journal_mode").fetchone()[0]
+            if journal_mode.lower() != "wal":
+                deadline = time.monotonic() + settings.BACKUP_STEP_TIMEOUT
+                
+                def check_deadline(status, remaining, total):
+                    if time.monotonic() > deadline:
+                        raise SnapshotTimeout()
+                
+                try:
+                    self._copy_database(source, snapshot_path, settings.BACKUP_PAGES_PER_STEP, check_deadline)
+                    return
+                except SnapshotTimeout:
+                    logger.warning(
+                        f"Stepped snapshot did not finish in {settings.BACKUP_STEP_TIMEOUT}s, "
+                        f"taking a single-step copy"
+                    )
+            self._copy_database(source, snapshot_path, -1)
+        finally:
+            source.close()
+    
+    @staticmethod
+    def _copy_database(source: sqlite3.Connection, snapshot_path: Path, pages: int, progress=None):
+        snapshot_path.unlink(missing_ok=True)
+        target = sqlite3.connect(snapshot_path)
+        try:
+            source.backup(target, pages=pages, progress=progress, sleep=settings.BACKUP_STEP_SLEEP)
+        finally:
+            target.close()
+    
+    def _read_watermarks(self, snapshot_path: Path, started_at: datetime) -> Dict[str, Dict[str, Any]]:
+        """Watermarks of the incremental tables in a snapshot."""
+        conn = sqlite3.connect(snapshot_path)
+        try:
+            existing = self._existing_tables(conn)
+            return {
+                table: self._table_watermark(conn, table, started_at)
+                for table in INCREMENTAL_TABLES
+                if table in existing
+            }
+        finally:
+            conn.close()
+    
+    @staticmethod
+    def _existing_tables(conn: sqlite3.Connection) -> set:
+        rows = conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()
+        return {row[0] for row in rows}
+    
+    @staticmethod
+    def _changed_rows_query(table: str, changed_columns: List[str], previous: Dict[str, Any]):
+        """Rows past the previous watermark's id or changed since its time, as (sql, params).
+        
+        Each condition gets its own SELECT, combined with UNION, so every one is
+        answered from its column's index; an OR of them would scan the table.
+        """
+        selects = [f"SELECT id FROM {table} WHERE id > ?"]
+        params = [previous["id"]]
+        if previous["time"]:
+            for column in changed_columns:
+                selects.append(f"SELECT id FROM {table} WHERE {column} >= ?")
+                params.append(previous["time"])
+        return f"SELECT * FROM {table} WHERE id IN ({' UNION '.join(selects)}) ORDER BY id", params
+    
+    @staticmethod
+    def _table_watermark(conn: sqlite3.Connection, table: str, started_at: datetime) -> Dict[str, Any]:
+        max_id = conn.execute(f"SELECT coalesce(max(id), 0) FROM {table}").fetchone()[0]
+        return {"id": max_id, "time": started_at.strftime(SQLITE_DATETIME_FORMAT)}
+    
+    def _export_rows(
+        self,
+        conn: sqlite3.Connection,
+        name: str,
+        table: str,
+        mode: str,
+        sql: str,
+        params: List[Any]
+    ) -> List[Dict[str, Any]]:
+        """Stream query results into gzipped JSONL chunks of BACKUP_CHUNK_ROWS rows.
+        
+        Returns the chunk entries for the manifest. Nothing is written for an
+        empty "upsert" export, but an empty "replace" export still gets a chunk
+        so restore knows to clear the table.
+        """
+        cursor = conn.execute(sql, params)
+        columns = [column[0] for column in cursor.description]
+        
+        files = []
+        rows = cursor.fetchmany(settings.BACKUP_CHUNK_ROWS)
+        while rows or (mode == "replace" and not files):
+            path = self.backup_dir / f"{name}.{table}.{len(files) + 1:03d}.jsonl.gz"
+            with gzip.open(path, "wt", encoding="utf-8") as f:
+                for row in rows:
+                    f.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=_encode_blob) + "\n")
+            
+            files.append({
+                "name": path.name,
+                "table": table,
+                "mode": mode,
+                "rows": len(rows),
+                "sha256": file_sha256(path),
+            })
+            rows = cursor.fetchmany(settings.BACKUP_CHUNK_ROWS)
+        return files
+    
+    def _compress(self, snapshot_path: Path, output) -> str:
+        """Stream the snapshot into a zip archive. Returns the snapshot's SHA-256."""
+        digest = hashlib.sha256()
+        with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as zipf:
+            with open(snapshot_path, "rb") as src, zipf.open("app.db", "w", force_zip64=True) as dst:
+                for chunk in iter(lambda: src.read(CHUNK_SIZE), b""):
+                    digest.update(chunk)
+                    dst.write(chunk)
+        return digest.hexdigest()
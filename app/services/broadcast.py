@@ -1,108 +1,427 @@
-"""Broadcast service for sending messages to all users."""
+"""Broadcast service for sending messages to all users as resumable jobs."""
 import asyncio
 import logging
-from typing import Dict, Any
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Awaitable, Callable, Dict, Any, List, Optional, Tuple
 from aiogram import Bot
-from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
-from sqlalchemy.orm import Session
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError, TelegramRetryAfter
 
+from app.config import settings
 from app.models.base import get_db
+from app.repo.broadcast import BroadcastRepository
 from app.repo.user import UserRepository
+from app.utils.helpers import get_unreachable_reason
+from app.utils.metrics import BROADCAST_MESSAGES, BROADCAST_PROGRESS, TELEGRAM_RETRIES
 
 logger = logging.getLogger(__name__)
 
+# Users fetched from the database per audience query
+AUDIENCE_BATCH_SIZE = 1000
+
+# Users sent to between progress checkpoints
+CHECKPOINT_BATCH_SIZE = 100
+
+# Seconds after which a batch is checkpointed early, e.g. while flood control slows it down
+CHECKPOINT_INTERVAL = 5.0
+
+
+class AdaptiveRateController:
+    """Paces sends with an additive-increase/multiplicative-decrease rate.
+    
+    Every successful send raises the rate so it grows by about ``increase``
+    messages per second each second; a flood-control error cuts it by
+    ``decrease`` and holds all sends for the server's retry_after.
+    """
+    
+    def __init__(self, initial_rate: float, min_rate: float, max_rate: float,
+                 increase: float = 1.0, decrease: float = 0.5, window: float = 10.0):
+        self.rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.window = window
+        self.flood_waits = 0
+        self._next_send = 0.0
+        self._paused_until = 0.0
+        self._completed = deque()
+        self._started = time.monotonic()
+    
+    @property
+    def throughput(self) -> float:
+        """Successful sends per second over the last window (or since start, if shorter)."""
+        now = time.monotonic()
+        self._sweep(now)
+        return len(self._completed) / max(min(self.window, now - self._started), 1.0)
+    
+    async def acquire(self, stop_event: Optional[asyncio.Event] = None):
+        """Wait for the next send slot, or until stop_event is set."""
+        now = time.monotonic()
+        slot = max(now, self._next_send, self._paused_until)
+        self._next_send = slot + 1 / self.rate
+        if slot <= now:
+            return
+        if stop_event is None:
+            await asyncio.sleep(slot - now)
+            return
+        try:
+            await asyncio.wait_for(stop_event.wait(), timeout=slot - now)
+        except asyncio.TimeoutError:
+            pass
+    
+    def on_success(self):
+        now = time.monotonic()
+        self._completed.append(now)
+        self._sweep(now)
+        self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+    
+    def on_retry_after(self, retry_after: float):
+        """Back off after flood control; concurrent errors for one wait back off once."""
+        now = time.monotonic()
+        self.flood_waits += 1
+        if now >= self._paused_until:
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            logger.warning(f"Broadcast flood control: waiting {retry_after}s, rate now {self.rate:.1f}/s")
+        self._paused_until = max(self._paused_until, now + retry_after)
+    
+    def _sweep(self, now: float):
+        while self._completed and self._completed[0] <= now - self.window:
+            self._completed.popleft()
+
 
 class BroadcastService:
     """Service for broadcasting messages to users."""
     
+    # Rate controllers of jobs running in this process, by job ID
+    controllers: Dict[int, AdaptiveRateController] = {}
+    
     def __init__(self, bot: Bot):
         self.bot = bot
     
-    def get_user_count(self) -> int:
-        """Get total user count for broadcast preview."""
+    def get_user_count(self, active_days: Optional[int] = None, bundle_id: Optional[int] = None) -> int:
+        """Get count of reachable users in a broadcast audience for the preview.
+        
+        Args:
+            active_days: only users seen in the last N days
+            bundle_id: only users who downloaded this bundle
+        """
         db = next(get_db())
         try:
             user_repo = UserRepository(db)
-            return user_repo.get_user_count()
+            return user_repo.count_audience(
+                active_since=self._active_since(datetime.utcnow(), active_days),
+                bundle_id=bundle_id
+            )
         except Exception as e:
             logger.error(f"Error getting user count: {e}")
             return 0
         finally:
             db.close()
     
-    async def send_broadcast(self, from_chat_id: int, message_id: int) -> Dict[str, int]:
-        """Send broadcast message to all users.
+    async def iter_audience(self, after_id: int = 0, active_since: Optional[datetime] = None,
+                            bundle_id: Optional[int] = None) -> AsyncIterator[List[Tuple[int, int]]]:
+        """Yield the broadcast audience as batches of (users.id, tg_user_id) pairs.
+        
+        Users are read with a keyset cursor on users.id, using a short-lived
+        session per batch, so memory stays flat and no read transaction is held
+        open while messages are being sent.
+        """
+        while True:
+            db = next(get_db())
+            try:
+                rows = UserRepository(db).get_user_id_batch(
+                    after_id,
+                    AUDIENCE_BATCH_SIZE,
+                    active_since=active_since,
+                    bundle_id=bundle_id
+                )
+            finally:
+                db.close()
+            
+            if not rows:
+                return
+            
+            after_id = rows[-1][0]
+            yield rows
+    
+    def create_job(self, created_by: int, from_chat_id: int, message_id: int,
+                   active_days: Optional[int] = None, bundle_id: Optional[int] = None) -> int:
+        """Queue a broadcast for the background worker. Returns the job ID.
+        
+        active_days and bundle_id narrow the audience as in get_user_count.
+        """
+        db = next(get_db())
+        try:
+            total = UserRepository(db).count_audience(
+                active_since=self._active_since(datetime.utcnow(), active_days),
+                bundle_id=bundle_id
+            )
+            job = BroadcastRepository(db).create_job(
+                created_by, from_chat_id, message_id, total,
+                active_days=active_days,
+                bundle_id=bundle_id
+            )
+            logger.info(f"Broadcast job {job.id} queued for {total} users")
+            return job.id
+        finally:
+            db.close()
+    
+    def get_job_info(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """Get a broadcast job's status and counters."""
+        db = next(get_db())
+        try:
+            job = BroadcastRepository(db).get_job(job_id)
+            return self._job_to_dict(job) if job else None
+        finally:
+            db.close()
+    
+    def get_active_jobs(self) -> List[Dict[str, Any]]:
+        """Get broadcast jobs that haven't completed or been cancelled."""
+        db = next(get_db())
+        try:
+            return [self._job_to_dict(job) for job in BroadcastRepository(db).get_active_jobs()]
+        finally:
+            db.close()
+    
+    def set_status_message(self, job_id: int, chat_id: int, message_id: int):
+        """Remember the admin message that shows a job's status."""
+        db = next(get_db())
+        try:
+            BroadcastRepository(db).set_status_message(job_id, chat_id, message_id)
+        finally:
+            db.close()
+    
+    def pause_job(self, job_id: int) -> bool:
+        """Pause a job; the worker stops after its current batch."""
+        return self._set_status(job_id, "paused", ("pending", "running"))
+    
+    def resume_job(self, job_id: int) -> bool:
+        """Queue a paused job again; it continues from its checkpoint."""
+        return self._set_status(job_id, "pending", ("paused",))
+    
+    def cancel_job(self, job_id: int) -> bool:
+        """Cancel a job that hasn't finished."""
+        return self._set_status(job_id, "cancelled", ("pending", "running", "paused"))
+    
+    def get_next_job_id(self) -> Optional[int]:
+        """ID of the next job the worker should run, if any."""
+        db = next(get_db())
+        try:
+            job = BroadcastRepository(db).get_next_job()
+            return job.id if job else None
+        finally:
+            db.close()
+    
+    async def run_job(self, job_id: int, stop_event: Optional[asyncio.Event] = None,
+                      on_progress: Optional[Callable[[int], Awaitable[None]]] = None) -> Optional[Dict[str, Any]]:
+        """Send a broadcast job from its checkpoint until it finishes or is stopped.
+        
+        Progress is saved after every CHECKPOINT_BATCH_SIZE users or
+        CHECKPOINT_INTERVAL seconds, whichever comes first, and on_progress(job_id)
+        is awaited after each checkpoint. The job stops when it's paused or
+        cancelled from the admin panel, or when stop_event is set: no new send
+        starts then, and the sends already started are awaited and checkpointed,
+        so the job stays "running" and resumes on the next start without sending
+        anyone the message twice.
         
         Returns:
-            {"success": int, "failed": int}
+            The job's info after it stopped, or None if it couldn't be started
         """
         db = next(get_db())
         try:
-            user_repo = UserRepository(db)
-            users = user_repo.get_all_users()
-            
-            success_count = 0
-            failed_count = 0
-            
-            logger.info(f"Starting broadcast to {len(users)} users")
-            
-            # Send messages in batches to avoid rate limits
-            batch_size = 30
-            delay_between_batches = 1  # seconds
-            
-            for i in range(0, len(users), batch_size):
-                batch = users[i:i + batch_size]
-                
-                # Process batch
-                tasks = []
-                for user in batch:
-                    task = self._send_broadcast_message(user.tg_user_id, from_chat_id, message_id)
-                    tasks.append(task)
-                
-                # Wait for batch to complete
-                results = await asyncio.gather(*tasks, return_exceptions=True)
-                
-                # Count results
-                for result in results:
-                    if isinstance(result, Exception):
-                        failed_count += 1
-                    elif result:
-                        success_count += 1
-                    else:
-                        failed_count += 1
-                
-                # Delay between batches
-                if i + batch_size < len(users):
-                    await asyncio.sleep(delay_between_batches)
+            repo = BroadcastRepository(db)
+            if not repo.set_status(job_id, "running", ("pending", "running")):
+                return None
+            job = repo.get_job(job_id)
+            from_chat_id, message_id = job.from_chat_id, job.message_id
+            cursor, success_count, failed_count = job.cursor, job.sent, job.failed
+            # Fixed at creation, so a resumed job keeps the same audience
+            active_since = self._active_since(job.created_at, job.active_days)
+            bundle_id = job.bundle_id
+            total = job.total
+        finally:
+            db.close()
+        
+        logger.info(f"Running broadcast job {job_id} from user #{cursor} ({success_count + failed_count} done)")
+        
+        controller = AdaptiveRateController(
+            initial_rate=settings.BROADCAST_INITIAL_RATE,
+            min_rate=settings.BROADCAST_MIN_RATE,
+            max_rate=settings.BROADCAST_MAX_RATE
+        )
+        self.controllers[job_id] = controller
+        self._report_progress(job_id, total, success_count, failed_count)
+        
+        try:
+            async for rows in self.iter_audience(cursor, active_since, bundle_id):
+                index = 0
+                while index < len(rows):
+                    # Start each send in its own slot, then wait for the batch before checkpointing
+                    tasks = []
+                    unreachable: Dict[str, List[int]] = {}
+                    batch_start = index
+                    batch_started = time.monotonic()
+                    stopping = False
+                    while index < len(rows) and len(tasks) < CHECKPOINT_BATCH_SIZE:
+                        if tasks and time.monotonic() - batch_started >= CHECKPOINT_INTERVAL:
+                            break
+                        await controller.acquire(stop_event)
+                        if stop_event is not None and stop_event.is_set():
+                            stopping = True
+                            break
+                        tasks.append(asyncio.create_task(
+                            self._send_broadcast_message(
+                                rows[index][1], from_chat_id, message_id, controller, unreachable,
+                                source_ok=success_count > 0, stop_event=stop_event
+                            )
+                        ))
+                        index += 1
+                    
+                    status = "running"
+                    if tasks:
+                        results = await asyncio.gather(*tasks, return_exceptions=True)
+                        
+                        # A send interrupted in a flood wait by stop_event returns None and
+                        # wasn't delivered: checkpoint only the users before it
+                        if None in results:
+                            stopping = True
+                            results = results[:results.index(None)]
+                            index = batch_start + len(results)
+                        
+                        # Count results
+                        for result in results:
+                            if result is True:
+                                success_count += 1
+                                BROADCAST_MESSAGES.inc("sent")
+                            else:
+                                failed_count += 1
+                                BROADCAST_MESSAGES.inc("failed")
+                        self._report_progress(job_id, total, success_count, failed_count)
+                        
+                        self._mark_unreachable(unreachable)
+                        if results:
+                            cursor = rows[index - 1][0]
+                            status = self._save_progress(job_id, cursor, success_count, failed_count)
+                    
+                    if stopping:
+                        logger.info(f"Broadcast job {job_id} interrupted at user #{cursor}")
+                        return self.get_job_info(job_id)
+                    if status != "running":
+                        logger.info(f"Broadcast job {job_id} {status} at user #{cursor}")
+                        return self.get_job_info(job_id)
+                    
+                    if on_progress is not None:
+                        await on_progress(job_id)
                 
-                logger.info(f"Broadcast progress: {i + len(batch)}/{len(users)} users processed")
-            
-            logger.info(f"Broadcast completed: {success_count} success, {failed_count} failed")
-            
-            return {
-                "success": success_count,
-                "failed": failed_count
-            }
-            
+                logger.info(
+                    f"Broadcast job {job_id} progress: {success_count + failed_count} users processed, "
+                    f"{controller.throughput:.1f} msg/s (rate {controller.rate:.1f}/s, "
+                    f"{controller.flood_waits} flood waits)"
+                )
+        finally:
+            self.controllers.pop(job_id, None)
+            for counter in ("total", "sent", "failed"):
+                BROADCAST_PROGRESS.remove(str(job_id), counter)
+        
+        self._set_status(job_id, "completed", ("running",))
+        logger.info(f"Broadcast job {job_id} completed: {success_count} success, {failed_count} failed")
+        return self.get_job_info(job_id)
+    
+    @staticmethod
+    def _active_since(reference: datetime, active_days: Optional[int]) -> Optional[datetime]:
+        return reference - timedelta(days=active_days) if active_days else None
+    
+    def _set_status(self, job_id: int, status: str, from_statuses: tuple) -> bool:
+        db = next(get_db())
+        try:
+            return BroadcastRepository(db).set_status(job_id, status, from_statuses)
+        finally:
+            db.close()
+    
+    def _mark_unreachable(self, unreachable: Dict[str, List[int]]):
+        """Record users who blocked the bot or can't be messaged, so later broadcasts skip them."""
+        if not unreachable:
+            return
+        db = next(get_db())
+        try:
+            user_repo = UserRepository(db)
+            for reason, tg_user_ids in unreachable.items():
+                user_repo.mark_unreachable(tg_user_ids, reason)
         except Exception as e:
-            logger.error(f"Error during broadcast: {e}")
-            return {"success": 0, "failed": 0}
+            logger.error(f"Error marking unreachable users: {e}")
         finally:
             db.close()
     
-    async def _send_broadcast_message(self, user_id: int, from_chat_id: int, message_id: int) -> bool:
-        """Send broadcast message to a single user."""
+    @staticmethod
+    def _report_progress(job_id: int, total: int, sent: int, failed: int):
+        for counter, value in (("total", total), ("sent", sent), ("failed", failed)):
+            BROADCAST_PROGRESS.set(value, str(job_id), counter)
+    
+    def _save_progress(self, job_id: int, cursor: int, sent: int, failed: int) -> Optional[str]:
+        db = next(get_db())
         try:
-            await self.bot.copy_message(
-                chat_id=user_id,
-                from_chat_id=from_chat_id,
-                message_id=message_id
-            )
-            return True
+            return BroadcastRepository(db).save_progress(job_id, cursor, sent, failed)
+        finally:
+            db.close()
+    
+    @classmethod
+    def _job_to_dict(cls, job) -> Dict[str, Any]:
+        controller = cls.controllers.get(job.id)
+        remaining = max(job.total - job.sent - job.failed, 0)
+        throughput = controller.throughput if controller else None
+        return {
+            "id": job.id,
+            "status": job.status,
+            "total": job.total,
+            "sent": job.sent,
+            "failed": job.failed,
+            "status_chat_id": job.status_chat_id,
+            "status_message_id": job.status_message_id,
+            "created_at": job.created_at,
+            "remaining": remaining,
+            "rate": controller.rate if controller else None,
+            "throughput": throughput,
+            "eta_seconds": remaining / throughput if throughput else None,
+        }
+    
+    async def _send_broadcast_message(self, user_id: int, from_chat_id: int, message_id: int,
+                                      controller: AdaptiveRateController,
+                                      unreachable: Dict[str, List[int]], source_ok: bool = False,
+                                      stop_event: Optional[asyncio.Event] = None) -> Optional[bool]:
+        """Send broadcast message to a single user, waiting out flood control.
+        
+        Users who can't receive messages are added to unreachable by reason.
+        source_ok means the message was already copied to someone, so a
+        "chat not found" is about the user rather than the source chat.
+        Returns None, without sending, if stop_event is set during a flood wait.
+        """
+        for attempt in range(1, settings.MAX_RETRIES + 1):
+            try:
+                await self.bot.copy_message(
+                    chat_id=user_id,
+                    from_chat_id=from_chat_id,
+                    message_id=message_id
+                )
+                controller.on_success()
+                return True
             
-        except (TelegramBadRequest, TelegramForbiddenError) as e:
-            logger.debug(f"Failed to send broadcast to user {user_id}: {e}")
-            return False
-        except Exception as e:
-            logger.warning(f"Unexpected error sending broadcast to user {user_id}: {e}")
-            return False
+            except TelegramRetryAfter as e:
+                TELEGRAM_RETRIES.inc("copyMessage")
+                controller.on_retry_after(e.retry_after)
+                await controller.acquire(stop_event)
+                if stop_event is not None and stop_event.is_set():
+                    return None
+            except (TelegramBadRequest, TelegramForbiddenError) as e:
+                logger.debug(f"Failed to send broadcast to user {user_id}: {e}")
+                reason = get_unreachable_reason(e, user_id, source_ok)
+                if reason:
+                    unreachable.setdefault(reason, []).append(user_id)
+                return False
+            except Exception as e:
+                logger.warning(f"Unexpected error sending broadcast to user {user_id}: {e}")
+                return False
+        
+        logger.warning(f"Gave up sending broadcast to user {user_id} after {settings.MAX_RETRIES} flood waits")
+        return False
@@ -1,14 +1,18 @@
 """Deletion service for auto-deleting delivered messages."""
 import logging
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 from aiogram import Bot
 from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
 from sqlalchemy.orm import Session
 
 from app.models.base import get_db
+from app.repo.bundle import BundleRepository
 from app.repo.delivery import DeliveryRepository
+from app.repo.user import UserRepository
 from app.services.delivery import DeliveryService
+from app.utils.helpers import get_unreachable_reason
+from app.utils.metrics import DELETION_BACKLOG, DELETION_LAG
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +27,9 @@ class DeletionService:
     async def process_pending_deletions(self):
         """Process all pending message deletions."""
         db = next(get_db())
+        # Deliveries are only read here; without this, each per-delivery
+        # commit would make every remaining delivery reload on next access
+        db.expire_on_commit = False
         try:
             delivery_repo = DeliveryRepository(db)
             
@@ -30,17 +37,20 @@ class DeletionService:
             deliveries = delivery_repo.get_deliveries_to_delete()
             
             logger.info(f"Processing {len(deliveries)} pending deletions")
+            DELETION_BACKLOG.set(len(deliveries))
+            
+            # Bundle codes for the re-download links, fetched in one query
+            bundles = BundleRepository(db).get_bundles_by_ids(list({d.bundle_id for d in deliveries}))
             
             for delivery in deliveries:
-                await self._delete_delivery_messages(delivery, delivery_repo)
+                reason = await self._delete_delivery_messages(delivery, delivery_repo)
+                if reason:
+                    UserRepository(db).mark_unreachable([delivery.user_id], reason)
+                    continue
                 
                 # Send ending message after deletion
                 try:
-                    # Get bundle code for re-download link
-                    from app.repo.bundle import BundleRepository
-                    bundle_repo = BundleRepository(db)
-                    bundle = bundle_repo.get_bundle_by_id(delivery.bundle_id)
-                    
+                    bundle = bundles.get(delivery.bundle_id)
                     if bundle:
                         await self.delivery_service.send_ending_message(
                             delivery.user_id, 
@@ -48,14 +58,19 @@ class DeletionService:
                         )
                 except Exception as e:
                     logger.error(f"Failed to send ending message for delivery {delivery.id}: {e}")
-            
+        
         except Exception as e:
             logger.error(f"Error processing pending deletions: {e}")
         finally:
             db.close()
     
-    async def _delete_delivery_messages(self, delivery, delivery_repo: DeliveryRepository):
-        """Delete messages for a single delivery."""
+    async def _delete_delivery_messages(self, delivery, delivery_repo: DeliveryRepository) -> Optional[str]:
+        """Delete messages for a single delivery.
+        
+        Returns the reason the user can't be reached (e.g. "blocked"), if an
+        error showed it, so no ending message is sent to them.
+        """
+        unreachable_reason = None
         try:
             messages_json = delivery.messages_json
             deleted_count = 0
@@ -68,17 +83,21 @@ class DeletionService:
                         message_id=msg_info["message_id"]
                     )
                     deleted_count += 1
-                    
+                
                 except (TelegramBadRequest, TelegramForbiddenError) as e:
                     logger.warning(f"Failed to delete message {msg_info['message_id']}: {e}")
+                    unreachable_reason = unreachable_reason or get_unreachable_reason(e, delivery.user_id)
                     failed_count += 1
                     continue
             
             # Mark delivery as deleted
             delivery_repo.mark_delivery_deleted(delivery.id)
+            DELETION_LAG.observe(max(0.0, (datetime.utcnow() - delivery.delete_at).total_seconds()))
             
             logger.info(f"Delivery {delivery.id}: deleted {deleted_count}, failed {failed_count} messages")
-            
+        
         except Exception as e:
             logger.error(f"Error deleting messages for delivery {delivery.id}: {e}")
             delivery_repo.mark_delivery_failed(delivery.id)
+        
+        return unreachable_reason
@@ -10,7 +10,11 @@ from app.models.base import get_db
 from app.repo.bundle import BundleRepository
 from app.repo.delivery import DeliveryRepository
 from app.repo.message import MessageRepository
+from app.repo.stats import StatsRepository
+from app.repo.user import UserRepository
 from app.config import settings
+from app.utils.helpers import get_unreachable_reason
+from app.utils.metrics import DELIVERIES, ITEMS_COPIED
 
 logger = logging.getLogger(__name__)
 
@@ -39,6 +43,7 @@ class DeliveryService:
                 return False
             
             delivered_messages = []
+            copied_from = set()
             
             # Deliver each item via copyMessage
             for item in items:
@@ -53,16 +58,27 @@ class DeliveryService:
                         "chat_id": user_id,
                         "message_id": result.message_id
                     })
+                    ITEMS_COPIED.inc()
+                    copied_from.add(item.from_chat_id)
                     
                     logger.info(f"Delivered item {item.id} to user {user_id}")
-                    
+                
                 except (TelegramBadRequest, TelegramForbiddenError) as e:
                     logger.error(f"Failed to deliver item {item.id} to user {user_id}: {e}")
+                    reason = get_unreachable_reason(e, user_id, source_ok=item.from_chat_id in copied_from)
+                    if reason:
+                        # The remaining items can't be delivered either
+                        UserRepository(db).mark_unreachable([user_id], reason)
+                        break
                     continue
             
             if not delivered_messages:
+                DELIVERIES.inc("failed")
                 return False
             
+            # Count it in the daily rollup; committed together with the delivery record
+            StatsRepository(db).record_delivery(bundle.id, user_id)
+            
             # Create delivery record with auto-deletion schedule
             delete_at = datetime.utcnow() + timedelta(seconds=settings.AUTO_DELETE_DELAY)
             delivery_repo.create_delivery(
@@ -73,10 +89,12 @@ class DeliveryService:
             )
             
             logger.info(f"Bundle {bundle_code} delivered to user {user_id}, scheduled for deletion at {delete_at}")
+            DELIVERIES.inc("delivered")
             return True
-            
+        
         except Exception as e:
             logger.error(f"Error delivering bundle {bundle_code} to user {user_id}: {e}")
+            DELIVERIES.inc("error")
             return False
         finally:
             db.close()
@@ -123,7 +141,13 @@ class DeliveryService:
             
             logger.info(f"Sent ending message {selected_ending.id} to user {user_id}")
             return True
-            
+        
+        except (TelegramBadRequest, TelegramForbiddenError) as e:
+            logger.warning(f"Failed to send ending message to user {user_id}: {e}")
+            reason = get_unreachable_reason(e, user_id)
+            if reason:
+                UserRepository(db).mark_unreachable([user_id], reason)
+            return False
         except Exception as e:
             logger.error(f"Error sending ending message to user {user_id}: {e}")
             return False
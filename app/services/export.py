@@ -0,0 +1,168 @@
+"""Streaming exports of raw tables for offline analysis."""
+import asyncio
+import csv
+import gzip
+import io
+import json
+import logging
+import shutil
+import tempfile
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from aiogram import Bot
+from sqlalchemy import text
+
+from app.config import settings
+from app.models.base import get_db
+from app.utils.dates import local_day_bounds, local_day_start
+from app.utils.helpers import send_document_file
+
+logger = logging.getLogger(__name__)
+
+# Exportable tables: date column filtered on and the columns written, in order
+EXPORT_TABLES = {
+    "deliveries": {
+        "date_column": "delivered_at",
+        "columns": ["id", "user_id", "bundle_id", "delivered_at", "delete_at", "deleted_at", "status"],
+    },
+    "users": {
+        "date_column": "first_seen",
+        "columns": ["id", "tg_user_id", "first_seen", "last_seen", "reachability", "unreachable_at"],
+    },
+    "requests": {
+        "date_column": "created_at",
+        "columns": ["id", "user_id", "text", "status", "created_at", "closed_at"],
+    },
+}
+
+EXPORT_FORMATS = ("csv", "jsonl")
+
+# Room left in each volume for compressed output the gzip stream hasn't written out yet
+GZIP_BUFFER_MARGIN = 1024 * 1024
+
+
+class GzipVolumeWriter:
+    """Writes text to gzip files of at most about volume_size bytes each.
+    
+    Every volume is a complete gzip file that starts with the header, so each
+    one can be opened on its own. A new volume is started before a line once
+    the current one is within GZIP_BUFFER_MARGIN of the limit.
+    """
+    
+    def __init__(self, base_path: Path, volume_size: int, header: str = ""):
+        self.base_path = base_path
+        self.volume_size = volume_size
+        self.header = header
+        self.files: List[Path] = []
+        self._file = None
+        self._gzip = None
+    
+    def write_line(self, line: str):
+        if self._gzip is None or self._file.tell() >= self.volume_size - GZIP_BUFFER_MARGIN:
+            self._roll()
+        self._gzip.write(line.encode("utf-8"))
+    
+    def close(self):
+        if self._gzip is not None:
+            self._gzip.close()
+            self._file.close()
+            self._gzip = self._file = None
+    
+    def _roll(self):
+        self.close()
+        # deliveries-20260901-20260930.csv.gz -> deliveries-20260901-20260930.part001.csv.gz
+        stem, suffixes = self.base_path.name.split(".", 1)
+        path = self.base_path.with_name(f"{stem}.part{len(self.files) + 1:03d}.{suffixes}")
+        self._file = open(path, "wb")
+        self._gzip = gzip.GzipFile(filename=path.stem, fileobj=self._file, mode="wb")
+        self.files.append(path)
+        if self.header:
+            self._gzip.write(self.header.encode("utf-8"))
+
+
+class ExportService:
+    """Export table rows of a local date range as gzipped CSV or JSONL documents."""
+    
+    async def send_export(self, bot: Bot, chat_id: int, table: str, start: date, end: date,
+                          fmt: str = "csv") -> Optional[int]:
+        """Export rows of local days start..end (inclusive) and send them to a chat.
+        
+        Returns the number of rows exported, or None if sending failed.
+        """
+        export_dir = Path(tempfile.mkdtemp(prefix="export-"))
+        try:
+            # Querying and compression run in a worker thread
+            export = await asyncio.to_thread(self.export, table, start, end, fmt, export_dir)
+            
+            total = len(export["files"])
+            for index, path in enumerate(export["files"], start=1):
+                caption = f"📤 {table} {start} → {end} ({export['rows']} rows)"
+                if total > 1:
+                    caption += f" {index}/{total}"
+                if not await send_document_file(bot, chat_id, path, caption):
+                    return None
+            return export["rows"]
+        finally:
+            shutil.rmtree(export_dir, ignore_errors=True)
+    
+    def export(self, table: str, start: date, end: date, fmt: str, export_dir: Path) -> Dict[str, Any]:
+        """Stream matching rows into gzipped files in export_dir.
+        
+        Rows are fetched through a server-side cursor in EXPORT_CHUNK_ROWS
+        chunks and compressed as they are written, so the result set is
+        never held in memory. Output is split into volumes of at most
+        BACKUP_VOLUME_SIZE_MB, each a complete gzip file (CSV volumes repeat
+        the header row), so every document sent can be opened on its own.
+        
+        Returns:
+            rows: Number of rows exported
+            files: Paths of the written files, in order
+        """
+        if table not in EXPORT_TABLES or fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export: {table} as {fmt}")
+        
+        spec = EXPORT_TABLES[table]
+        date_column = spec["date_column"]
+        columns = spec["columns"]
+        sql = text(
+            f"SELECT {', '.join(columns)} FROM {table} "
+            f"WHERE {date_column} >= :start AND {date_column} < :end ORDER BY {date_column}, id"
+        ).execution_options(stream_results=True)
+        params = {"start": local_day_start(start), "end": local_day_bounds(end)[1]}
+        
+        base_path = export_dir / f"{table}-{start:%Y%m%d}-{end:%Y%m%d}.{fmt}.gz"
+        header = self._csv_line(columns) if fmt == "csv" else ""
+        volumes = GzipVolumeWriter(base_path, int(settings.BACKUP_VOLUME_SIZE_MB * 1024 * 1024), header)
+        rows = 0
+        
+        db = next(get_db())
+        try:
+            result = db.execute(sql, params)
+            for chunk in result.partitions(settings.EXPORT_CHUNK_ROWS):
+                for row in chunk:
+                    if fmt == "csv":
+                        volumes.write_line(self._csv_line(row))
+                    else:
+                        volumes.write_line(json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=str) + "\n")
+                rows += len(chunk)
+            if not volumes.files:
+                # An empty export is still one file, with just the CSV header
+                volumes.write_line("")
+        finally:
+            db.close()
+            volumes.close()
+        
+        files = volumes.files
+        if len(files) == 1:
+            # A single volume keeps the plain name
+            files = [files[0].rename(base_path)]
+        
+        logger.info(f"Exported {rows} {table} rows from {start} to {end} as {fmt} in {len(files)} file(s)")
+        return {"rows": rows, "files": files}
+    
+    @staticmethod
+    def _csv_line(values) -> str:
+        line = io.StringIO()
+        csv.writer(line).writerow(values)
+        return line.getvalue()
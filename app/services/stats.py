@@ -1,15 +1,28 @@
-"""Statistics service for generating analytics."""
+"""Statistics service for generating analytics.
+
+Download figures come from the daily_stats rollup, so each report sums at
+most a few hundred rows however long the delivery history is. Admin
+screens read the reports from StatsCache, which recomputes them in a
+worker thread so they never hold up the event loop.
+"""
+import asyncio
 import logging
-from typing import Dict, Any, Optional
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
 from sqlalchemy.orm import Session
 
 from app.models.base import get_db
 from app.repo.user import UserRepository
 from app.repo.bundle import BundleRepository
-from app.repo.delivery import DeliveryRepository
+from app.repo.stats import StatsRepository
+from app.utils.dates import local_date
 
 logger = logging.getLogger(__name__)
 
+# Leaderboard periods: name -> window in local days (None = all time)
+LEADERBOARD_PERIODS = {"weekly": 7, "monthly": 30, "total": None}
+LEADERBOARD_SIZE = 10
+
 
 class StatsService:
     """Service for generating statistics and analytics."""
@@ -31,33 +44,31 @@ class StatsService:
         try:
             user_repo = UserRepository(db)
             bundle_repo = BundleRepository(db)
-            delivery_repo = DeliveryRepository(db)
+            stats_repo = StatsRepository(db)
             
             # Get totals
-            total_downloads = delivery_repo.get_delivery_count()
+            total_downloads = stats_repo.get_totals()["downloads"]
+            unique_downloaders = stats_repo.get_unique_users()
             total_users = user_repo.get_user_count()
             total_bundles = bundle_repo.get_bundle_count()
             
             # Get top bundle
-            top_bundle_info = bundle_repo.get_top_bundle_by_downloads()
-            top_bundle_text = "هیچ دانلودی وجود ندارد"
-            
-            if top_bundle_info:
-                bundle, count = top_bundle_info
-                top_bundle_text = f"{bundle.public_number_str} - {bundle.title} ({count} دانلود)"
+            top_bundle_text = self._top_bundle_text(db, stats_repo.get_top_bundles(limit=1))
             
             return {
                 "downloads": total_downloads,
+                "unique_downloaders": unique_downloaders,
                 "total_users": total_users,
                 "total_bundles": total_bundles,
                 "top_bundle": top_bundle_text,
                 "period": "total"
             }
-            
+        
         except Exception as e:
             logger.error(f"Error getting total stats: {e}")
             return {
                 "downloads": 0,
+                "unique_downloaders": 0,
                 "total_users": 0,
                 "total_bundles": 0,
                 "top_bundle": "خطا در دریافت اطلاعات",
@@ -67,39 +78,156 @@ class StatsService:
             db.close()
     
     def _get_period_stats(self, days: int, period_name: str) -> Dict[str, Any]:
-        """Get statistics for a specific period."""
+        """Get statistics for the last `days` local calendar days, today included."""
         db = next(get_db())
         try:
             user_repo = UserRepository(db)
-            bundle_repo = BundleRepository(db)
-            delivery_repo = DeliveryRepository(db)
+            stats_repo = StatsRepository(db)
+            since = local_date() - timedelta(days=days - 1)
             
             # Get period stats
-            downloads = delivery_repo.get_delivery_count(days)
+            totals = stats_repo.get_totals(since)
             active_users = user_repo.get_active_users_count(days)
+            unique_downloaders = stats_repo.get_unique_users(since)
             
             # Get top bundle for period
-            top_bundle_info = bundle_repo.get_top_bundle_by_downloads(days)
-            top_bundle_text = "هیچ دانلودی وجود ندارد"
-            
-            if top_bundle_info:
-                bundle, count = top_bundle_info
-                top_bundle_text = f"{bundle.public_number_str} - {bundle.title} ({count} دانلود)"
+            top_bundle_text = self._top_bundle_text(db, stats_repo.get_top_bundles(since, limit=1))
             
             return {
-                "downloads": downloads,
+                "downloads": totals["downloads"],
                 "active_users": active_users,
+                "new_users": totals["new_users"],
+                "unique_downloaders": unique_downloaders,
                 "top_bundle": top_bundle_text,
                 "period": period_name
             }
-            
+        
         except Exception as e:
             logger.error(f"Error getting {period_name} stats: {e}")
             return {
                 "downloads": 0,
                 "active_users": 0,
+                "new_users": 0,
+                "unique_downloaders": 0,
                 "top_bundle": "خطا در دریافت اطلاعات",
                 "period": period_name
             }
         finally:
             db.close()
+    
+    def get_leaderboard(self, days: Optional[int] = None, limit: int = LEADERBOARD_SIZE) -> List[Dict[str, Any]]:
+        """Top bundles by downloads over the last `days` local days, or all time."""
+        db = next(get_db())
+        try:
+            since = local_date() - timedelta(days=days - 1) if days else None
+            top_bundles = StatsRepository(db).get_top_bundles(since, limit=limit)
+            bundles = BundleRepository(db).get_bundles_by_ids([bundle_id for bundle_id, _ in top_bundles])
+            
+            leaderboard = []
+            for bundle_id, downloads in top_bundles:
+                bundle = bundles.get(bundle_id)
+                leaderboard.append({
+                    "bundle_id": bundle_id,
+                    "public_number_str": bundle.public_number_str if bundle else f"#{bundle_id}",
+                    "title": bundle.title if bundle else "",
+                    "downloads": downloads
+                })
+            return leaderboard
+        
+        except Exception as e:
+            logger.error(f"Error getting leaderboard for {days} days: {e}")
+            return []
+        finally:
+            db.close()
+    
+    def get_bundle_stats(self, bundle_id: int) -> Optional[Dict[str, Any]]:
+        """Downloads and approximate unique downloaders of one bundle per leaderboard period."""
+        db = next(get_db())
+        try:
+            bundle = BundleRepository(db).get_bundle_by_id(bundle_id)
+            if not bundle:
+                return None
+            
+            stats_repo = StatsRepository(db)
+            stats = {
+                "bundle_id": bundle.id,
+                "public_number_str": bundle.public_number_str,
+                "title": bundle.title,
+                "is_active": bundle.is_active
+            }
+            for period, days in LEADERBOARD_PERIODS.items():
+                since = local_date() - timedelta(days=days - 1) if days else None
+                stats[f"{period}_downloads"] = stats_repo.get_bundle_downloads(bundle_id, since)
+                stats[f"{period}_unique"] = stats_repo.get_unique_users(since, bundle_ids=[bundle_id])
+            return stats
+        
+        except Exception as e:
+            logger.error(f"Error getting stats for bundle {bundle_id}: {e}")
+            return None
+        finally:
+            db.close()
+    
+    def rebuild_recent(self, days: int = 2):
+        """Recompute the rollup for the last `days` local days from raw deliveries."""
+        db = next(get_db())
+        try:
+            StatsRepository(db).rebuild(local_date() - timedelta(days=days - 1))
+        finally:
+            db.close()
+    
+    @staticmethod
+    def _top_bundle_text(db: Session, top_bundles: list) -> str:
+        """Describe the first (bundle_id, downloads) entry, if any."""
+        if not top_bundles:
+            return "هیچ دانلودی وجود ندارد"
+        
+        bundle_id, count = top_bundles[0]
+        bundle = BundleRepository(db).get_bundle_by_id(bundle_id)
+        if not bundle:
+            return f"#{bundle_id} ({count} دانلود)"
+        return f"{bundle.public_number_str} - {bundle.title} ({count} دانلود)"
+
+
+class StatsCache:
+    """Latest weekly, monthly and total reports, kept in memory.
+    
+    A scheduled job refreshes the reports every few minutes; admin taps are
+    served from here. Concurrent refresh requests share one recomputation.
+    """
+    
+    def __init__(self):
+        self._reports: Dict[str, Dict[str, Any]] = {}
+        self._refreshed_at: Optional[datetime] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+    
+    async def get(self, period: str) -> Tuple[Dict[str, Any], datetime]:
+        """Cached report of a period and when it was computed; computes it on first use."""
+        if period not in self._reports:
+            await self.refresh()
+        return self._reports[period], self._refreshed_at
+    
+    async def refresh(self):
+        """Recompute all reports, or wait for the recomputation already running."""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh())
+        # Shielded so an impatient caller can't cancel a refresh others are waiting on
+        await asyncio.shield(self._refresh_task)
+    
+    async def _refresh(self):
+        started_at = datetime.utcnow()
+        self._reports = await asyncio.to_thread(self._compute)
+        self._refreshed_at = started_at
+        logger.debug("Stats cache refreshed")
+    
+    @staticmethod
+    def _compute() -> Dict[str, Dict[str, Any]]:
+        service = StatsService()
+        return {
+            "weekly": service.get_weekly_stats(),
+            "monthly": service.get_monthly_stats(),
+            "total": service.get_total_stats()
+        }
+
+
+# Shared by the refresh job and the admin handlers
+stats_cache = StatsCache()
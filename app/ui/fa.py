@@ -12,6 +12,8 @@ class PersianTexts:
     CONFIRM = "✅ تأیید"
     DELETE = "🗑 حذف"
     EDIT = "✏️ ویرایش"
+    PREV_PAGE = "« قبلی"
+    NEXT_PAGE = "بعدی »"
     
     # User flow
     WELCOME = "خوش آمدید! 🌟"
@@ -21,6 +23,8 @@ class PersianTexts:
     PLEASE_JOIN_ALL = "لطفاً در تمام کانال‌ها عضو شوید و دوباره تلاش کنید."
     CONTENT_DELIVERED = "محتوا با موفقیت ارسال شد! 📤"
     DOWNLOAD_AGAIN = "دانلود دوباره"
+    TOO_MANY_REQUESTS = "درخواست‌های شما بیش از حد مجاز است. لطفاً کمی صبر کنید. ⏳"
+    SERVER_BUSY = "ربات در حال حاضر شلوغ است. لطفاً چند لحظه دیگر دوباره تلاش کنید. ⏳"
     
     # Admin panel
     ADMIN_WELCOME = "پنل مدیریت 👨‍💼"
@@ -36,9 +40,16 @@ class PersianTexts:
     BUNDLE_CREATED = "بسته جدید ایجاد شد! 🎉\n\n📦 شماره: {number}\n📝 عنوان: {title}\n🔗 لینک: {link}"
     ENTER_BUNDLE_TITLE = "عنوان بسته را وارد کنید:"
     RECORDING_STARTED = "ضبط شروع شد! پیام‌های خود را ارسال کنید و در پایان /done را بزنید."
+    RECORDING_RESUMED = "ضبط پیش‌نویس قبلی ادامه یافت ({count} پیام ذخیره شده). پیام‌های بعدی را ارسال کنید و در پایان /done را بزنید."
     RECORDING_STOPPED = "ضبط متوقف شد."
+    IMPORT_USAGE = "استفاده: /import شناسه‌شروع شناسه‌پایان [نوع‌ها]\nمثال: /import 120 620 photo video"
+    IMPORT_CONFIRM = "{count} پیام برای بسته انتخاب شد.{unindexed}\nعنوان بسته را وارد کنید:"
+    IMPORT_UNINDEXED = "\n⚠️ {count} شناسه از این بازه ثبت نشده و کنار گذاشته شد (پیام‌های قبل از فعال شدن ربات، حذف‌شده یا غیرقابل کپی)."
+    IMPORT_NOTHING_INDEXED = "هیچ پیام ثبت‌شده‌ای در این بازه یافت نشد ({count} شناسه ثبت نشده). فقط پیام‌هایی که پس از فعال شدن ربات در آرشیو ارسال شده‌اند قابل وارد کردن هستند."
     BUNDLE_SEARCH = "جستجوی بسته (کد/شماره/عنوان):"
     NO_BUNDLES_FOUND = "هیچ بسته‌ای یافت نشد."
+    BUNDLE_LIST = "📦 لیست بسته‌ها"
+    BUNDLE_SEARCH_RESULTS = "🔍 نتایج جستجو برای «{query}»:"
     BUNDLE_ACTIVATED = "بسته فعال شد ✅"
     BUNDLE_DEACTIVATED = "بسته غیرفعال شد ❌"
     
@@ -73,42 +84,120 @@ class PersianTexts:
     
     # Broadcast
     SEND_BROADCAST = "پیام همگانی را ارسال کنید:"
-    BROADCAST_PREVIEW = "پیش‌نمایش پیام همگانی:\n\n{message}\n\n👥 تعداد کاربران: {count}"
+    BROADCAST_PREVIEW = "پیش‌نمایش پیام همگانی:\n\n{message}\n\n🎯 مخاطبان: {audience}\n👥 تعداد کاربران: {count}"
+    AUDIENCE_ALL = "همه کاربران"
+    AUDIENCE_ACTIVE = "فعال در {days} روز اخیر"
+    AUDIENCE_BUNDLE = "دریافت‌کنندگان بسته {number}"
+    AUDIENCE_ALL_BTN = "👥 همه"
+    AUDIENCE_ACTIVE_BTN = "🕒 {days} روز"
+    AUDIENCE_BUNDLE_BTN = "📦 دریافت‌کنندگان یک بسته"
+    SEND_AUDIENCE_BUNDLE = "کد یا شماره بسته‌ای را که دریافت‌کنندگانش مخاطب پیام هستند ارسال کنید:"
+    AUDIENCE_BUNDLE_NOT_FOUND = "بسته‌ای با این کد یا شماره یافت نشد. دوباره ارسال کنید:"
     SEND_BROADCAST_BTN = "📤 ارسال"
     BROADCAST_CANCELLED = "ارسال همگانی لغو شد."
     BROADCAST_STARTED = "ارسال همگانی شروع شد..."
     BROADCAST_COMPLETED = "ارسال همگانی تکمیل شد!\n\n✅ موفق: {success}\n❌ ناموفق: {failed}"
+    BROADCAST_QUEUED = "ارسال همگانی #{id} در صف قرار گرفت و در پس‌زمینه انجام می‌شود."
+    BROADCAST_JOB_STATUS = "📡 ارسال همگانی #{id}\n\nوضعیت: {status}\n✅ موفق: {sent}\n❌ ناموفق: {failed}\n⏳ باقی‌مانده: {remaining}"
+    BROADCAST_RATE = "\n🚀 سرعت: {throughput:.1f} پیام در ثانیه (حد فعلی {rate:.1f})"
+    BROADCAST_ETA = "\n🕒 زمان باقی‌مانده: {eta}"
+    ETA_HOURS = "{hours} ساعت و {minutes} دقیقه"
+    ETA_MINUTES = "{minutes} دقیقه"
+    ETA_LESS_THAN_MINUTE = "کمتر از یک دقیقه"
+    ETA_UNKNOWN = "نامشخص"
+    BROADCAST_STATUSES = {
+        "pending": "در صف",
+        "running": "در حال ارسال",
+        "paused": "متوقف",
+        "cancelled": "لغو شده",
+        "completed": "تکمیل شده",
+    }
+    PAUSE_BROADCAST = "⏸ توقف"
+    RESUME_BROADCAST = "▶️ ادامه"
+    STOP_BROADCAST = "⏹ لغو ارسال"
+    REFRESH = "🔄 بروزرسانی"
+    BROADCAST_PAUSED = "ارسال همگانی متوقف شد ⏸"
+    BROADCAST_RESUMED = "ارسال همگانی ادامه می‌یابد ▶️"
+    BROADCAST_STOPPED = "ارسال همگانی لغو شد ⏹"
+    BROADCAST_JOB_NOT_FOUND = "این ارسال همگانی یافت نشد یا قبلاً تمام شده است."
     
     # Backup
     RUN_BACKUP = "▶️ اجرای پشتیبان‌گیری"
     BACKUP_STARTED = "پشتیبان‌گیری شروع شد..."
     BACKUP_COMPLETED = "پشتیبان‌گیری کامل شد ✅"
     BACKUP_FAILED = "پشتیبان‌گیری با خطا مواجه شد ❌"
+    BACKUP_UPLOADING = "در حال ارسال فایل‌های پشتیبان..."
+    BACKUP_UPLOAD_FAILED = "ارسال فایل‌های پشتیبان ناتمام ماند ❌\nبرای ادامه از آخرین بخش ارسال‌شده، دکمه زیر را بزنید."
+    RESUME_UPLOAD = "🔁 ادامه ارسال"
     
     # Statistics
     STATS_WEEKLY = "📅 هفتگی"
     STATS_MONTHLY = "📅 ماهانه"
     STATS_TOTAL = "📅 کل زمان"
+    STATS_AGE = "\n\n🕒 به‌روزرسانی: {age} پیش"
+    STATS_LEADERBOARD = "🏆 پردانلودترین بسته‌ها"
+    STATS_PERIOD_NAMES = {"weekly": "۷ روز اخیر", "monthly": "۳۰ روز اخیر", "total": "کل زمان"}
+    STATS_LEADERBOARD_TITLE = "🏆 پردانلودترین بسته‌ها ({period}):\nبرای جزئیات روی هر بسته بزنید."
+    STATS_NO_DOWNLOADS = "🏆 هیچ دانلودی در این بازه ({period}) ثبت نشده است."
+    MANAGE_BUNDLE = "📦 مدیریت بسته"
+    ANALYTICS = "📈 تحلیل رفتار کاربران"
+    ANALYTICS_HEADER = "📈 تحلیل رفتار کاربران\n\n📥 {deliveries} دانلود از {users} کاربر"
+    ANALYTICS_HOURS = "\n\n🕒 دانلود بر حسب ساعت (به وقت {tz}):\n<pre>{table}</pre>"
+    ANALYTICS_COHORTS = "\n👥 بازگشت کاربران بر اساس هفته اولین دانلود (درصد):\n<pre>{table}</pre>"
+    ANALYTICS_RETENTION = "\n🔁 میانگین بازگشت در هفته‌های بعد: {retention}"
+    ANALYTICS_EMPTY = "📈 هنوز دانلودی برای تحلیل ثبت نشده است."
+    
+    # Data export
+    EXPORT = "📤 خروجی داده‌ها"
+    EXPORT_MENU = "📤 از کدام داده خروجی می‌خواهید؟\nفایل‌ها به صورت فشرده (gzip) ارسال می‌شوند و زمان‌ها به وقت UTC هستند."
+    EXPORT_TABLES = {"deliveries": "📥 دانلودها", "users": "👥 کاربران", "requests": "📝 درخواست‌ها"}
+    EXPORT_CHOOSE_RANGE = "📅 بازه زمانی خروجی «{table}» را انتخاب کنید:"
+    EXPORT_LAST_DAYS = "{days} روز اخیر"
+    EXPORT_CUSTOM_RANGE = "📅 بازه دلخواه"
+    EXPORT_RANGE_PROMPT = "تاریخ شروع و پایان را به شکل 2026-09-01 2026-09-30 بفرستید (روزها به وقت محلی، هر دو روز شامل می‌شوند):"
+    EXPORT_RANGE_INVALID = "❌ بازه نامعتبر است. دو تاریخ به شکل 2026-09-01 2026-09-30 بفرستید که اولی از دومی دیرتر نباشد."
+    EXPORT_CHOOSE_FORMAT = "📄 خروجی «{table}» از {start} تا {end}\nقالب فایل را انتخاب کنید:"
+    EXPORT_STARTED = "⏳ در حال آماده‌سازی و ارسال خروجی..."
+    EXPORT_COMPLETED = "✅ خروجی ارسال شد ({rows} ردیف)."
+    EXPORT_FAILED = "❌ تهیه یا ارسال خروجی با خطا مواجه شد."
     
     STATS_WEEKLY_REPORT = """📊 آمار هفته گذشته (۷ روز):
 
 📥 تعداد دانلود: {downloads}
+🔢 دانلودکنندگان یکتا (تقریبی): {unique_downloaders}
 👥 کاربران فعال: {active_users}
+🆕 کاربران جدید: {new_users}
 🏆 پربازدیدترین بسته: {top_bundle}"""
 
     STATS_MONTHLY_REPORT = """📊 آمار ماه گذشته (۳۰ روز):
 
 📥 تعداد دانلود: {downloads}
+🔢 دانلودکنندگان یکتا (تقریبی): {unique_downloaders}
 👥 کاربران فعال: {active_users}
+🆕 کاربران جدید: {new_users}
 🏆 پربازدیدترین بسته: {top_bundle}"""
 
     STATS_TOTAL_REPORT = """📊 آمار کل:
 
 📥 تعداد دانلود: {downloads}
+🔢 دانلودکنندگان یکتا (تقریبی): {unique_downloaders}
 👥 کل کاربران: {total_users}
 📦 کل بسته‌ها: {total_bundles}
 🏆 پربازدیدترین بسته: {top_bundle}"""
 
+    STATS_BUNDLE_REPORT = """📦 {number} - {title}
+📊 وضعیت: {status}
+
+📥 دانلودها:
+• ۷ روز اخیر: {weekly_downloads}
+• ۳۰ روز اخیر: {monthly_downloads}
+• کل زمان: {total_downloads}
+
+🔢 دانلودکنندگان یکتا (تقریبی):
+• ۷ روز اخیر: {weekly_unique}
+• ۳۰ روز اخیر: {monthly_unique}
+• کل زمان: {total_unique}"""
+
     # Errors
     ERROR_OCCURRED = "خطایی رخ داد. لطفاً دوباره تلاش کنید."
     ACCESS_DENIED = "دسترسی مجاز نیست."
@@ -202,11 +291,123 @@ class PersianKeyboards:
             [
                 InlineKeyboardButton(text=PersianTexts.STATS_TOTAL, callback_data="stats_total")
             ],
+            [
+                InlineKeyboardButton(text=PersianTexts.STATS_LEADERBOARD, callback_data="stats_top_weekly")
+            ],
+            [
+                InlineKeyboardButton(text=PersianTexts.ANALYTICS, callback_data="stats_analytics")
+            ],
+            [
+                InlineKeyboardButton(text=PersianTexts.EXPORT, callback_data="stats_export")
+            ],
             [
                 InlineKeyboardButton(text=PersianTexts.BACK, callback_data="admin_main")
             ]
         ])
     
+    @staticmethod
+    def stats_report(period: str) -> InlineKeyboardMarkup:
+        """Stats report buttons."""
+        return InlineKeyboardMarkup(inline_keyboard=[
+            [
+                InlineKeyboardButton(text=PersianTexts.REFRESH, callback_data=f"stats_refresh_{period}")
+            ],
+            [
+                InlineKeyboardButton(text=PersianTexts.BACK, callback_data="admin_stats")
+            ]
+        ])
+    
+    @staticmethod
+    def stats_analytics() -> InlineKeyboardMarkup:
+        """Analytics report buttons."""
+        return InlineKeyboardMarkup(inline_keyboard=[
+            [
+                InlineKeyboardButton(text=PersianTexts.REFRESH, callback_data="stats_analytics")
+            ],
+            [
+                InlineKeyboardButton(text=PersianTexts.BACK, callback_data="admin_stats")
+            ]
+        ])
+    
+    @staticmethod
+    def export_tables() -> InlineKeyboardMarkup:
+        """Export table choice."""
+        keyboard = [
+            [InlineKeyboardButton(text=name, callback_data=f"export_table_{table}")]
+            for table, name in PersianTexts.EXPORT_TABLES.items()
+        ]
+        keyboard.append([InlineKeyboardButton(text=PersianTexts.BACK, callback_data="admin_stats")])
+        return InlineKeyboardMarkup(inline_keyboard=keyboard)
+    
+    @staticmethod
+    def export_ranges(table: str, days_options: tuple = (7, 30, 90)) -> InlineKeyboardMarkup:
+        """Export date range choice."""
+        return InlineKeyboardMarkup(inline_keyboard=[
+            [
+                InlineKeyboardButton(
+                    text=PersianTexts.EXPORT_LAST_DAYS.format(days=days),
+                    callback_data=f"export_range_{table}_{days}"
+                )
+                for days in days_options
+            ],
+            [
+                InlineKeyboardButton(text=PersianTexts.EXPORT_CUSTOM_RANGE, callback_data=f"export_custom_{table}")
+            ],
+            [
+                InlineKeyboardButton(text=PersianTexts.BACK, callback_data="stats_export")
+            ]
+        ])
+    
+    @staticmethod
+    def export_formats(table: str, start: str, end: str) -> InlineKeyboardMarkup:
+        """Export format choice; start and end as YYYYMMDD."""
+        return InlineKeyboardMarkup(inline_keyboard=[
+            [
+                InlineKeyboardButton(text="CSV", callback_data=f"export_run_{table}_csv_{start}_{end}"),
+                InlineKeyboardButton(text="JSONL", callback_data=f"export_run_{table}_jsonl_{start}_{end}")
+            ],
+            [
+                InlineKeyboardButton(text=PersianTexts.BACK, callback_data=f"export_table_{table}")
+            ]
+        ])
+    
+    @staticmethod
+    def stats_leaderboard(buttons: List[tuple], period: str) -> InlineKeyboardMarkup:
+        """Leaderboard entries (one button each) with period switches.
+        
+        Args:
+            buttons: (text, callback_data) pairs, one row each
+            period: Currently shown period, marked in the switches
+        """
+        keyboard = [
+            [InlineKeyboardButton(text=text, callback_data=data)]
+            for text, data in buttons
+        ]
+        keyboard.append([
+            InlineKeyboardButton(
+                text=f"• {name}" if key == period else name,
+                callback_data=f"stats_top_{key}"
+            )
+            for key, name in PersianTexts.STATS_PERIOD_NAMES.items()
+        ])
+        keyboard.append([
+            InlineKeyboardButton(text=PersianTexts.BACK, callback_data="admin_stats")
+        ])
+        
+        return InlineKeyboardMarkup(inline_keyboard=keyboard)
+    
+    @staticmethod
+    def stats_bundle(bundle_id: int, period: str) -> InlineKeyboardMarkup:
+        """Bundle statistics drill-down buttons."""
+        return InlineKeyboardMarkup(inline_keyboard=[
+            [
+                InlineKeyboardButton(text=PersianTexts.MANAGE_BUNDLE, callback_data=f"bundle_view_{bundle_id}")
+            ],
+            [
+                InlineKeyboardButton(text=PersianTexts.BACK, callback_data=f"stats_top_{period}")
+            ]
+        ])
+    
     @staticmethod
     def backup_menu() -> InlineKeyboardMarkup:
         """Backup menu keyboard."""
@@ -219,6 +420,18 @@ class PersianKeyboards:
             ]
         ])
     
+    @staticmethod
+    def backup_resume(name: str) -> InlineKeyboardMarkup:
+        """Resume a failed backup upload."""
+        return InlineKeyboardMarkup(inline_keyboard=[
+            [
+                InlineKeyboardButton(text=PersianTexts.RESUME_UPLOAD, callback_data=f"backup_resume_{name}")
+            ],
+            [
+                InlineKeyboardButton(text=PersianTexts.BACK, callback_data="admin_backup")
+            ]
+        ])
+    
     @staticmethod
     def join_check() -> InlineKeyboardMarkup:
         """Join check keyboard."""
@@ -260,15 +473,46 @@ class PersianKeyboards:
         return InlineKeyboardMarkup(inline_keyboard=keyboard)
     
     @staticmethod
-    def broadcast_confirm(count: int) -> InlineKeyboardMarkup:
-        """Broadcast confirmation keyboard."""
+    def broadcast_confirm(count: int, active_days_options: tuple = (7, 30, 90)) -> InlineKeyboardMarkup:
+        """Broadcast confirmation keyboard with audience choices."""
         return InlineKeyboardMarkup(inline_keyboard=[
+            [InlineKeyboardButton(text=PersianTexts.AUDIENCE_ALL_BTN, callback_data="broadcast_audience_all")] + [
+                InlineKeyboardButton(
+                    text=PersianTexts.AUDIENCE_ACTIVE_BTN.format(days=days),
+                    callback_data=f"broadcast_audience_active_{days}"
+                )
+                for days in active_days_options
+            ],
+            [
+                InlineKeyboardButton(text=PersianTexts.AUDIENCE_BUNDLE_BTN, callback_data="broadcast_audience_bundle")
+            ],
             [
                 InlineKeyboardButton(text=PersianTexts.SEND_BROADCAST_BTN, callback_data="broadcast_send"),
                 InlineKeyboardButton(text=PersianTexts.CANCEL, callback_data="broadcast_cancel")
             ]
         ])
     
+    @staticmethod
+    def broadcast_job_actions(job_id: int, status: str) -> InlineKeyboardMarkup:
+        """Controls for a running, paused or queued broadcast job."""
+        keyboard = []
+        if status in ("pending", "running"):
+            keyboard.append([
+                InlineKeyboardButton(text=PersianTexts.PAUSE_BROADCAST, callback_data=f"broadcast_pause_{job_id}"),
+                InlineKeyboardButton(text=PersianTexts.STOP_BROADCAST, callback_data=f"broadcast_abort_{job_id}")
+            ])
+        elif status == "paused":
+            keyboard.append([
+                InlineKeyboardButton(text=PersianTexts.RESUME_BROADCAST, callback_data=f"broadcast_resume_{job_id}"),
+                InlineKeyboardButton(text=PersianTexts.STOP_BROADCAST, callback_data=f"broadcast_abort_{job_id}")
+            ])
+        
+        keyboard.append([
+            InlineKeyboardButton(text=PersianTexts.REFRESH, callback_data=f"broadcast_job_{job_id}"),
+            InlineKeyboardButton(text=PersianTexts.BACK, callback_data="admin_main")
+        ])
+        return InlineKeyboardMarkup(inline_keyboard=keyboard)
+    
     @staticmethod
     def bundle_actions(bundle_id: int, is_active: bool) -> InlineKeyboardMarkup:
         """Bundle action buttons."""
@@ -281,10 +525,38 @@ class PersianKeyboards:
                 InlineKeyboardButton(text=status_text, callback_data=f"bundle_{status_action}_{bundle_id}")
             ],
             [
-                InlineKeyboardButton(text=PersianTexts.BACK, callback_data="admin_bundles")
+                InlineKeyboardButton(text=PersianTexts.BACK, callback_data="bundle_list")
             ]
         ])
     
+    @staticmethod
+    def paginated_list(buttons: List[tuple], prev_data: Optional[str] = None,
+                       next_data: Optional[str] = None,
+                       back_data: str = "admin_main") -> InlineKeyboardMarkup:
+        """Single-message list: one button per item plus prev/next navigation.
+        
+        Args:
+            buttons: (text, callback_data) pairs, one row each
+        """
+        keyboard = [
+            [InlineKeyboardButton(text=text, callback_data=data)]
+            for text, data in buttons
+        ]
+        
+        navigation = []
+        if prev_data:
+            navigation.append(InlineKeyboardButton(text=PersianTexts.PREV_PAGE, callback_data=prev_data))
+        if next_data:
+            navigation.append(InlineKeyboardButton(text=PersianTexts.NEXT_PAGE, callback_data=next_data))
+        if navigation:
+            keyboard.append(navigation)
+        
+        keyboard.append([
+            InlineKeyboardButton(text=PersianTexts.BACK, callback_data=back_data)
+        ])
+        
+        return InlineKeyboardMarkup(inline_keyboard=keyboard)
+    
     @staticmethod
     def channel_actions(channel_id: int) -> InlineKeyboardMarkup:
         """Channel action buttons."""
@@ -293,7 +565,7 @@ class PersianKeyboards:
                 InlineKeyboardButton(text=PersianTexts.DELETE, callback_data=f"channel_delete_{channel_id}")
             ],
             [
-                InlineKeyboardButton(text=PersianTexts.BACK, callback_data="admin_channels")
+                InlineKeyboardButton(text=PersianTexts.BACK, callback_data="channel_list")
             ]
         ])
     
@@ -319,3 +591,58 @@ class PersianKeyboards:
             resize_keyboard=True,
             one_time_keyboard=False
         )
+
+
+def format_broadcast_status(job: dict) -> str:
+    """Status text of a broadcast job, with rate and ETA while it's running."""
+    text = PersianTexts.BROADCAST_JOB_STATUS.format(
+        id=job["id"],
+        status=PersianTexts.BROADCAST_STATUSES[job["status"]],
+        sent=job["sent"],
+        failed=job["failed"],
+        remaining=job["remaining"]
+    )
+    if job["rate"] is None:
+        return text
+    
+    text += PersianTexts.BROADCAST_RATE.format(throughput=job["throughput"], rate=job["rate"])
+    
+    eta = job["eta_seconds"]
+    eta_text = PersianTexts.ETA_UNKNOWN if eta is None else format_duration(eta)
+    return text + PersianTexts.BROADCAST_ETA.format(eta=eta_text)
+
+
+def format_duration(seconds: float) -> str:
+    """Rough human-readable length of a time span."""
+    if seconds < 60:
+        return PersianTexts.ETA_LESS_THAN_MINUTE
+    if seconds < 3600:
+        return PersianTexts.ETA_MINUTES.format(minutes=round(seconds / 60))
+    return PersianTexts.ETA_HOURS.format(hours=int(seconds // 3600), minutes=int(seconds % 3600 // 60))
+
+
+def format_analytics_report(report: dict, tz: str, bar_width: int = 12) -> str:
+    """Analytics summary: hour-of-day histogram, weekly cohorts and average retention."""
+    if not report["deliveries"]:
+        return PersianTexts.ANALYTICS_EMPTY
+    
+    text = PersianTexts.ANALYTICS_HEADER.format(deliveries=report["deliveries"], users=report["users"])
+    
+    peak = max(report["hours"]) or 1
+    hours = "\n".join(
+        f"{hour:02d} {'█' * round(bar_width * count / peak):<{bar_width}} {count}"
+        for hour, count in enumerate(report["hours"])
+    )
+    text += PersianTexts.ANALYTICS_HOURS.format(tz=tz, table=hours)
+    
+    weeks = len(report["cohorts"])
+    rows = ["week  users" + "".join(f" {f'+{offset}':>4}" for offset in range(1, weeks))]
+    for cohort in report["cohorts"]:
+        rows.append(
+            f"{cohort['start']:%m-%d} {cohort['users']:>6}"
+            + "".join(f" {percent:>3}%" for percent in cohort["retention"])
+        )
+    text += PersianTexts.ANALYTICS_COHORTS.format(table="\n".join(rows))
+    
+    retention = " · ".join(f"+{offset}: {percent}%" for offset, percent in enumerate(report["retention"], 1))
+    return text + PersianTexts.ANALYTICS_RETENTION.format(retention=retention)
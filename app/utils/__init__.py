@@ -1,12 +1,11 @@
 """Utilities package."""
 from .logging import setup_logging
 from .validators import validate_channel_link, extract_chat_id_from_link
-from .helpers import generate_deep_link, create_backup
+from .helpers import generate_deep_link
 
 __all__ = [
     "setup_logging",
     "validate_channel_link",
     "extract_chat_id_from_link", 
     "generate_deep_link",
-    "create_backup",
 ]
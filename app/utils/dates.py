@@ -0,0 +1,35 @@
+"""Local calendar day helpers for statistics.
+
+Timestamps are stored in UTC; statistics are grouped by calendar day in the
+configured timezone (settings.TZ).
+"""
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from app.config import settings
+
+
+def local_date(value: Optional[datetime] = None) -> date:
+    """Local calendar day of a naive UTC timestamp (default: now)."""
+    if value is None:
+        value = datetime.utcnow()
+    return value.replace(tzinfo=timezone.utc).astimezone(ZoneInfo(settings.TZ)).date()
+
+
+def local_day_start(day: date) -> datetime:
+    """Naive UTC timestamp at which a local calendar day starts."""
+    start = datetime.combine(day, time.min, tzinfo=ZoneInfo(settings.TZ))
+    return start.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def local_day_bounds(day: date) -> Tuple[datetime, datetime]:
+    """Naive UTC [start, end) of a local calendar day."""
+    return local_day_start(day), local_day_start(day + timedelta(days=1))
+
+
+def sqlite_local_date(value: Optional[str]) -> Optional[str]:
+    """SQL function form of local_date for SQLite's stored timestamp strings."""
+    if value is None:
+        return None
+    return local_date(datetime.fromisoformat(value)).isoformat()
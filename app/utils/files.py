@@ -0,0 +1,15 @@
+"""File helpers shared by the backup service and the restore tool."""
+import hashlib
+from pathlib import Path
+
+# Chunk size for streaming copies, compression and checksums
+CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(path: Path) -> str:
+    """Compute the SHA-256 of a file in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
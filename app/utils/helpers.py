@@ -1,10 +1,18 @@
 """Helper utilities."""
-import os
-import shutil
-import zipfile
-from datetime import datetime
+import asyncio
+import logging
 from pathlib import Path
 from typing import Optional
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramBadRequest, TelegramForbiddenError, TelegramNetworkError, TelegramRetryAfter, TelegramServerError
+)
+from aiogram.types import FSInputFile
+
+from app.config import settings
+from app.utils.metrics import TELEGRAM_RETRIES
+
+logger = logging.getLogger(__name__)
 
 
 def generate_deep_link(bot_username: str, code: str) -> str:
@@ -12,35 +20,54 @@ def generate_deep_link(bot_username: str, code: str) -> str:
     return f"https://t.me/{bot_username}?start={code}"
 
 
-def create_backup() -> Optional[str]:
-    """Create a backup of the database and return the backup file path."""
-    try:
-        # Create backups directory if it doesn't exist
-        backup_dir = Path("backups")
-        backup_dir.mkdir(exist_ok=True)
-        
-        # Generate backup filename with timestamp
-        timestamp = datetime.now().strftime("%Y%m%d-%H%M")
-        backup_filename = f"backup-{timestamp}.zip"
-        backup_path = backup_dir / backup_filename
-        
-        # Create zip file with database
-        with zipfile.ZipFile(backup_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            # Add database file if it exists
-            db_path = Path("data/app.db")
-            if db_path.exists():
-                zipf.write(db_path, "app.db")
-            
-            # Add any other important files
-            # You can add more files here if needed
-            
-        return str(backup_path)
-        
-    except Exception as e:
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.error(f"Error creating backup: {e}")
+def get_unreachable_reason(error: Exception, user_id: int, source_ok: bool = False) -> Optional[str]:
+    """Classify a send error that means the user can't receive messages.
+    
+    Only errors about the user's own chat count: the failed call must target
+    user_id, and Forbidden errors must name the user rather than e.g. an
+    archive channel the bot was removed from. copyMessage reports a missing
+    source chat as "chat not found" too, so for calls with a from_chat_id
+    that only counts when source_ok (the source was copied from successfully).
+    
+    Returns "blocked", "deactivated", "chat_not_found" or None for errors
+    that say nothing about the user (e.g. a bad source message).
+    """
+    method = getattr(error, "method", None)
+    if method is not None and getattr(method, "chat_id", None) != user_id:
         return None
+    
+    message = str(error).lower()
+    if isinstance(error, TelegramForbiddenError):
+        if "blocked by the user" in message:
+            return "blocked"
+        if "user is deactivated" in message:
+            return "deactivated"
+        return None
+    if isinstance(error, TelegramBadRequest) and "chat not found" in message:
+        if getattr(method, "from_chat_id", None) is not None and not source_ok:
+            return None
+        return "chat_not_found"
+    return None
+
+
+async def send_document_file(bot: Bot, chat_id: int, path: Path, caption: str) -> bool:
+    """Send a file as a document, retrying on flood control and transient errors."""
+    for attempt in range(1, settings.MAX_RETRIES + 1):
+        try:
+            await bot.send_document(chat_id, FSInputFile(path), caption=caption)
+            return True
+        except TelegramRetryAfter as e:
+            logger.warning(f"Flood control while uploading {path.name}, waiting {e.retry_after}s")
+            TELEGRAM_RETRIES.inc("sendDocument")
+            await asyncio.sleep(e.retry_after)
+        except (TelegramNetworkError, TelegramServerError) as e:
+            logger.warning(f"Error uploading {path.name} (attempt {attempt}): {e}")
+            TELEGRAM_RETRIES.inc("sendDocument")
+            await asyncio.sleep(settings.FLOOD_WAIT_DELAY * 2 ** attempt)
+        except Exception as e:
+            logger.error(f"Error uploading {path.name}: {e}")
+            return False
+    return False
 
 
 def ensure_data_directory():
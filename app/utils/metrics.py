@@ -0,0 +1,260 @@
+"""In-process metrics rendered in the Prometheus text exposition format.
+
+Metrics are plain module-level objects updated from handlers, services,
+jobs and the DB engine hooks; MetricsServer (app.main) serves them over
+HTTP. Updates are guarded by a lock because DB work also runs in worker
+threads.
+"""
+import asyncio
+import logging
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registry: List["Metric"] = []
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Metric:
+    """Base class for a named metric family with optional labels."""
+    
+    type_name = ""
+    
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        _registry.append(self)
+    
+    def _key(self, labels: Sequence[str]) -> Tuple[str, ...]:
+        if len(labels) != len(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {labels}")
+        return tuple(str(label) for label in labels)
+    
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        with self._lock:
+            lines.extend(self._samples())
+        return lines
+    
+    def _samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """Monotonically increasing count."""
+    
+    type_name = "counter"
+    
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+    
+    def inc(self, *labels: str, amount: float = 1):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+    
+    def _samples(self) -> Iterable[str]:
+        for key, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+
+
+class Gauge(Metric):
+    """Value that can go up and down."""
+    
+    type_name = "gauge"
+    
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+    
+    def set(self, value: float, *labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+    
+    def remove(self, *labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values.pop(key, None)
+    
+    def _samples(self) -> Iterable[str]:
+        for key, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+
+
+class Histogram(Metric):
+    """Distribution of observed values in cumulative buckets."""
+    
+    type_name = "histogram"
+    
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # Per label set: bucket counts (non-cumulative), sum, count
+        self._values: Dict[Tuple[str, ...], List] = {}
+    
+    def observe(self, value: float, *labels: str):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][index] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+    
+    def _samples(self) -> Iterable[str]:
+        for key, (counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.label_names, key, ("le", _format_value(bound)))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.label_names, key)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {count}"
+
+
+def render_metrics() -> str:
+    """All registered metrics in the Prometheus text format."""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# Updates
+UPDATES = Counter("bot_updates_total", "Updates handled, by handler and outcome", ["handler", "outcome"])
+UPDATE_DURATION = Histogram("bot_update_duration_seconds", "Handler run time, by handler", ["handler"])
+
+# Deliveries and auto-deletion
+DELIVERIES = Counter("bot_deliveries_total", "Bundle delivery attempts, by outcome", ["outcome"])
+ITEMS_COPIED = Counter("bot_items_copied_total", "Bundle items copied to users")
+DELETION_LAG = Histogram(
+    "bot_deletion_lag_seconds",
+    "Time between a delivery's scheduled and actual deletion",
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600)
+)
+DELETION_BACKLOG = Gauge("bot_deletion_backlog", "Deliveries due for deletion at the start of the last deletion run")
+
+# Broadcasts
+BROADCAST_MESSAGES = Counter("bot_broadcast_messages_total", "Broadcast messages, by outcome", ["outcome"])
+BROADCAST_PROGRESS = Gauge(
+    "bot_broadcast_progress",
+    "Counters of broadcast jobs running in this process (total, sent, failed)",
+    ["job_id", "counter"]
+)
+
+# Telegram Bot API
+TELEGRAM_REQUESTS = Counter("bot_telegram_requests_total", "Bot API calls, by method and status", ["method", "status"])
+TELEGRAM_RETRIES = Counter("bot_telegram_retries_total", "Bot API calls repeated after an error, by method", ["method"])
+TELEGRAM_REQUEST_DURATION = Histogram("bot_telegram_request_duration_seconds", "Bot API call latency, by method", ["method"])
+TELEGRAM_RETRY_AFTER = Histogram(
+    "bot_telegram_retry_after_seconds",
+    "retry_after of flood-control (429) responses, by method",
+    ["method"],
+    buckets=(1, 2, 5, 10, 30, 60, 300, 900)
+)
+TELEGRAM_FLOW_REQUESTS = Counter(
+    "bot_telegram_flow_requests_total",
+    "Bot API calls by the handler or job that made them",
+    ["flow", "method"]
+)
+
+# Database
+DB_QUERY_DURATION = Histogram(
+    "bot_db_query_duration_seconds",
+    "SQL statement execution time, by statement type",
+    ["operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+DB_FLOW_QUERIES = Counter("bot_db_flow_queries_total", "SQL statements by the handler or job that ran them", ["flow"])
+DB_FLOW_SECONDS = Counter("bot_db_flow_seconds_total", "SQL execution time by the handler or job that ran it", ["flow"])
+
+# Event loop
+EVENT_LOOP_LAG = Histogram(
+    "bot_event_loop_lag_seconds",
+    "How late the event loop ran a timer due now",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+
+
+class MetricsServer:
+    """Local HTTP endpoint serving /metrics, plus an event-loop lag probe."""
+    
+    def __init__(self, host: str, port: int, lag_interval: float = 1.0):
+        self.host = host
+        self.port = port
+        self.lag_interval = lag_interval
+        self._runner: Optional[web.AppRunner] = None
+        self._lag_task: Optional[asyncio.Task] = None
+    
+    async def start(self):
+        """Start serving; the bot keeps running without metrics if the port is unavailable."""
+        if self._runner is not None:
+            return
+        
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle_metrics)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        try:
+            await web.TCPSite(runner, self.host, self.port).start()
+        except OSError as e:
+            logger.error(f"Could not start metrics server on {self.host}:{self.port}: {e}")
+            await runner.cleanup()
+            return
+        
+        self._runner = runner
+        self._lag_task = asyncio.create_task(self._probe_lag())
+        logger.info(f"Metrics available at http://{self.host}:{self.port}/metrics")
+    
+    async def stop(self):
+        """Stop serving."""
+        if self._lag_task is not None:
+            self._lag_task.cancel()
+            self._lag_task = None
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+    
+    async def _handle_metrics(self, request: web.Request) -> web.Response:
+        return web.Response(
+            body=render_metrics().encode("utf-8"),
+            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+        )
+    
+    async def _probe_lag(self):
+        """Measure how late a sleep of lag_interval wakes up."""
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.lag_interval)
+            EVENT_LOOP_LAG.observe(max(0.0, time.monotonic() - started - self.lag_interval))
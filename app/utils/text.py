@@ -0,0 +1,41 @@
+"""Text normalization utilities."""
+import re
+from typing import Optional
+
+# Arabic code points that have a canonical Persian form
+PERSIAN_CHAR_MAP = {
+    "\u064a": "\u06cc",  # Arabic yeh -> Persian yeh
+    "\u0649": "\u06cc",  # Alef maksura -> Persian yeh
+    "\u0643": "\u06a9",  # Arabic kaf -> Persian kaf
+    "\u200c": " ",  # ZWNJ separates word parts
+}
+
+# Persian and Arabic-Indic digits -> ASCII digits
+PERSIAN_CHAR_MAP.update({chr(0x06f0 + i): str(i) for i in range(10)})
+PERSIAN_CHAR_MAP.update({chr(0x0660 + i): str(i) for i in range(10)})
+
+# Harakat, superscript alef and tatweel carry no meaning for search
+PERSIAN_CHAR_MAP.update({chr(code): "" for code in range(0x064b, 0x0653)})
+PERSIAN_CHAR_MAP["\u0670"] = ""
+PERSIAN_CHAR_MAP["\u0640"] = ""
+
+_TRANSLATION = str.maketrans(PERSIAN_CHAR_MAP)
+
+
+def normalize_persian(text: Optional[str]) -> str:
+    """Normalize Persian text for indexing and search."""
+    if not text:
+        return ""
+    return re.sub(r"\s+", " ", text.translate(_TRANSLATION)).strip().lower()
+
+
+def build_fts_query(query: str) -> Optional[str]:
+    """Build an FTS5 MATCH expression requiring every term as a prefix.
+    
+    Returns None if the query has no searchable terms.
+    """
+    terms = [term.replace('"', '') for term in normalize_persian(query).split()]
+    terms = [term for term in terms if term]
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
@@ -0,0 +1,134 @@
+"""Per-update and per-job accounting of Bot API calls and SQL queries.
+
+The trace of the update or job being processed is kept in a context
+variable, so code deep inside services (and worker threads started with
+asyncio.to_thread, which copy the context) is attributed to it without
+passing anything around. SQL statements are reported by the engine hooks
+in app.models.base.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from app.config import settings
+from app.utils.metrics import DB_FLOW_QUERIES, DB_FLOW_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class Trace:
+    """Work done on behalf of one update or job."""
+    
+    def __init__(self, kind: str, name: str = "unknown", ref: Optional[Union[int, str]] = None):
+        self.kind = kind  # "update" or "job"
+        self.name = name  # Handler or job name, used as the flow label in metrics
+        self.ref = ref  # Update ID or job ID
+        self.started = time.perf_counter()
+        self.api_calls: Dict[str, int] = {}
+        self.api_errors = 0
+        self.api_time = 0.0
+        self.db_queries = 0
+        self.db_time = 0.0
+        self._lock = threading.Lock()
+    
+    @property
+    def label(self) -> str:
+        if self.kind == "update":
+            return f"update {self.ref} ({self.name})"
+        return f"job {self.name}" + (f" {self.ref}" if self.ref is not None else "")
+    
+    def record_api_call(self, method: str, elapsed: float, status: str):
+        with self._lock:
+            self.api_calls[method] = self.api_calls.get(method, 0) + 1
+            self.api_time += elapsed
+            if status != "ok":
+                self.api_errors += 1
+    
+    def record_query(self, elapsed: float):
+        with self._lock:
+            self.db_queries += 1
+            self.db_time += elapsed
+    
+    def summary(self) -> str:
+        """One line with the trace's duration, API usage and DB usage."""
+        elapsed = time.perf_counter() - self.started
+        calls = sum(self.api_calls.values())
+        line = f"{self.label}: {elapsed:.3f}s, {calls} API calls in {self.api_time:.3f}s"
+        if self.api_calls:
+            line += " (" + ", ".join(f"{method} {count}" for method, count in sorted(self.api_calls.items())) + ")"
+        if self.api_errors:
+            line += f", {self.api_errors} failed"
+        line += f", {self.db_queries} queries in {self.db_time:.3f}s"
+        return line
+
+
+class QueryCounter:
+    """SQL statements run inside a query_budget block."""
+    
+    def __init__(self):
+        self.count = 0
+        self.statements: List[str] = []
+        self._lock = threading.Lock()
+    
+    def record(self, statement: str):
+        with self._lock:
+            self.count += 1
+            self.statements.append(statement)
+
+
+current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+_query_counters: ContextVar[Tuple[QueryCounter, ...]] = ContextVar("query_counters", default=())
+
+
+@contextmanager
+def traced(kind: str, name: str = "unknown", ref: Optional[Union[int, str]] = None) -> Iterator[Trace]:
+    """Attribute work in the block to a new trace; logs its summary with TRACE_SUMMARY_LOG."""
+    trace = Trace(kind, name, ref)
+    token = current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        current_trace.reset(token)
+        if settings.TRACE_SUMMARY_LOG:
+            logger.info(trace.summary())
+
+
+def record_query(statement: str, elapsed: float):
+    """Attribute a finished SQL statement to the current trace and query budgets."""
+    trace = current_trace.get()
+    flow = trace.name if trace else "other"
+    DB_FLOW_QUERIES.inc(flow)
+    DB_FLOW_SECONDS.inc(flow, amount=elapsed)
+    if trace is not None:
+        trace.record_query(elapsed)
+    for counter in _query_counters.get():
+        counter.record(statement)
+
+
+@contextmanager
+def query_budget(max_queries: int) -> Iterator[QueryCounter]:
+    """Fail if the block runs more than max_queries SQL statements.
+    
+    Pins the query count of a flow so N+1 regressions are caught early, e.g.
+    
+        with query_budget(4):
+            await DeletionService(bot).process_pending_deletions()
+    
+    Statements run in worker threads started from the block are counted too.
+    
+    Raises:
+        AssertionError: If the budget was exceeded, listing the statements
+    """
+    counter = QueryCounter()
+    token = _query_counters.set(_query_counters.get() + (counter,))
+    try:
+        yield counter
+    finally:
+        _query_counters.reset(token)
+    
+    if counter.count > max_queries:
+        statements = "\n".join(f"  {statement}" for statement in counter.statements)
+        raise AssertionError(f"{counter.count} queries run, budget is {max_queries}:\n{statements}")
@@ -0,0 +1,103 @@
+"""Shared fixtures: a migrated SQLite database per test and a fake bot."""
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Settings are read on import, so configure them before anything from app is loaded
+_DB_DIR = Path(tempfile.mkdtemp(prefix="bot-tests-"))
+DB_PATH = _DB_DIR / "test.db"
+TEMPLATE_PATH = _DB_DIR / "template.db"
+os.environ.update({
+    "BOT_TOKEN": "123456:TEST",
+    "ADMIN_IDS": "1",
+    "ARCHIVE_CHAT_IDS": "-100",
+    "DB_URL": f"sqlite:///{DB_PATH}",
+    "TRACE_SUMMARY_LOG": "false",
+})
+
+from alembic import command  # noqa: E402
+from alembic.config import Config  # noqa: E402
+
+from app.models.base import SessionLocal, engine  # noqa: E402
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _remove_database():
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        Path(f"{DB_PATH}{suffix}").unlink(missing_ok=True)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def migrated_template():
+    """Run the migrations once and keep the result as a template database."""
+    config = Config(str(ROOT / "alembic.ini"))
+    config.set_main_option("script_location", str(ROOT / "alembic"))
+    command.upgrade(config, "head")
+    engine.dispose()
+    shutil.copyfile(DB_PATH, TEMPLATE_PATH)
+    yield
+    engine.dispose()
+    shutil.rmtree(_DB_DIR, ignore_errors=True)
+
+
+@pytest.fixture(autouse=True)
+def fresh_database(migrated_template):
+    """Give every test its own copy of the migrated database."""
+    engine.dispose()
+    _remove_database()
+    shutil.copyfile(TEMPLATE_PATH, DB_PATH)
+    yield
+    engine.dispose()
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+class FakeBot:
+    """Records Bot API calls; errors can be queued per method."""
+    
+    def __init__(self):
+        self.calls = []
+        self.errors = {}
+        self._next_message_id = 1000
+    
+    def fail(self, method: str, error: Exception):
+        self.errors.setdefault(method, []).append(error)
+    
+    async def _call(self, method: str, **kwargs):
+        self.calls.append((method, kwargs))
+        if self.errors.get(method):
+            raise self.errors[method].pop(0)
+        self._next_message_id += 1
+        return SimpleNamespace(message_id=self._next_message_id)
+    
+    async def copy_message(self, **kwargs):
+        return await self._call("copy_message", **kwargs)
+    
+    async def delete_message(self, **kwargs):
+        return await self._call("delete_message", **kwargs)
+    
+    async def send_message(self, chat_id, text, **kwargs):
+        return await self._call("send_message", chat_id=chat_id, text=text, **kwargs)
+    
+    async def get_me(self):
+        return SimpleNamespace(username="test_bot", id=123456)
+    
+    def count(self, method: str) -> int:
+        return sum(1 for name, _ in self.calls if name == method)
+
+
+@pytest.fixture
+def bot():
+    return FakeBot()
@@ -0,0 +1,46 @@
+"""Cohort and retention figures of the columnar analytics."""
+import numpy as np
+
+from app.services.analytics import AnalyticsService, WEEK_START_SHIFT
+
+
+def _brute_force_retention(user_ids, days, weeks):
+    week_of = lambda day: (day + WEEK_START_SHIFT) // 7
+    first = {}
+    for user, day in zip(user_ids, days):
+        first[user] = min(first.get(user, day), day)
+    current = max(week_of(day) for day in days)
+    active = {}
+    for user, day in zip(user_ids, days):
+        active.setdefault(user, set()).add(week_of(day) - week_of(first[user]))
+    
+    retention = []
+    for offset in range(1, weeks):
+        eligible = [user for user in first if week_of(first[user]) >= current - weeks + 1
+                    and week_of(first[user]) <= current - offset]
+        back = sum(1 for user in eligible if offset in active[user])
+        retention.append(round(100 * back / len(eligible)) if eligible else 0)
+    return retention
+
+
+def test_cohorts_with_telegram_sized_ids():
+    # Telegram user IDs are ~5e9; arrays must not be sized by the largest ID
+    user_ids = np.array([5123456789, 5123456790, 5123456789], dtype=np.int64)
+    days = np.array([20000, 20000, 20007], dtype=np.int64)
+    
+    report = AnalyticsService.cohort_retention(user_ids, days, weeks=3)
+    
+    assert report["users"] == 2
+    assert [cohort["users"] for cohort in report["cohorts"]] == [0, 2, 0]
+    assert report["cohorts"][1]["retention"] == [50]
+
+
+def test_retention_matches_brute_force():
+    rng = np.random.default_rng(7)
+    user_ids = rng.integers(0, 400, 5000) + 6000000000
+    days = rng.integers(20000, 20045, 5000)
+    
+    report = AnalyticsService.cohort_retention(user_ids, days, weeks=6)
+    
+    assert report["users"] == len(set(user_ids.tolist()))
+    assert report["retention"] == _brute_force_retention(user_ids.tolist(), days.tolist(), 6)
@@ -0,0 +1,95 @@
+"""/import builds bundles only from indexed, copyable archive messages."""
+import asyncio
+
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.types import Message
+
+from app.handlers.archive import ArchiveStates, _build_import_items, index_archive_message, start_import
+from app.models.archive import ArchiveMessage
+from app.repo.archive import ArchiveRepository
+from app.ui.fa import PersianTexts
+
+ARCHIVE_ID = -100
+
+
+def _message(message_id: int, **content) -> Message:
+    return Message.model_validate({
+        "message_id": message_id,
+        "date": 0,
+        "chat": {"id": ARCHIVE_ID, "type": "supergroup"},
+        "from": {"id": 1, "is_bot": False, "first_name": "Admin"},
+        **content,
+    })
+
+
+def _index(message: Message, state=None):
+    async def handler(event, data):
+        return None
+    
+    asyncio.run(index_archive_message(handler, message, {"raw_state": state}))
+
+
+def test_unfiltered_import_skips_unindexed_ids(db):
+    repo = ArchiveRepository(db)
+    repo.record_message(ARCHIVE_ID, 10, "photo")
+    repo.record_message(ARCHIVE_ID, 13, "document", {"text": "caption", "entities": []})
+    
+    items = _build_import_items(repo, ARCHIVE_ID, 10, 15, [])
+    
+    assert [item["message_id"] for item in items] == [10, 13]
+    assert items[1]["caption_json"] == {"text": "caption", "entities": []}
+
+
+def test_filtered_import(db):
+    repo = ArchiveRepository(db)
+    repo.record_message(ARCHIVE_ID, 10, "photo")
+    repo.record_message(ARCHIVE_ID, 11, "video")
+    
+    items = _build_import_items(repo, ARCHIVE_ID, 1, 100, ["video"])
+    
+    assert [item["message_id"] for item in items] == [11]
+
+
+def test_index_skips_commands_service_messages_and_titles(db):
+    _index(_message(1, photo=[{"file_id": "a", "file_unique_id": "a", "width": 1, "height": 1}]))
+    _index(_message(2, text="/import 1 10"))
+    _index(_message(3, pinned_message={"message_id": 1, "date": 0, "chat": {"id": ARCHIVE_ID, "type": "supergroup"}}))
+    _index(_message(4, new_chat_title="Archive"))
+    _index(_message(5, text="Bundle title"), state=ArchiveStates.waiting_import_title.state)
+    _index(_message(6, text="Notes"))
+    
+    indexed = [row.message_id for row in db.query(ArchiveMessage).order_by(ArchiveMessage.message_id)]
+    assert indexed == [1, 6]
+
+
+class _ReplyRecorder:
+    """Stands in for the bot a message is bound to and keeps the texts it's asked to send."""
+    
+    def __init__(self):
+        self.texts = []
+    
+    async def __call__(self, method, request_timeout=None):
+        self.texts.append(method.text)
+
+
+def _start_import(text: str):
+    recorder = _ReplyRecorder()
+    message = _message(100, text=text).as_(recorder)
+    state = FSMContext(MemoryStorage(), StorageKey(bot_id=1, chat_id=ARCHIVE_ID, user_id=1))
+    asyncio.run(start_import(message, state))
+    return recorder.texts
+
+
+def test_import_reports_unindexed_ids(db):
+    repo = ArchiveRepository(db)
+    for message_id in (498, 499, 500):
+        repo.record_message(ARCHIVE_ID, message_id, "photo")
+    
+    # Posts 1-497 were sent before the bot was indexing the archive
+    assert _start_import("/import 1 500") == [PersianTexts.IMPORT_CONFIRM.format(
+        count=3, unindexed=PersianTexts.IMPORT_UNINDEXED.format(count=497)
+    )]
+    assert _start_import("/import 498 500") == [PersianTexts.IMPORT_CONFIRM.format(count=3, unindexed="")]
+    assert _start_import("/import 1 100") == [PersianTexts.IMPORT_NOTHING_INDEXED.format(count=100)]
@@ -0,0 +1,230 @@
+"""Snapshots finish under concurrent writes, and restores reproduce the database."""
+import shutil
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from app.config import settings
+from app.models.base import engine
+from app.repo.bundle import BundleRepository
+from app.repo.delivery import DeliveryRepository
+from app.repo.user import UserRepository
+from app.restore import restore_backup
+from app.services import backup
+from app.services.backup import FULL_COPY_TABLES, INCREMENTAL_TABLES, BackupService
+
+
+class _FileBackupService(BackupService):
+    """Backs up a given database file instead of the configured one."""
+    
+    def __init__(self, backup_dir: Path, db_path: Path):
+        super().__init__(str(backup_dir))
+        self._db_path = db_path
+    
+    @property
+    def db_path(self) -> Path:
+        return self._db_path
+
+
+class _Writer(threading.Thread):
+    """Keeps committing small writes until stopped."""
+    
+    def __init__(self, db_path: Path):
+        super().__init__(daemon=True)
+        self.db_path = db_path
+        self.stop = threading.Event()
+        self.writes = 0
+    
+    def run(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            while not self.stop.is_set():
+                conn.execute("INSERT INTO t (payload) VALUES (randomblob(100))")
+                conn.commit()
+                self.writes += 1
+        finally:
+            conn.close()
+
+
+def _rollback_journal_db(path: Path) -> Path:
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = DELETE")
+    conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, payload BLOB)")
+    conn.executemany("INSERT INTO t (payload) VALUES (randomblob(4000))", [()] * 500)
+    conn.commit()
+    conn.close()
+    return path
+
+
+def test_database_uses_wal():
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+
+
+def test_stepped_snapshot_falls_back_to_single_step_under_writes(tmp_path, monkeypatch):
+    # Without WAL every write restarts a stepped copy, so it would never finish
+    db_path = _rollback_journal_db(tmp_path / "busy.db")
+    monkeypatch.setattr(settings, "BACKUP_PAGES_PER_STEP", 1)
+    monkeypatch.setattr(settings, "BACKUP_STEP_SLEEP", 0.001)
+    monkeypatch.setattr(settings, "BACKUP_STEP_TIMEOUT", 0.5)
+    
+    writer = _Writer(db_path)
+    writer.start()
+    try:
+        snapshot_path = tmp_path / "snapshot.db"
+        _FileBackupService(tmp_path / "backups", db_path)._snapshot(snapshot_path)
+    finally:
+        writer.stop.set()
+        writer.join()
+    
+    assert writer.writes > 0
+    conn = sqlite3.connect(snapshot_path)
+    try:
+        assert conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+        assert conn.execute("SELECT count(*) FROM t").fetchone()[0] >= 500
+    finally:
+        conn.close()
+
+
+def test_wal_snapshot_is_taken_in_one_step(tmp_path, monkeypatch, caplog):
+    db_path = _rollback_journal_db(tmp_path / "wal.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    monkeypatch.setattr(settings, "BACKUP_STEP_TIMEOUT", 0)
+    
+    writer = _Writer(db_path)
+    writer.start()
+    try:
+        _FileBackupService(tmp_path / "backups", db_path)._snapshot(tmp_path / "snapshot.db")
+    finally:
+        writer.stop.set()
+        writer.join()
+        conn.close()
+    
+    assert writer.writes > 0
+    assert "Stepped snapshot" not in caplog.text
+
+
+def test_restore_discards_stale_wal(tmp_path, db):
+    UserRepository(db).get_or_create_user(5000000001)
+    service = BackupService(str(tmp_path / "backups"))
+    result = service.create_backup()
+    
+    # A crashed bot leaves a WAL with frames the backup never saw
+    target = tmp_path / "restored" / "app.db"
+    target.parent.mkdir()
+    conn = sqlite3.connect(service.db_path)
+    try:
+        conn.execute("PRAGMA wal_autocheckpoint = 0")
+        conn.execute("INSERT INTO users (tg_user_id, first_seen, last_seen) VALUES (5000000002, 0, 0)")
+        conn.commit()
+        shutil.copyfile(service.db_path, target)
+        shutil.copyfile(f"{service.db_path}-wal", f"{target}-wal")
+    finally:
+        conn.close()
+    
+    restore_backup(Path(result["manifest_path"]), target, force=True)
+    
+    restored = sqlite3.connect(target)
+    try:
+        assert restored.execute("SELECT tg_user_id FROM users").fetchall() == [(5000000001,)]
+    finally:
+        restored.close()
+
+
+class _Clock(datetime):
+    """Moves backup names a minute apart so backups taken in one test don't collide."""
+    
+    calls = 0
+    
+    @classmethod
+    def now(cls, tz=None):
+        cls.calls += 1
+        return datetime.now(tz) + timedelta(minutes=cls.calls)
+
+
+def _bundle(db, title, items):
+    return BundleRepository(db).create_bundle_with_items(title, 1, [
+        {"from_chat_id": -100, "message_id": index + 1, "media_type": "document"}
+        for index in range(items)
+    ])
+
+
+def _table_rows(path: Path):
+    conn = sqlite3.connect(path)
+    try:
+        return {
+            table: conn.execute(f"SELECT * FROM {table} ORDER BY id").fetchall()
+            for table in list(INCREMENTAL_TABLES) + FULL_COPY_TABLES
+            if table != "settings" and table != "daily_stats"
+        }
+    finally:
+        conn.close()
+
+
+def test_incremental_restore_matches_live_database(tmp_path, db, monkeypatch):
+    monkeypatch.setattr(backup, "datetime", _Clock)
+    service = BackupService(str(tmp_path / "backups"))
+    kept = _bundle(db, "Kept", 2)
+    removed = _bundle(db, "Removed", 3)
+    deliveries = DeliveryRepository(db)
+    for user_id in (5000000001, 5000000002):
+        UserRepository(db).get_or_create_user(user_id)
+        deliveries.create_delivery(kept.id, user_id, [], datetime.utcnow())
+    assert service.create_backup()
+    
+    # Changes the incremental must carry: a deleted bundle and its items, an
+    # updated old row and a new one
+    BundleRepository(db).delete_bundle(removed.id)
+    deliveries.mark_delivery_deleted(1)
+    UserRepository(db).get_or_create_user(5000000003)
+    result = service.create_incremental_backup()
+    
+    manifest = result["manifest"]
+    assert manifest["type"] == "incremental"
+    exported = {}
+    for entry in manifest["files"]:
+        exported[entry["table"]] = exported.get(entry["table"], 0) + entry["rows"]
+    assert exported["users"] == 1
+    assert exported["deliveries"] == 1
+    
+    target = tmp_path / "restored.db"
+    restore_backup(Path(result["manifest_path"]), target)
+    
+    restored = _table_rows(target)
+    assert restored == _table_rows(service.db_path)
+    assert {row[1] for row in restored["bundle_items"]} == {kept.id}
+
+
+def test_incremental_restore_keeps_failed_deletions(tmp_path, db, monkeypatch):
+    monkeypatch.setattr(backup, "datetime", _Clock)
+    service = BackupService(str(tmp_path / "backups"))
+    bundle = _bundle(db, "Bundle", 1)
+    delivery = DeliveryRepository(db).create_delivery(bundle.id, 5000000001, [], datetime.utcnow())
+    assert service.create_backup()
+    
+    # Changes only the status of a row the base backup already has
+    DeliveryRepository(db).mark_delivery_failed(delivery.id)
+    result = service.create_incremental_backup()
+    
+    target = tmp_path / "restored.db"
+    restore_backup(Path(result["manifest_path"]), target)
+    
+    restored = sqlite3.connect(target)
+    try:
+        assert restored.execute("SELECT status FROM deliveries WHERE id = ?", (delivery.id,)).fetchone()[0] == "failed"
+    finally:
+        restored.close()
+
+
+def test_changed_rows_queries_use_indexes(db):
+    previous = {"id": 10, "time": "2026-01-01 00:00:00.000000"}
+    conn = sqlite3.connect(BackupService().db_path)
+    try:
+        for table, changed_columns in INCREMENTAL_TABLES.items():
+            sql, params = BackupService._changed_rows_query(table, changed_columns, previous)
+            plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+            assert not [step for step in plan if step.startswith("SCAN")], (table, plan)
+    finally:
+        conn.close()
@@ -0,0 +1,136 @@
+"""Stopping a broadcast checkpoints every started send, so a resumed job sends nobody twice."""
+import asyncio
+import threading
+from collections import Counter
+
+import pytest
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import CopyMessage
+
+from app.config import settings
+from app.handlers.admin import _broadcast_preview
+from app.models.user import User
+from app.services import broadcast
+from app.services.broadcast import BroadcastService
+
+USERS = 250
+
+
+@pytest.fixture(autouse=True)
+def fast_rate(monkeypatch):
+    monkeypatch.setattr(settings, "BROADCAST_INITIAL_RATE", 1000.0)
+    monkeypatch.setattr(settings, "BROADCAST_MAX_RATE", 1000.0)
+
+
+def _add_users(db):
+    db.add_all(User(tg_user_id=5000000000 + index) for index in range(USERS))
+    db.commit()
+
+
+def _recipients(bot):
+    return Counter(kwargs["chat_id"] for name, kwargs in bot.calls if name == "copy_message")
+
+
+def _run_until_stopped(service, job_id, bot, stop_after: int):
+    async def scenario():
+        stop_event = asyncio.Event()
+        copy_message = bot.copy_message
+        started = []
+        
+        async def stopping_copy_message(**kwargs):
+            started.append(kwargs["chat_id"])
+            if len(started) == stop_after:
+                stop_event.set()
+            # Still in flight when the stop is requested
+            await asyncio.sleep(0.01)
+            return await copy_message(**kwargs)
+        
+        bot.copy_message = stopping_copy_message
+        try:
+            return await service.run_job(job_id, stop_event)
+        finally:
+            bot.copy_message = copy_message
+    
+    return asyncio.run(scenario())
+
+
+def test_stopped_job_resumes_without_double_sends(db, bot):
+    _add_users(db)
+    service = BroadcastService(bot)
+    job_id = service.create_job(1, -100, 7)
+    
+    # Stop in the middle of the second checkpoint batch
+    stopped = _run_until_stopped(service, job_id, bot, stop_after=130)
+    
+    assert stopped["status"] == "running"
+    assert stopped["sent"] == sum(_recipients(bot).values()) < USERS
+    
+    finished = asyncio.run(service.run_job(job_id))
+    
+    assert finished["status"] == "completed"
+    assert finished["sent"] == USERS
+    assert set(_recipients(bot).values()) == {1}
+    assert len(_recipients(bot)) == USERS
+
+
+def test_slow_batches_are_checkpointed_by_time(db, bot, monkeypatch):
+    _add_users(db)
+    monkeypatch.setattr(broadcast, "CHECKPOINT_INTERVAL", 0)
+    service = BroadcastService(bot)
+    job_id = service.create_job(1, -100, 7)
+    checkpoints = []
+    
+    async def on_progress(job_id):
+        checkpoints.append(service.get_job_info(job_id)["sent"])
+    
+    asyncio.run(service.run_job(job_id, on_progress=on_progress))
+    
+    # Every send is checkpointed on its own once a batch has run for the interval
+    assert checkpoints[:3] == [1, 2, 3]
+
+
+def test_stop_interrupts_a_flood_wait(db, bot):
+    _add_users(db)
+    service = BroadcastService(bot)
+    job_id = service.create_job(1, -100, 7)
+    bot.fail("copy_message", TelegramRetryAfter(
+        CopyMessage(chat_id=5000000000, from_chat_id=-100, message_id=7), "Too Many Requests", 600
+    ))
+    
+    async def scenario():
+        stop_event = asyncio.Event()
+        task = asyncio.create_task(service.run_job(job_id, stop_event))
+        await asyncio.sleep(0.2)
+        stop_event.set()
+        return await asyncio.wait_for(task, timeout=2)
+    
+    stopped = asyncio.run(scenario())
+    
+    # The user whose send was waiting isn't checkpointed, so the resumed job sends to them
+    assert stopped["sent"] + stopped["failed"] == 0
+    assert asyncio.run(service.run_job(job_id))["sent"] == USERS
+    # The rate-limited attempt, then the resumed send
+    assert _recipients(bot)[5000000000] == 2
+
+
+def test_preview_counts_audience_off_the_event_loop(db, bot, monkeypatch):
+    _add_users(db)
+    threads = []
+    get_user_count = BroadcastService.get_user_count
+    
+    def recording_get_user_count(self, **kwargs):
+        threads.append(threading.current_thread())
+        return get_user_count(self, **kwargs)
+    
+    monkeypatch.setattr(BroadcastService, "get_user_count", recording_get_user_count)
+    data = {
+        "broadcast_preview": "Hello",
+        "broadcast_active_days": None,
+        "broadcast_bundle_id": None,
+        "broadcast_bundle_number": None
+    }
+    
+    text, _ = asyncio.run(_broadcast_preview(data, bot))
+    
+    assert str(USERS) in text
+    assert threads and threads[0] is not threading.main_thread()
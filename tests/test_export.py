@@ -0,0 +1,89 @@
+"""Multi-volume exports are independent gzip files; unknown tables are rejected."""
+import asyncio
+import csv
+import gzip
+import io
+from datetime import datetime, timedelta
+
+from aiogram.types import CallbackQuery
+
+from app.config import settings
+from app.handlers.admin import export_range
+from app.models.delivery import Delivery
+from app.services import export
+from app.services.export import ExportService
+from app.ui.fa import PersianTexts
+from app.utils.dates import local_date
+
+ROWS = 3000
+
+
+def _add_deliveries(db):
+    now = datetime.utcnow()
+    db.add_all(
+        Delivery(
+            bundle_id=index % 7,
+            user_id=5000000000 + index * 7919 % 100003,
+            delivered_at=now - timedelta(seconds=index),
+            messages_json=[],
+            delete_at=now
+        )
+        for index in range(ROWS)
+    )
+    db.commit()
+
+
+def _read(path) -> str:
+    with gzip.open(path, "rt", encoding="utf-8", newline="") as f:
+        return f.read()
+
+
+def test_csv_volumes_open_on_their_own(db, tmp_path, monkeypatch):
+    _add_deliveries(db)
+    monkeypatch.setattr(settings, "BACKUP_VOLUME_SIZE_MB", 0.01)
+    monkeypatch.setattr(export, "GZIP_BUFFER_MARGIN", 0)
+    today = local_date()
+    
+    result = ExportService().export("deliveries", today - timedelta(days=1), today, "csv", tmp_path)
+    
+    assert result["rows"] == ROWS
+    assert len(result["files"]) > 1
+    rows = []
+    for path in result["files"]:
+        volume = list(csv.reader(io.StringIO(_read(path))))
+        assert volume[0] == export.EXPORT_TABLES["deliveries"]["columns"]
+        rows += volume[1:]
+    assert len(rows) == ROWS
+    assert len({row[0] for row in rows}) == ROWS
+
+
+def test_single_volume_keeps_plain_name(db, tmp_path):
+    _add_deliveries(db)
+    today = local_date()
+    
+    result = ExportService().export("deliveries", today, today, "jsonl", tmp_path)
+    
+    assert [path.name for path in result["files"]] == [f"deliveries-{today:%Y%m%d}-{today:%Y%m%d}.jsonl.gz"]
+    assert len(_read(result["files"][0]).splitlines()) == result["rows"]
+
+
+class _AnswerRecorder:
+    def __init__(self):
+        self.texts = []
+    
+    async def __call__(self, method, request_timeout=None):
+        self.texts.append(method.text)
+
+
+def test_export_range_rejects_unknown_table():
+    recorder = _AnswerRecorder()
+    callback = CallbackQuery.model_validate({
+        "id": "1",
+        "from": {"id": 1, "is_bot": False, "first_name": "Admin"},
+        "chat_instance": "1",
+        "data": "export_range_bogus_7",
+    }).as_(recorder)
+    
+    asyncio.run(export_range(callback))
+    
+    assert recorder.texts == [PersianTexts.ERROR_OCCURRED]
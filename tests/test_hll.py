@@ -0,0 +1,81 @@
+"""HyperLogLog sketches merge losslessly and estimate distinct counts within error bounds."""
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import distinct, func
+
+from app.models.delivery import Delivery
+from app.repo.bundle import BundleRepository
+from app.repo.stats import StatsRepository
+from app.utils.dates import local_day_start
+from app.utils.hll import DEFAULT_PRECISION, HyperLogLog
+
+# Four standard errors of the default precision (1.04 / sqrt(2048) ~ 2.3%)
+TOLERANCE = 4 * 1.04 / (1 << DEFAULT_PRECISION) ** 0.5
+
+
+def _sketch(values) -> HyperLogLog:
+    sketch = HyperLogLog()
+    for value in values:
+        sketch.add(value)
+    return sketch
+
+
+def test_merge_equals_sketch_of_union():
+    days = [range(5000000000 + offset, 5000000000 + offset + 3000) for offset in range(0, 20000, 2000)]
+    
+    merged = HyperLogLog.union(_sketch(users).to_bytes() for users in days)
+    
+    assert merged.registers == _sketch(user for users in days for user in users).registers
+
+
+@pytest.mark.parametrize("population", [10, 500, 5000, 50000])
+def test_merged_count_is_within_error_bounds(population):
+    # Overlapping daily sets: every user shows up on several days
+    days = [
+        [5000000000 + (day * 7919 + index) % population for index in range(population // 3 + 1)]
+        for day in range(12)
+    ]
+    exact = len({user for users in days for user in users})
+    
+    estimate = HyperLogLog.union(_sketch(users).to_bytes() for users in days).count()
+    
+    assert abs(estimate - exact) <= max(1, TOLERANCE * exact)
+
+
+def test_merge_rejects_other_precision():
+    with pytest.raises(ValueError):
+        HyperLogLog(precision=10).merge(HyperLogLog(precision=11))
+
+
+def test_unique_users_over_days_and_bundles(db):
+    bundles = BundleRepository(db)
+    bundle_ids = [bundles.create_bundle_with_items(f"Bundle {index}", 1, []).id for index in range(2)]
+    first_day = date(2026, 3, 1)
+    # Each day's 400 downloaders overlap the previous day's by 250
+    for offset in range(7):
+        delivered_at = local_day_start(first_day + timedelta(days=offset)) + timedelta(hours=12)
+        for index in range(400):
+            db.add(Delivery(
+                bundle_id=bundle_ids[index % 2],
+                user_id=5000000000 + offset * 150 + index,
+                delivered_at=delivered_at,
+                messages_json=[],
+                delete_at=delivered_at
+            ))
+    db.commit()
+    stats = StatsRepository(db)
+    stats.rebuild(first_day)
+    
+    def exact(since: date, ids) -> int:
+        query = db.query(func.count(distinct(Delivery.user_id))).filter(
+            Delivery.delivered_at >= local_day_start(since),
+            Delivery.bundle_id.in_(ids)
+        )
+        return query.scalar()
+    
+    for since in (first_day, first_day + timedelta(days=4)):
+        for ids in ([bundle_ids[0]], bundle_ids):
+            assert abs(stats.get_unique_users(since, ids) - exact(since, ids)) <= TOLERANCE * exact(since, ids)
+        # The all-bundles sketch is the union of the per-bundle ones
+        assert stats.get_unique_users(since) == stats.get_unique_users(since, bundle_ids)
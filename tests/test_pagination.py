@@ -0,0 +1,79 @@
+"""Keyset pages cover every row exactly once, forwards and backwards."""
+import pytest
+
+from app.models.bundle import Bundle
+from app.repo.bundle import BundleRepository
+from app.repo.channel import ChannelRepository
+from app.repo.request import RequestRepository
+
+
+def _walk_forward(get_page, key):
+    pages = [get_page()]
+    while pages[-1].has_next:
+        pages.append(get_page(after_id=key(pages[-1].items[-1])))
+    return pages
+
+
+def _walk_backward(get_page, key, last_page):
+    pages = [last_page]
+    while pages[0].has_prev:
+        pages.insert(0, get_page(before_id=key(pages[0].items[0])))
+    return pages
+
+
+def _ids(pages):
+    return [[row.id for row in page.items] for page in pages]
+
+
+@pytest.mark.parametrize("count, limit", [(1, 3), (9, 3), (10, 3), (3, 3)])
+def test_bundle_pages_newest_first(db, count, limit):
+    repo = BundleRepository(db)
+    for index in range(count):
+        repo.create_bundle_with_items(f"Bundle {index}", 1, [])
+    # Gaps in the ids and rows outside the filter must not shift page boundaries
+    drafts = db.query(Bundle).filter(Bundle.id % 4 == 0).all()
+    for bundle in drafts:
+        bundle.status = "draft"
+    db.commit()
+    expected = [row.id for row in db.query(Bundle).filter(Bundle.status == "published").order_by(Bundle.id.desc())]
+    
+    def get_page(**kwargs):
+        return repo.get_bundles_page(limit=limit, **kwargs)
+    
+    pages = _walk_forward(get_page, lambda bundle: bundle.id)
+    
+    assert [bundle_id for page in _ids(pages) for bundle_id in page] == expected
+    assert all(len(page.items) == limit for page in pages[:-1])
+    assert not pages[0].has_prev
+    assert all(page.has_prev for page in pages[1:])
+    assert _ids(_walk_backward(get_page, lambda bundle: bundle.id, pages[-1])) == _ids(pages)
+
+
+def test_channel_pages_oldest_first(db):
+    repo = ChannelRepository(db)
+    for index in range(7):
+        repo.create_channel(-1000 - index, f"Channel {index}")
+    
+    def get_page(**kwargs):
+        return repo.get_channels_page(limit=3, **kwargs)
+    
+    pages = _walk_forward(get_page, lambda channel: channel.id)
+    
+    assert _ids(pages) == [[1, 2, 3], [4, 5, 6], [7]]
+    assert _ids(_walk_backward(get_page, lambda channel: channel.id, pages[-1])) == _ids(pages)
+
+
+def test_previous_page_after_rows_are_closed(db):
+    repo = RequestRepository(db)
+    for index in range(6):
+        repo.create_request(5000000000 + index, f"Request {index}")
+    second = repo.get_open_requests_page(after_id=5, limit=2)
+    assert [row.id for row in second.items] == [4, 3]
+    
+    # Resolving a request on the first page while the second one is shown
+    repo.resolve_request(6)
+    previous = repo.get_open_requests_page(before_id=4, limit=2)
+    
+    assert [row.id for row in previous.items] == [5]
+    assert not previous.has_prev
+    assert previous.has_next
@@ -0,0 +1,70 @@
+"""Query budgets of flows that used to run a query per row."""
+import asyncio
+from datetime import datetime, timedelta
+
+from app.models.delivery import Delivery
+from app.repo.bundle import BundleRepository
+from app.services.deletion import DeletionService
+from app.utils.tracing import query_budget
+
+
+def _add_due_deliveries(db, bundle_ids, count):
+    for index in range(count):
+        db.add(Delivery(
+            user_id=5000000000 + index,
+            bundle_id=bundle_ids[index % len(bundle_ids)],
+            messages_json=[{"chat_id": 5000000000 + index, "message_id": index + 1}],
+            delete_at=datetime.utcnow() - timedelta(seconds=5),
+            status="delivered"
+        ))
+    db.commit()
+
+
+def _items(count):
+    return [
+        {"from_chat_id": -100, "message_id": index + 1, "media_type": "document"}
+        for index in range(count)
+    ]
+
+
+def test_pending_deletions_look_up_bundles_once(db, bot):
+    repo = BundleRepository(db)
+    bundle_ids = [repo.create_bundle_with_items(f"Bundle {i}", 1, _items(1)).id for i in range(3)]
+    _add_due_deliveries(db, bundle_ids, 10)
+    
+    # One query for the due deliveries, one for their bundles, then a fixed
+    # number per delivery: mark deleted (select, update) and the ending
+    # message lookup (2)
+    with query_budget(2 + 4 * 10):
+        asyncio.run(DeletionService(bot).process_pending_deletions())
+    
+    assert bot.count("delete_message") == 10
+    assert db.query(Delivery).filter(Delivery.status == "deleted").count() == 10
+
+
+def test_pending_deletions_query_count_grows_linearly(db, bot):
+    repo = BundleRepository(db)
+    bundle_ids = [repo.create_bundle_with_items(f"Bundle {i}", 1, _items(1)).id for i in range(10)]
+    
+    _add_due_deliveries(db, bundle_ids[:1], 5)
+    with query_budget(1000) as few:
+        asyncio.run(DeletionService(bot).process_pending_deletions())
+    
+    _add_due_deliveries(db, bundle_ids, 10)
+    with query_budget(1000) as many:
+        asyncio.run(DeletionService(bot).process_pending_deletions())
+    
+    # More distinct bundles must not add bundle lookups
+    assert many.count - few.count == 4 * 5
+
+
+def test_create_bundle_with_items_is_constant(db):
+    repo = BundleRepository(db)
+    with query_budget(1000) as small:
+        repo.create_bundle_with_items("Small", 1, _items(2))
+    
+    with query_budget(small.count) as large:
+        bundle = repo.create_bundle_with_items("Large", 1, _items(200))
+    
+    assert large.count <= 8
+    assert len(bundle.items) == 200
@@ -0,0 +1,97 @@
+"""Bundle search normalizes Persian text, ranks code and number hits first and pages in SQL."""
+import sqlite3
+
+import pytest
+from sqlalchemy import text
+
+from app.models.base import engine
+from app.repo.bundle import BundleRepository
+
+
+def _create(db, *titles):
+    repo = BundleRepository(db)
+    return [repo.create_bundle_with_items(title, 1, []) for title in titles]
+
+
+def _ids(bundles):
+    return [bundle.id for bundle in bundles]
+
+
+@pytest.mark.parametrize("title, query", [
+    # Arabic yeh and kaf against their Persian forms, both ways
+    ("كتاب علمي", "کتاب علمی"),
+    ("کتاب علمی", "كتاب علمي"),
+    # ZWNJ separates word parts, so either part matches
+    ("می‌خواهم", "خواهم"),
+    ("می‌خواهم", "می‌خواهم"),
+    # Persian digits match ASCII ones, both ways
+    ("فیزیک ۱۴۰۲", "1402"),
+    ("فیزیک 1402", "۱۴۰۲"),
+    # Terms match as prefixes
+    ("کتابخانه", "كتا"),
+])
+def test_persian_variants_match(db, title, query):
+    bundle, _ = _create(db, title, "Unrelated")
+    
+    assert _ids(BundleRepository(db).search_bundles(query)) == [bundle.id]
+
+
+def test_renamed_draft_is_reindexed(db):
+    repo = BundleRepository(db)
+    draft = repo.create_draft(1)
+    assert repo.search_bundles("کتاب") == []
+    
+    repo.finalize_draft(draft.id, "كتاب")
+    
+    assert _ids(repo.search_bundles("کتاب")) == [draft.id]
+
+
+def test_code_and_number_hits_rank_before_title_hits(db):
+    first, mentions_first, twin, newer_twin = _create(db, "Physics", "Notes on 0001", "Twin", "Twin")
+    
+    repo = BundleRepository(db)
+    
+    assert _ids(repo.search_bundles("0001")) == [first.id, mentions_first.id]
+    assert _ids(repo.search_bundles(first.code)) == [first.id]
+    # Equal scores: newest first
+    assert _ids(repo.search_bundles("twin")) == [newer_twin.id, twin.id]
+
+
+def test_pages_cover_every_hit_once(db):
+    _create(db, *[f"Series {index}" for index in range(7)])
+    repo = BundleRepository(db)
+    
+    everything = _ids(repo.search_bundles("series", limit=10))
+    pages = [_ids(repo.search_bundles("series", limit=3, offset=offset)) for offset in (0, 3, 6, 9)]
+    
+    assert len(everything) == 7
+    assert pages == [everything[0:3], everything[3:6], everything[6:], []]
+
+
+def test_like_fallback_without_index(db):
+    bundle, _ = _create(db, "كتاب علمي", "Unrelated")
+    for trigger in ("insert", "update", "delete"):
+        db.execute(text(f"DROP TRIGGER bundles_fts_{trigger}"))
+    db.execute(text("DROP TABLE bundles_fts"))
+    db.commit()
+    
+    repo = BundleRepository(db)
+    
+    # Still Persian-normalized through search_title
+    assert _ids(repo.search_bundles("کتاب")) == [bundle.id]
+    assert _ids(repo.search_bundles(bundle.code.lower())) == [bundle.id]
+
+
+def test_writes_without_registered_functions(db):
+    bundle, = _create(db, "Physics")
+    
+    # A plain sqlite3 connection, like the sqlite3 shell, registers no fa_normalize
+    conn = sqlite3.connect(engine.url.database)
+    try:
+        conn.execute("UPDATE bundles SET code = 'RAW-1' WHERE id = ?", (bundle.id,))
+        conn.execute("DELETE FROM bundles WHERE id = ?", (bundle.id,))
+        conn.commit()
+    finally:
+        conn.close()
+    
+    assert BundleRepository(db).search_bundles("physics") == []
@@ -0,0 +1,122 @@
+"""Updates queued on shard workers see current FSM state, reach error handlers and send returned methods."""
+import asyncio
+
+from aiogram import Bot, Dispatcher, Router
+from aiogram.filters import Command, StateFilter
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.methods import SendMessage
+from aiogram.types import ErrorEvent, Message, Update
+
+from app.middlewares import ShardedUpdateMiddleware
+
+
+class RecordingStates(StatesGroup):
+    recording = State()
+
+
+def _message_update(update_id: int, text: str, user_id: int = 42) -> Update:
+    return Update.model_validate({
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": "Test"},
+            "text": text,
+        },
+    })
+
+
+class _RecordingBot(Bot):
+    """Records the methods it is called with instead of sending them."""
+    
+    def __init__(self):
+        super().__init__("123456:TEST")
+        self.methods = []
+    
+    async def __call__(self, method, request_timeout=None):
+        self.methods.append(method)
+
+
+async def _run(dispatcher: Dispatcher, updates, bot: Bot = None):
+    bot = bot or Bot("123456:TEST")
+    middleware = ShardedUpdateMiddleware(workers=2, queue_size=10)
+    middleware.setup(dispatcher)
+    await middleware.start()
+    try:
+        for update in updates:
+            await dispatcher.feed_update(bot, update)
+    finally:
+        await middleware.stop()
+        await bot.session.close()
+
+
+def test_queued_update_sees_state_set_by_previous_update():
+    seen = []
+    router = Router()
+    
+    @router.message(Command("add"))
+    async def start_recording(message: Message, state: FSMContext):
+        # Give the next update time to be queued behind this one
+        await asyncio.sleep(0.05)
+        await state.set_state(RecordingStates.recording)
+    
+    @router.message(StateFilter(RecordingStates.recording))
+    async def record(message: Message):
+        seen.append(("recorded", message.text))
+    
+    @router.message()
+    async def fallback(message: Message):
+        seen.append(("fallback", message.text))
+    
+    dispatcher = Dispatcher()
+    dispatcher.include_router(router)
+    asyncio.run(_run(dispatcher, [_message_update(1, "/add"), _message_update(2, "item")]))
+    
+    assert seen == [("recorded", "item")]
+
+
+def test_worker_errors_reach_error_handlers():
+    errors = []
+    router = Router()
+    
+    @router.message()
+    async def failing(message: Message):
+        raise ValueError("boom")
+    
+    dispatcher = Dispatcher()
+    dispatcher.include_router(router)
+    
+    @dispatcher.errors()
+    async def on_error(event: ErrorEvent):
+        errors.append(str(event.exception))
+        return True
+    
+    asyncio.run(_run(dispatcher, [_message_update(1, "hello")]))
+    
+    assert errors == ["boom"]
+
+
+def test_returned_methods_are_sent():
+    router = Router()
+    
+    @router.message()
+    async def echo(message: Message):
+        return message.answer(message.text)
+    
+    dispatcher = Dispatcher()
+    dispatcher.include_router(router)
+    bot = _RecordingBot()
+    asyncio.run(_run(dispatcher, [_message_update(1, "hello")], bot))
+    
+    assert [(type(method), method.chat_id, method.text) for method in bot.methods] == [(SendMessage, 42, "hello")]
+
+
+def test_setup_runs_sharding_before_builtin_middlewares():
+    dispatcher = Dispatcher()
+    middleware = ShardedUpdateMiddleware(workers=1, queue_size=1)
+    middleware.setup(dispatcher)
+    
+    assert dispatcher.update.outer_middleware[0] is middleware
+    assert dispatcher.fsm in list(dispatcher.update.outer_middleware)
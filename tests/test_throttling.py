@@ -0,0 +1,119 @@
+"""Admission control sheds bulk updates first and never waits for a slot."""
+import asyncio
+from types import SimpleNamespace
+
+from aiogram.types import CallbackQuery, Message
+
+from app.middlewares.throttling import (
+    PRIORITY_BULK, PRIORITY_INTERACTIVE, ThrottlingMiddleware, get_priority
+)
+from app.ui.fa import PersianTexts
+
+USER = {"id": 42, "is_bot": False, "first_name": "Test"}
+
+
+def _message(text: str, user_id: int = 42) -> Message:
+    return Message.model_validate({
+        "message_id": 1,
+        "date": 0,
+        "chat": {"id": user_id, "type": "private"},
+        "from": dict(USER, id=user_id),
+        "text": text,
+    })
+
+
+def _callback(data: str) -> CallbackQuery:
+    return CallbackQuery.model_validate({"id": "1", "from": USER, "chat_instance": "1", "data": data})
+
+
+def _middleware(**kwargs) -> ThrottlingMiddleware:
+    options = dict(rate_limit=100, rate_window=60, max_concurrency=3, bulk_concurrency=1, admin_ids=[1])
+    options.update(kwargs)
+    middleware = ThrottlingMiddleware(**options)
+    middleware.replies = []
+    
+    async def record_reply(event, text):
+        middleware.replies.append(text)
+    
+    middleware._reply = record_reply
+    return middleware
+
+
+def test_priorities():
+    assert get_priority(_message("/start ABC123")) == PRIORITY_BULK
+    assert get_priority(_callback("join_check")) == PRIORITY_BULK
+    assert get_priority(_message("/start")) == PRIORITY_INTERACTIVE
+    assert get_priority(_message("hello")) == PRIORITY_INTERACTIVE
+    assert get_priority(_callback("other")) == PRIORITY_INTERACTIVE
+
+
+def test_bulk_is_shed_while_interactive_is_admitted():
+    async def scenario():
+        middleware = _middleware()
+        release = asyncio.Event()
+        handled = []
+        
+        async def slow_handler(event, data):
+            handled.append(event.text)
+            await release.wait()
+        
+        async def fast_handler(event, data):
+            handled.append(event.text)
+        
+        def data(user_id):
+            return {"event_from_user": SimpleNamespace(id=user_id)}
+        
+        # One delivery in flight uses up the bulk capacity
+        running = asyncio.create_task(middleware(slow_handler, _message("/start CODE1", 100), data(100)))
+        await asyncio.sleep(0)
+        
+        await middleware(fast_handler, _message("/start CODE2", 101), data(101))
+        await middleware(fast_handler, _message("/start", 102), data(102))
+        
+        release.set()
+        await running
+        return middleware, handled
+    
+    middleware, handled = asyncio.run(scenario())
+    
+    assert handled == ["/start CODE1", "/start"]
+    assert middleware.replies == [PersianTexts.SERVER_BUSY]
+    assert middleware.in_flight == 0
+
+
+def test_interactive_is_shed_at_max_concurrency_without_waiting():
+    async def scenario():
+        middleware = _middleware(max_concurrency=1)
+        release = asyncio.Event()
+        
+        async def slow_handler(event, data):
+            await release.wait()
+        
+        running = asyncio.create_task(
+            middleware(slow_handler, _message("hi", 100), {"event_from_user": SimpleNamespace(id=100)})
+        )
+        await asyncio.sleep(0)
+        
+        # Must return at once rather than wait for the running handler
+        await asyncio.wait_for(
+            middleware(slow_handler, _message("hi", 101), {"event_from_user": SimpleNamespace(id=101)}),
+            timeout=0.1
+        )
+        release.set()
+        await running
+        return middleware
+    
+    assert asyncio.run(scenario()).replies == [PersianTexts.SERVER_BUSY]
+
+
+def test_admins_are_exempt():
+    async def scenario():
+        middleware = _middleware(max_concurrency=1, bulk_concurrency=1)
+        middleware.in_flight = 5
+        
+        async def handler(event, data):
+            return "ok"
+        
+        return await middleware(handler, _message("/start CODE", 1), {"event_from_user": SimpleNamespace(id=1)})
+    
+    assert asyncio.run(scenario()) == "ok"
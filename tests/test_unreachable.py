@@ -0,0 +1,69 @@
+"""Only errors about the user's own chat mark them unreachable."""
+import asyncio
+
+import pytest
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+from aiogram.methods import CopyMessage, DeleteMessage, SendMessage
+
+from app.models.user import User
+from app.repo.bundle import BundleRepository
+from app.repo.user import UserRepository
+from app.services.delivery import DeliveryService
+from app.utils.helpers import get_unreachable_reason
+
+USER_ID = 5123456789
+ARCHIVE_ID = -1001234567890
+
+
+def _copy():
+    return CopyMessage(chat_id=USER_ID, from_chat_id=ARCHIVE_ID, message_id=7)
+
+
+@pytest.mark.parametrize("error, source_ok, reason", [
+    (TelegramForbiddenError(_copy(), "Forbidden: bot was blocked by the user"), False, "blocked"),
+    (TelegramForbiddenError(_copy(), "Forbidden: user is deactivated"), False, "deactivated"),
+    (TelegramForbiddenError(_copy(), "Forbidden: bot is not a member of the channel chat"), False, None),
+    (TelegramForbiddenError(_copy(), "Forbidden: bot was kicked from the channel chat"), True, None),
+    (TelegramBadRequest(_copy(), "Bad Request: chat not found"), False, None),
+    (TelegramBadRequest(_copy(), "Bad Request: chat not found"), True, "chat_not_found"),
+    (TelegramBadRequest(_copy(), "Bad Request: message to copy not found"), True, None),
+    (TelegramBadRequest(SendMessage(chat_id=USER_ID, text="x"), "Bad Request: chat not found"), False, "chat_not_found"),
+    (TelegramForbiddenError(SendMessage(chat_id=-100, text="x"), "Forbidden: bot was blocked by the user"), False, None),
+    (TelegramForbiddenError(DeleteMessage(chat_id=USER_ID, message_id=1), "Forbidden: bot was blocked by the user"),
+     False, "blocked"),
+])
+def test_get_unreachable_reason(error, source_ok, reason):
+    assert get_unreachable_reason(error, USER_ID, source_ok) == reason
+
+
+def _bundle(db, sources):
+    items = [
+        {"from_chat_id": source, "message_id": index + 1, "media_type": "document"}
+        for index, source in enumerate(sources)
+    ]
+    return BundleRepository(db).create_bundle_with_items("Bundle", 1, items)
+
+
+def _reachability(db):
+    db.expire_all()
+    return db.query(User).filter(User.tg_user_id == USER_ID).one().reachability
+
+
+def test_delivery_keeps_user_reachable_on_source_errors(db, bot):
+    UserRepository(db).get_or_create_user(USER_ID)
+    bundle = _bundle(db, [ARCHIVE_ID, ARCHIVE_ID])
+    bot.fail("copy_message", TelegramForbiddenError(_copy(), "Forbidden: bot is not a member of the channel chat"))
+    bot.fail("copy_message", TelegramBadRequest(_copy(), "Bad Request: chat not found"))
+    
+    assert not asyncio.run(DeliveryService(bot).deliver_bundle(bundle.code, USER_ID))
+    assert _reachability(db) is None
+
+
+def test_delivery_marks_blocked_user(db, bot):
+    UserRepository(db).get_or_create_user(USER_ID)
+    bundle = _bundle(db, [ARCHIVE_ID, ARCHIVE_ID])
+    bot.fail("copy_message", TelegramForbiddenError(_copy(), "Forbidden: bot was blocked by the user"))
+    
+    assert not asyncio.run(DeliveryService(bot).deliver_bundle(bundle.code, USER_ID))
+    assert _reachability(db) == "blocked"
+    assert bot.count("copy_message") == 1